@@ -0,0 +1,45 @@
+"""
+CRNN 실행 방식(fp32 / fused / int8) 추론 지연 비교 벤치마크.
+
+워커와 같은 조건(스레드 1개, inference_mode)에서 배치 크기별 forward 시간을 측정합니다.
+학습된 가중치가 없으면 무작위 가중치를 사용하므로 속도 비교 용도로만 사용하세요.
+
+실행: python benchmarks/bench_inference.py [model.pt]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import torch
+from core.ai_engine import CRNN, NUM_CLASSES, RUNTIME_VARIANTS, build_runtime_variant
+
+# captcha_solver 의 MODEL_MELON 입력 크기
+INPUT = {"width": 230, "height": 70}
+BATCH_SIZES = [1, 8]
+REPEAT = 5
+NUMBER = 5
+
+def main():
+    torch.set_num_threads(1)
+    model = CRNN(img_h=INPUT["height"], num_classes=NUM_CLASSES)
+    if len(sys.argv) > 1:
+        model.load_state_dict(torch.load(sys.argv[1], map_location="cpu"))
+    model.eval()
+    variants = {name: build_runtime_variant(model, name, torch.device("cpu")) for name in RUNTIME_VARIANTS}
+
+    print(f"{'batch':>5} | " + " | ".join(f"{name + ' (ms)':>12}" for name in variants) + " | int8 speedup")
+    print("-" * 64)
+    for batch_size in BATCH_SIZES:
+        x = torch.rand(batch_size, 1, INPUT["height"], INPUT["width"])
+        timings = {}
+        with torch.inference_mode():
+            for name, variant in variants.items():
+                variant(x)
+                timings[name] = min(timeit.repeat(lambda: variant(x), number=NUMBER, repeat=REPEAT)) / NUMBER
+        row = " | ".join(f"{timings[name] * 1000:>12.2f}" for name in variants)
+        print(f"{batch_size:>5} | {row} | {timings['fp32'] / timings['int8']:>6.2f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+HTML 주입 지점 탐색 벤치마크.
+
+기존 방식(문자열 디코딩 + 매 응답마다 정규식 컴파일 + search/sub 전체 스캔 + 재인코딩)과
+현재 방식(바이트 단위, 문서 끝에서부터 마지막 </body> 탐색 + 단일 splice)을 1~10 MB 문서로 비교합니다.
+</body> 탐색만 따로 비교하기 위해, 같은 바이트열에 대한 정방향 RE_BODY_END.search (forward) 와
+끝에서부터 찾는 find_body_end (tail) 도 </body> 가 있는 문서 / 없는 문서 각각에서 측정합니다.
+
+실행: python benchmarks/bench_injection.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.injector import inject_script, find_body_end, RE_BODY_END
+
+SIZES_MB = [1, 2, 5, 10]
+REPEAT = 5
+
+def make_document(size_mb: int, body_end: bool = True) -> bytes:
+    chunk = "<div class='item'><span>항목</span><a href='/x'>link</a></div>\n".encode("utf-8")
+    body = chunk * (size_mb * 1024 * 1024 // len(chunk))
+    tail = b"</body></html>" if body_end else b"</html>"
+    return b"<html><head><title>bench</title></head><body>" + body + tail
+
+def legacy_inject(html: bytes, injection_code: str) -> bytes:
+    """기존 Injector.process 의 처리 흐름을 그대로 재현"""
+    text = html.decode("utf-8")
+    pattern = re.compile(r'(</body>)', re.IGNORECASE)
+    if pattern.search(text):
+        text = pattern.sub(lambda m: injection_code + m.group(0), text)
+    else:
+        text = text + injection_code
+    return text.encode("utf-8")
+
+def forward_body_end(html: bytes) -> int:
+    """바이트열 전체를 앞에서부터 정규식으로 검색 (디코딩 없이, 탐색 방향만 다름)"""
+    m = RE_BODY_END.search(html)
+    return m.start() if m else -1
+
+def main():
+    scripts = ["http://127.0.0.1:8000/plugins/bench/content.js"]
+    injection_code = '<script src="%s"></script>' % scripts[0]
+
+    print(f"{'size':>6} | {'</body>':>7} | {'legacy (ms)':>12} | {'inject (ms)':>12} | speedup "
+          f"| {'forward (ms)':>12} | {'tail (ms)':>12} | speedup")
+    print("-" * 100)
+    for size_mb in SIZES_MB:
+        for body_end in (True, False):
+            html = make_document(size_mb, body_end)
+            assert find_body_end(html) == forward_body_end(html)
+            legacy = min(timeit.repeat(lambda: legacy_inject(html, injection_code), number=1, repeat=REPEAT))
+            current = min(timeit.repeat(lambda: inject_script(html, 8000, body_scripts=scripts), number=1, repeat=REPEAT))
+            forward = min(timeit.repeat(lambda: forward_body_end(html), number=1, repeat=REPEAT))
+            tail = min(timeit.repeat(lambda: find_body_end(html), number=1, repeat=REPEAT))
+            print(
+                f"{size_mb:>4}MB | {'yes' if body_end else 'no':>7} | {legacy * 1000:>12.2f} | {current * 1000:>12.2f} "
+                f"| {legacy / current:>6.1f}x | {forward * 1000:>12.3f} | {tail * 1000:>12.3f} | {forward / tail:>6.1f}x"
+            )
+
+if __name__ == "__main__":
+    main()
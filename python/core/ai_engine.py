@@ -1,16 +1,34 @@
 import os
 import sys
 import io
+import copy
+import glob
+import hashlib
 import time
+import asyncio
 import base64
 import string
 import logging
+import threading
+import warnings
 import traceback
+import multiprocessing
 import concurrent.futures
+from concurrent.futures.process import BrokenProcessPool
+from core.config import load_system_settings
+from core.model_registry import ModelRegistry
+from core.plugin_loader import plugin_loader
 
 # [CPU Optimization]
-os.environ["OMP_NUM_THREADS"] = "1"
-os.environ["MKL_NUM_THREADS"] = "1"
+# API 프로세스와 여기서 띄우는 플러그인 서브프로세스(worker_manager)는 1 스레드로 고정
+# (AI 워커 풀의 스레드 수는 _init_worker 에서 torch.set_num_threads 로만 설정)
+os.environ.setdefault("OMP_NUM_THREADS", "1")
+os.environ.setdefault("MKL_NUM_THREADS", "1")
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
 
 try:
     import torch
@@ -36,10 +54,31 @@ NUM_CLASSES = len(ALPHABETS) # 26
 BLANK_LABEL = 26
 IDX_TO_CHAR = {i: c for i, c in enumerate(ALPHABETS)}
 
-SUPPORTED_MODELS = {
-    "MODEL_MELON": {"width": 230, "height": 70, "filename": "model_melon.pt"},
-    "MODEL_NOL":   {"width": 210, "height": 70, "filename": "model_nol.pt"}
-}
+# 모델 정의(입력 크기, 구조, 실행 옵션)는 플러그인 manifest 의 inference.models 에서 읽음
+# -> core.model_registry.ModelRegistry 가 만든 spec dict 가 워커로 전달됨
+
+# [Runtime Variants] 모델별 실행 방식 (manifest runtime.variant -> spec["runtime"])
+# - fp32:  학습된 모델 그대로
+# - fused: Conv+BN+ReLU 를 하나의 연산으로 합침 (BN 을 Conv 가중치에 접어 넣으므로 결과 동일)
+# - int8:  fused + LSTM/Linear 동적 int8 양자화 (CPU 전용)
+RUNTIME_VARIANTS = ("fp32", "fused", "int8")
+# fp32 대비 샘플 문자열 일치율이 이 값 미만이면 fp32 로 되돌림 (모델별 runtime.min_agreement 로 변경 가능)
+DEFAULT_MIN_AGREEMENT = 0.98
+# 정확도 검사용 샘플 이미지: <모델 파일 폴더>/samples/<model_key>/*.png
+SAMPLE_DIRNAME = "samples"
+
+# [TorchScript Artifacts] trace + freeze 한 모델을 .pt 옆에 저장하여 다음 워커 시작 시 바로 로드
+# (모델별 runtime.torchscript: false 로 끌 수 있음)
+ARTIFACT_SUFFIX = ".ts"
+
+# [Worker Sizing]
+# 워커 하나가 모델 외에 사용하는 메모리 (Python + Torch 런타임)
+WORKER_BASE_MEMORY = 350 * 1024 * 1024
+# 워커 수 자동 계산 시 사용할 가용 메모리 비율
+WORKER_MEMORY_BUDGET = 0.5
+# 워커 프로세스 시작 방식 (max_tasks_per_child 는 fork 와 함께 쓸 수 없고, Windows 는 spawn 만 지원)
+# spawn 워커는 __main__ 을 다시 import 하므로 모듈 import 만으로는 AIEngine 을 만들지 않음 (get_ai_engine)
+WORKER_START_METHOD = "spawn"
 
 # ------------------------------------------------------------------------------
 # [Model Architecture] (Ported from plugins/captcha_solver/backend.py)
@@ -84,6 +123,225 @@ if HAS_DEPS:
             x = x.permute(1, 0, 2)
             return x
 
+    # manifest 의 architecture 값 -> 모델 클래스 (core.model_registry.SUPPORTED_ARCHITECTURES)
+    ARCHITECTURES = {"crnn": CRNN}
+
+# 모델별 전용 풀을 지정하지 않은 모델이 사용하는 공용 워커 풀 이름
+DEFAULT_POOL = "default"
+
+# ------------------------------------------------------------------------------
+# [Runtime Variants]
+# ------------------------------------------------------------------------------
+def _fuse_conv_bn_relu(model):
+    """eval 모드 CRNN 의 Conv+BN+ReLU 묶음을 fuse 한 복사본을 반환합니다."""
+    fused = copy.deepcopy(model).eval()
+    groups = [
+        [str(i), str(i + 1), str(i + 2)]
+        for i, layer in enumerate(fused.cnn) if isinstance(layer, nn.Conv2d)
+    ]
+    fused.cnn = torch.ao.quantization.fuse_modules(fused.cnn, groups)
+    return fused
+
+def build_runtime_variant(model, variant, device=None):
+    """
+    fp32 모델로부터 지정한 실행 방식의 모델을 만듭니다. (원본 모델은 변경하지 않음)
+    int8 는 CPU 에서만 지원하므로 GPU 에서는 fused 모델을 반환합니다.
+    """
+    if variant not in RUNTIME_VARIANTS:
+        raise ValueError(f"Unknown runtime variant: {variant}")
+    if variant == "fp32":
+        return model
+
+    optimized = _fuse_conv_bn_relu(model)
+    if variant == "int8":
+        if device is not None and device.type != "cpu":
+            logger.warning(f"int8 quantization is CPU only; using fused fp32 on {device}")
+            return optimized
+        with warnings.catch_warnings():
+            # torch.ao.quantization 의 deprecation 경고는 워커마다 반복되므로 숨김
+            warnings.simplefilter("ignore")
+            optimized = torch.ao.quantization.quantize_dynamic(
+                optimized, {nn.LSTM, nn.Linear}, dtype=torch.qint8
+            )
+    return optimized.eval()
+
+def load_sample_batch(spec):
+    """정확도 검사용 샘플 이미지를 (N, 1, H, W) 텐서로 읽습니다. (샘플이 없으면 None)"""
+    sample_dir = os.path.join(os.path.dirname(spec["path"]), SAMPLE_DIRNAME, spec["key"])
+    paths = sorted(
+        path for pattern in ("*.png", "*.jpg", "*.jpeg")
+        for path in glob.glob(os.path.join(sample_dir, pattern))
+    )
+    tensors = []
+    for path in paths:
+        with open(path, "rb") as f:
+            tensors.append(_preprocess_in_worker(f.read(), spec["width"], spec["height"]))
+    return torch.cat(tensors, dim=0) if tensors else None
+
+def check_variant_accuracy(reference, candidate, samples):
+    """샘플에 대해 두 모델의 greedy decoding 결과가 일치하는 비율 (0.0 ~ 1.0)"""
+    with torch.inference_mode():
+        expected = _greedy_decode(reference(samples))[0]
+        actual = _greedy_decode(candidate(samples))[0]
+    return sum(a == b for a, b in zip(expected, actual)) / len(expected)
+
+def _apply_runtime_variant(spec, model, device):
+    """
+    spec["runtime"] 에 맞는 모델을 만들고 fp32 모델과 정확도를 비교합니다.
+    샘플이 없어 검사할 수 없거나, 일치율이 min_agreement 미만이거나, 변환에 실패하면
+    fp32 모델을 그대로 사용합니다.
+    (모델, 실제로 사용한 variant) 를 반환합니다.
+    """
+    model_key = spec["key"]
+    variant = spec.get("runtime") or "fp32"
+    if variant == "fp32":
+        return model, "fp32"
+    try:
+        samples = load_sample_batch(spec)
+        if samples is None:
+            sample_dir = os.path.join(os.path.dirname(spec["path"]), SAMPLE_DIRNAME, model_key)
+            logger.warning(f"{model_key}: no samples in {sample_dir} to verify {variant}; using fp32")
+            return model, "fp32"
+        optimized = build_runtime_variant(model, variant, device)
+        agreement = check_variant_accuracy(model, optimized, samples.to(device))
+    except Exception as e:
+        logger.error(f"{model_key}: {variant} variant failed ({e}); using fp32")
+        return model, "fp32"
+
+    min_agreement = spec.get("min_agreement")
+    if min_agreement is None:
+        min_agreement = DEFAULT_MIN_AGREEMENT
+    if agreement < min_agreement:
+        logger.warning(
+            f"{model_key}: {variant} agreement {agreement:.1%} < {min_agreement:.1%} on "
+            f"{len(samples)} samples; using fp32"
+        )
+        return model, "fp32"
+    logger.info(f"{model_key}: using {variant} ({agreement:.1%} agreement on {len(samples)} samples)")
+    return optimized, variant
+
+# ------------------------------------------------------------------------------
+# [TorchScript Artifacts]
+# ------------------------------------------------------------------------------
+def _file_sha256(path, chunk_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def artifact_path(model_path, variant, device, sha256=None):
+    """
+    TorchScript artifact 경로: <model>.<runtime>.<device>.<sha256 16자>.torch<버전>.ts
+    가중치, torch 버전, runtime, device 중 하나라도 바뀌면 다른 파일이 되어 새로 만들어집니다.
+    (sha256 은 registry 가 이미 계산한 값이 있으면 그대로 사용)
+    """
+    stem = os.path.splitext(model_path)[0]
+    digest = (sha256 or _file_sha256(model_path))[:16]
+    return f"{stem}.{variant}.{device.type}.{digest}.torch{torch.__version__}{ARTIFACT_SUFFIX}"
+
+def load_artifact(path, device):
+    """저장된 artifact 를 로드합니다. 손상된 파일은 지우고 None 을 반환합니다."""
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            return torch.jit.load(path, map_location=device)
+    except Exception as e:
+        logger.warning(f"Discarding unreadable model artifact {path}: {e}")
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+
+def export_artifact(model, path, spec, device):
+    """
+    model 을 trace + freeze 하여 path 에 저장하고 ScriptModule 을 반환합니다.
+    trace 에 실패하면 원래 모델을, 저장에만 실패하면 (읽기 전용 폴더 등) ScriptModule 을 그대로 반환합니다.
+    """
+    dummy = torch.zeros(1, 1, spec["height"], spec["width"], device=device)
+    try:
+        # torch.jit 의 deprecation 경고 및 trace 경고는 워커마다 반복되므로 숨김
+        with warnings.catch_warnings(), torch.no_grad():
+            warnings.simplefilter("ignore")
+            scripted = torch.jit.freeze(torch.jit.trace(model, dummy))
+    except Exception as e:
+        logger.warning(f"TorchScript export failed for {path}: {e}")
+        return model
+
+    # 여러 워커가 동시에 만들 수 있으므로 프로세스별 임시 파일에 쓴 뒤 교체
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            torch.jit.save(scripted, tmp)
+        os.replace(tmp, path)
+    except Exception as e:
+        logger.warning(f"Could not save model artifact {path}: {e}")
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        return scripted
+
+    # 같은 모델/runtime/device 의 이전 artifact (가중치 또는 torch 버전이 바뀐 것) 정리
+    prefix = path[:path.rindex(".torch")].rsplit(".", 1)[0]
+    for stale in glob.glob(f"{glob.escape(prefix)}.*{ARTIFACT_SUFFIX}"):
+        if stale != path:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    return scripted
+
+# ------------------------------------------------------------------------------
+# [Worker Sizing]
+# ------------------------------------------------------------------------------
+def estimate_model_footprint(specs=()):
+    """
+    워커 하나가 주어진 모델(spec)을 모두 올렸을 때의 메모리 추정치 (bytes).
+    모델 파일이 있으면 파일 크기, 없으면 모델 파라미터/버퍼 크기를 측정하며
+    추론 중 activation 여유분으로 가중치의 2배를 잡습니다.
+    워커를 띄우기 전에 쓰는 휴리스틱이며, warm-up 이 끝나면 실측 RSS 로 다시 계산합니다. (AIEngine.warmup)
+    """
+    total = 0
+    for spec in specs:
+        model_path = spec.get("path")
+        if model_path and os.path.exists(model_path):
+            size = os.path.getsize(model_path)
+        elif HAS_DEPS and spec.get("architecture") in ARCHITECTURES:
+            model = ARCHITECTURES[spec["architecture"]](img_h=spec["height"], num_classes=NUM_CLASSES)
+            tensors = list(model.parameters()) + list(model.buffers())
+            size = sum(t.numel() * t.element_size() for t in tensors)
+        else:
+            size = 0
+        total += size * 2
+    return WORKER_BASE_MEMORY + total
+
+def resolve_worker_count(setting, footprint, cpu_count=None, available_memory=None):
+    """
+    config 의 ai_engine.workers 값으로 워커 수를 정합니다.
+    정수면 그대로 사용하고, "auto"(또는 미지정)이면 CPU 코어 수와
+    가용 메모리 / 워커당 메모리 추정치 중 작은 값을 사용합니다.
+    """
+    if setting not in (None, "auto"):
+        try:
+            return max(1, int(setting))
+        except (TypeError, ValueError):
+            logger.warning(f"Invalid ai_engine.workers value: {setting!r} (using auto)")
+
+    cores = cpu_count or os.cpu_count() or 1
+    if available_memory is None and psutil is not None:
+        available_memory = psutil.virtual_memory().available
+    if not available_memory:
+        return 1 # 메모리를 알 수 없으면 OOM 방지를 위해 1개
+
+    by_memory = int(available_memory * WORKER_MEMORY_BUDGET // max(footprint, 1))
+    return max(1, min(cores, by_memory))
+
+def threads_per_worker(num_workers, cpu_count=None):
+    """워커 전체 스레드 수가 CPU 코어 수를 넘지 않도록 워커당 스레드 수를 계산"""
+    cores = cpu_count or os.cpu_count() or 1
+    return max(1, cores // max(1, num_workers))
+
 # ------------------------------------------------------------------------------
 # [Worker Process Logic]
 # These functions run INSIDE the worker process.
@@ -98,42 +356,91 @@ def _get_worker_device():
         _worker_device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     return _worker_device
 
-def _load_model_in_worker(model_key, model_dir):
+def _build_model(spec, device):
+    """spec 의 architecture / 입력 크기로 모델을 만들고 가중치를 로드합니다. (eval 모드)"""
+    architecture = ARCHITECTURES.get(spec["architecture"])
+    if architecture is None:
+        raise ValueError(f"Unsupported architecture: {spec['architecture']}")
+    model = architecture(img_h=spec["height"], num_classes=NUM_CLASSES)
+    model.to(device)
+    state_dict = torch.load(spec["path"], map_location=device)
+    model.load_state_dict(state_dict)
+    return model.eval()
+
+def _load_model_in_worker(spec):
+    """
+    spec (core.model_registry) 의 모델을 로드하여 워커에 캐시합니다.
+    같은 키라도 파일(sha256)이 바뀌면 다시 로드합니다.
+    """
     global _worker_models
-    if model_key in _worker_models:
-        return _worker_models[model_key]
+    model_key = spec["key"]
+    cached = _worker_models.get(model_key)
+    if cached is not None and cached[0] == spec.get("sha256"):
+        return cached[1]
 
     if not HAS_DEPS:
         raise ImportError("Torch dependencies missing in worker process")
 
-    config = SUPPORTED_MODELS.get(model_key, SUPPORTED_MODELS["MODEL_MELON"])
-    filename = config["filename"]
-    
-    # Path Resolution Priority:
-    # 1. Environment Variable
-    # 2. Global Model Directory (PROJECT_ROOT/models)
-    
-    model_path = os.getenv(model_key)
-    if not model_path:
-        # [수정] model_dir은 이제 Global 'models' 폴더를 가리킵니다.
-        model_path = os.path.join(model_dir, filename)
-    
+    model_path = spec["path"]
     if not os.path.exists(model_path):
         raise FileNotFoundError(f"Model file not found at global path: {model_path}")
 
     device = _get_worker_device()
     try:
-        model = CRNN(img_h=config["height"], num_classes=NUM_CLASSES)
-        model.to(device)
-        state_dict = torch.load(model_path, map_location=device)
-        model.load_state_dict(state_dict)
-        model.eval()
-        _worker_models[model_key] = model
+        artifact = None
+        variant = spec.get("runtime") or "fp32"
+        if spec.get("torchscript", True):
+            artifact = artifact_path(model_path, variant, device, spec.get("sha256"))
+            if os.path.exists(artifact):
+                model = load_artifact(artifact, device)
+                if model is not None:
+                    _worker_models[model_key] = (spec.get("sha256"), model)
+                    return model
+
+        model = _build_model(spec, device)
+        # artifact 에는 정확도 검사를 통과한 모델만 저장되므로 검사는 처음 한 번만 실행됨
+        # (fp32 로 되돌린 경우 저장하지 않음 -> 샘플이 추가되면 다음 로드에서 다시 검사)
+        model, used = _apply_runtime_variant(spec, model, device)
+        if artifact and used == variant:
+            model = export_artifact(model, artifact, spec, device)
+        _worker_models[model_key] = (spec.get("sha256"), model)
         return model
     except Exception as e:
         logger.error(f"Worker Load Failed: {e}")
         raise
 
+def _warm_model(spec):
+    """모델을 워커 캐시에 로드하고 dummy forward 를 한 번 실행합니다."""
+    model = _load_model_in_worker(spec)
+    dummy = torch.zeros(1, 1, spec["height"], spec["width"], device=_get_worker_device())
+    with torch.inference_mode():
+        model(dummy)
+
+def _init_worker(num_threads, specs=()):
+    """
+    ProcessPoolExecutor initializer (워커 프로세스당 한 번 실행).
+    연산 스레드 수를 고정하고, 지정된 모델을 미리 로드 + warm-up 하여
+    이후 작업은 캐시된 모델로 바로 추론합니다.
+    """
+    if torch is None:
+        return
+    # 환경변수는 건드리지 않음 (OMP/MKL 스레드 수는 set_num_threads 가 함께 설정)
+    torch.set_num_threads(num_threads)
+    _get_worker_device()
+
+    for spec in specs:
+        try:
+            _warm_model(spec)
+        except Exception as e:
+            # initializer 가 예외를 던지면 풀 전체가 깨지므로 기록만 하고 계속 진행
+            logger.error(f"Worker preload failed for {spec['key']}: {e}")
+
+def _worker_rss():
+    """현재 워커 프로세스의 RSS (bytes, psutil 이 없으면 0)"""
+    if psutil is None:
+        return 0
+    return psutil.Process().memory_info().rss
+
 def _preprocess_in_worker(image_data, width, height):
     if isinstance(image_data, str):
         if "base64," in image_data:
@@ -145,66 +452,319 @@ def _preprocess_in_worker(image_data, width, height):
     image_np = np.array(image, dtype=np.float32) / 255.0
     return torch.from_numpy(image_np).unsqueeze(0).unsqueeze(0)
 
-def _inference_task(model_id, image_data, model_dir):
+# CTC 인덱스 -> 문자 lookup table (BLANK 는 빈 문자열)
+_CHAR_TABLE = np.array([IDX_TO_CHAR[i] for i in range(NUM_CLASSES)] + [""], dtype=object) if HAS_DEPS else None
+
+def _greedy_decode(logits):
+    """
+    Vectorized CTC greedy decoding for a whole batch.
+    (T, B, C) logits -> (배치별 문자열, 배치별 문자 confidence 목록, 배치별 sequence confidence, 배치별 평균 문자 confidence)
+    log_softmax 를 한 번만 계산하고, greedy 경로의 step 확률에서 모든 confidence 를 함께 구합니다.
+    - confidence: 출력된 문자 확률의 곱 (문자가 없으면 경로 전체 확률의 기하평균)
+    - mean_confidence: 출력된 문자 확률의 평균 (문자가 없으면 confidence 와 동일)
+    """
+    step_logp, preds = torch.log_softmax(logits, dim=2).max(dim=2)   # (T, B)
+    preds = preds.transpose(0, 1).cpu().numpy()                      # (B, T)
+    step_logp = step_logp.transpose(0, 1).cpu().numpy().astype(np.float64)
+
+    # CTC collapse: blank 제거 + 직전 step 과 같은 인덱스 제거
+    keep = preds != BLANK_LABEL
+    keep[:, 1:] &= preds[:, 1:] != preds[:, :-1]
+    chars = _CHAR_TABLE[preds]
+    step_probs = np.exp(step_logp)
+
+    # 곱 대신 log 합으로 계산 (긴 시퀀스에서도 underflow 없음)
+    counts = keep.sum(axis=1)
+    seq_logp = np.where(keep, step_logp, 0.0).sum(axis=1)
+    path_logp = step_logp.mean(axis=1)
+    confidences = np.exp(np.where(counts > 0, seq_logp, path_logp))
+    means = np.where(counts > 0, np.where(keep, step_probs, 0.0).sum(axis=1) / np.maximum(counts, 1), confidences)
+
+    rounded = np.round(step_probs, 4)
+    texts, char_confidences = [], []
+    for b in range(preds.shape[0]):
+        mask = keep[b]
+        texts.append("".join(chars[b, mask]))
+        char_confidences.append(rounded[b, mask].tolist())
+    return texts, char_confidences, confidences.tolist(), means.tolist()
+
+def _batch_inference_task(spec, images):
     """
-    Entry point for the ProcessPoolExecutor worker.
+    Entry point for the ProcessPoolExecutor worker (micro-batch).
+    Preprocesses every image, stacks them into one tensor and runs a single forward pass.
+    Returns one result dict per input image (same order).
     """
     start_time = time.time()
     try:
-        target_model_key = model_id if model_id in SUPPORTED_MODELS else "MODEL_MELON"
-        config = SUPPORTED_MODELS[target_model_key]
-        
         # Load (Cached)
-        model = _load_model_in_worker(target_model_key, model_dir)
+        model = _load_model_in_worker(spec)
         device = _get_worker_device()
-        
-        # Preprocess
-        img_tensor = _preprocess_in_worker(image_data, config["width"], config["height"])
-        img_tensor = img_tensor.to(device)
-        
-        # Infer
-        with torch.no_grad():
-            logits = model(img_tensor)
-            
-            # Decode
-            preds = logits.argmax(dim=2).cpu().numpy().transpose(1, 0)
-            decoded = []
-            for p in preds:
-                seq = []
-                prev = -1
-                for idx in p:
-                    if idx != prev and idx != BLANK_LABEL:
-                        if idx in IDX_TO_CHAR:
-                            seq.append(IDX_TO_CHAR[idx])
-                    prev = idx
-                decoded.append("".join(seq))
-            
-            text = decoded[0] if decoded else ""
-            
-            # Confidence
-            probs = torch.softmax(logits, dim=2)
-            confidence = float(probs.max().item())
-
-        processing_time = (time.time() - start_time) * 1000
-        
-        return {
-            "status": "success",
-            "predicted_text": text,
-            "model_type": target_model_key,
-            "confidence": round(confidence, 4),
-            "processing_time_ms": round(processing_time, 1)
-        }
-
     except Exception as e:
-        return {"status": "error", "message": str(e), "trace": traceback.format_exc()}
+        error = {"status": "error", "message": str(e), "trace": traceback.format_exc()}
+        return [dict(error) for _ in images]
+
+    # Preprocess (잘못된 이미지는 해당 요청만 실패 처리)
+    results = [None] * len(images)
+    tensors, slots = [], []
+    for i, image_data in enumerate(images):
+        try:
+            tensors.append(_preprocess_in_worker(image_data, spec["width"], spec["height"]))
+            slots.append(i)
+        except Exception as e:
+            results[i] = {"status": "error", "message": str(e), "trace": traceback.format_exc()}
+
+    if tensors:
+        try:
+            batch = torch.cat(tensors, dim=0).to(device)
+
+            # Infer + Decode (log_softmax 한 번으로 문자열과 confidence 를 함께 계산)
+            # inference_mode: no_grad 보다 autograd 기록(버전 카운터 등)을 더 줄임
+            with torch.inference_mode():
+                logits = model(batch)
+                texts, char_confidences, confidences, means = _greedy_decode(logits)
+
+            processing_time = (time.time() - start_time) * 1000
+            for j, i in enumerate(slots):
+                results[i] = {
+                    "status": "success",
+                    "predicted_text": texts[j],
+                    "model_type": spec["key"],
+                    "confidence": round(float(confidences[j]), 4),
+                    "mean_confidence": round(float(means[j]), 4),
+                    "char_confidences": char_confidences[j],
+                    "processing_time_ms": round(processing_time, 1),
+                    "batch_size": len(slots)
+                }
+        except Exception as e:
+            error = {"status": "error", "message": str(e), "trace": traceback.format_exc()}
+            for i in slots:
+                results[i] = dict(error)
+
+    return results
+
+def _warmup_task(specs):
+    """
+    Entry point for the ProcessPoolExecutor worker (startup warm-up).
+    Loads each model into the worker cache and runs one dummy forward pass
+    so the first real request does not pay load/first-run overhead.
+    Returns the per-model status and the warmed worker's RSS (used for worker sizing).
+    """
+    results = {}
+    for spec in specs:
+        try:
+            _warm_model(spec)
+            results[spec["key"]] = "ready"
+        except Exception as e:
+            results[spec["key"]] = f"error: {e}"
+    return {"models": results, "pid": os.getpid(), "rss": _worker_rss()}
+
+def _pooled_batch_task(spec, images, rss_limit):
+    """
+    AIEngine 이 제출하는 작업 단위.
+    (결과 리스트, 워커 RSS 가 rss_limit 를 넘었는지) 를 반환하여 부모가 풀 교체를 판단하게 합니다.
+    """
+    results = _batch_inference_task(spec, images)
+    return results, bool(rss_limit) and _worker_rss() > rss_limit
+
+def _inference_task(spec, image_data):
+    """
+    Entry point for the ProcessPoolExecutor worker (single image).
+    """
+    return _batch_inference_task(spec, [image_data])[0]
+
+def collect_preload_models(plugins, setting=True, registry=None):
+    """
+    미리 로드할 모델 키 목록을 만듭니다. (ai_engine.preload 설정)
+    - True: 플러그인 manifest 의 inference.models 에서 수집
+    - False: preload 하지 않음
+    - list: 지정한 모델 키만
+    registry 가 주어지면 등록되지 않은 키는 제외합니다.
+    """
+    if not setting:
+        return []
+    if isinstance(setting, (list, tuple)):
+        keys = list(setting)
+    else:
+        keys = [model.key for ctx in plugins.values() for model in ctx.manifest.inference.models]
+
+    preload = []
+    for key in dict.fromkeys(keys):
+        if registry is None or key in registry:
+            preload.append(key)
+        else:
+            logger.warning(f"Skipping preload of unknown model: {key}")
+    return preload
+
+# ------------------------------------------------------------------------------
+# [Micro-Batching]
+# Runs in the API process. Collects concurrent requests per model and
+# submits them to the worker pool as one batch.
+# ------------------------------------------------------------------------------
+class MicroBatcher:
+    """
+    모델 spec 별로 요청을 모아 최대 max_wait_ms 동안 (또는 max_batch_size 개가 찰 때까지) 기다린 뒤
+    submit_batch(spec, images) 로 한 번에 제출하고, 결과 리스트를 각 호출자의 Future 로 나눠줍니다.
+    spec 은 호출자가 이미 검증한 것을 그대로 사용하며, (key, sha256) 이 같은 요청끼리만 묶습니다.
+    """
+    def __init__(self, submit_batch, max_batch_size: int = 8, max_wait_ms: float = 5.0):
+        self._submit_batch = submit_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self._queues = {}     # (key, sha256) -> [(image_data, future), ...]
+        self._deadlines = {}  # (key, sha256) -> 첫 요청 도착 시각 + max_wait
+        self._specs = {}      # (key, sha256) -> spec
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def submit(self, spec, image_data) -> concurrent.futures.Future:
+        future = concurrent.futures.Future()
+        batch_key = (spec["key"], spec.get("sha256"))
+        with self._cond:
+            queue = self._queues.setdefault(batch_key, [])
+            if not queue:
+                self._deadlines[batch_key] = time.monotonic() + self.max_wait
+                self._specs[batch_key] = spec
+            queue.append((image_data, future))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="AIEngine-Batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return future
+
+    def _pop_ready(self):
+        """배치 크기가 찼거나 대기 시간이 지난 큐를 꺼냅니다. (lock 보유 상태에서 호출)"""
+        now = time.monotonic()
+        ready = []
+        for batch_key in list(self._queues):
+            queue = self._queues[batch_key]
+            if len(queue) >= self.max_batch_size or self._deadlines[batch_key] <= now:
+                ready.append((self._specs[batch_key], queue[:self.max_batch_size]))
+                rest = queue[self.max_batch_size:]
+                if rest:
+                    self._queues[batch_key] = rest
+                else:
+                    del self._queues[batch_key]
+                    del self._deadlines[batch_key]
+                    del self._specs[batch_key]
+        return ready
+
+    def _run(self):
+        while True:
+            with self._cond:
+                ready = self._pop_ready()
+                while not ready:
+                    timeout = None
+                    if self._deadlines:
+                        timeout = max(0.0, min(self._deadlines.values()) - time.monotonic())
+                    self._cond.wait(timeout)
+                    ready = self._pop_ready()
+
+            for spec, items in ready:
+                self._dispatch(spec, items)
+
+    def _dispatch(self, spec, items):
+        # 이미 취소된 요청은 배치에서 제외
+        items = [(image, future) for image, future in items if future.set_running_or_notify_cancel()]
+        if not items:
+            return
+        try:
+            batch_future = self._submit_batch(spec, [image for image, _ in items])
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        batch_future.add_done_callback(lambda f: self._fan_out(f, items))
+
+    @staticmethod
+    def _fan_out(batch_future, items):
+        try:
+            results = batch_future.result()
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            future.set_result(result)
+
+# ------------------------------------------------------------------------------
+# [Worker Pools]
+# ------------------------------------------------------------------------------
+class WorkerPool:
+    """
+    ProcessPoolExecutor 와 교체 세대(generation)를 묶은 워커 풀.
+    AIEngine 은 공용 풀 하나와, manifest 에서 runtime.workers 를 지정한 모델별 전용 풀을 가집니다.
+    """
+    def __init__(self, name, num_workers, num_threads, max_tasks_per_worker=None):
+        self.name = name
+        self.num_workers = num_workers
+        self.num_threads = num_threads
+        self.max_tasks_per_worker = max_tasks_per_worker
+        self.preload = []  # 워커 initializer 가 미리 로드할 spec 목록
+        self.generation = 0
+        self._lock = threading.Lock()
+        self.executor = self._create_executor()
+
+    def _create_executor(self):
+        """initializer 로 스레드 수 설정 + preload 모델 로드를 수행하는 워커 풀 생성"""
+        kwargs = {}
+        if self.max_tasks_per_worker:
+            if sys.version_info >= (3, 11):
+                kwargs["max_tasks_per_child"] = int(self.max_tasks_per_worker)
+            else:
+                logger.warning("ai_engine.recycle.max_tasks requires Python 3.11+ (ignored)")
+        return concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.num_workers,
+            mp_context=multiprocessing.get_context(WORKER_START_METHOD),
+            initializer=_init_worker,
+            initargs=(self.num_threads, tuple(self.preload)),
+            **kwargs
+        )
+
+    def submit(self, fn, *args):
+        """작업을 제출하고 (Future, 제출 시점의 generation) 을 반환합니다."""
+        with self._lock:
+            return self.executor.submit(fn, *args), self.generation
+
+    def resize(self, num_workers, num_threads):
+        """워커 수 / 스레드 수를 바꾸고 새 풀로 교체합니다. (같으면 아무것도 하지 않음)"""
+        if (num_workers, num_threads) == (self.num_workers, self.num_threads):
+            return False
+        self.num_workers = num_workers
+        self.num_threads = num_threads
+        self.recycle()
+        return True
+
+    def recycle(self, generation=None):
+        """
+        워커 풀을 새로 만들어 교체합니다. 이전 풀은 진행 중인 작업을 마친 뒤 종료됩니다.
+        generation 이 주어지면 그 풀이 아직 현재 풀일 때만 교체합니다. (중복 교체 방지)
+        """
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            old = self.executor
+            self.executor = self._create_executor()
+            self.generation += 1
+        old.shutdown(wait=False)
+        logger.info(f"Worker pool '{self.name}' recycled (gen {self.generation})")
 
 # ------------------------------------------------------------------------------
 # [Main Engine Class]
 # ------------------------------------------------------------------------------
 class AIEngine:
     def __init__(self):
-        # Force 1 worker to prevent OOM
-        self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=1)
+        self.settings = load_system_settings().get("ai_engine", {})
+
+        # 요청별 최대 대기 시간 (초)
+        self.request_timeout = float(self.settings.get("request_timeout", 30.0))
+
+        # [Throughput] 동시 요청을 model_id 별로 모아 한 번의 forward pass 로 처리
+        batching = self.settings.get("batching", {})
+        self.batcher = MicroBatcher(
+            self._submit_batch,
+            max_batch_size=batching.get("max_batch_size", 8),
+            max_wait_ms=batching.get("max_wait_ms", 5.0)
+        )
         
         # Resource Path Handling
         # [수정] 모델 경로를 플러그인 폴더가 아닌 Global 'models' 폴더로 변경
@@ -219,22 +779,329 @@ class AIEngine:
             except Exception as e:
                 logger.warning(f"Could not create models directory: {e}")
 
-    def process_request(self, model_id, data):
+        # [Model Registry] 플러그인 manifest 의 inference.models 로 모델 목록 구성
+        # (모듈 import 시점에는 플러그인이 아직 없으므로 refresh_models() 에서 채워짐)
+        self.registry = ModelRegistry(self.MODEL_DIR)
+        # 플러그인 구성이 바뀐 뒤 첫 요청들이 registry 동기화를 한 번만 하도록 (이벤트 루프별 asyncio.Lock)
+        self._sync_lock = None  # (loop, asyncio.Lock)
+
+        # [Worker Sizing] 워커 수: config (정수) 또는 auto (RAM / 코어 기준)
+        # auto 는 모델 목록이 바뀔 때마다 모델 크기 추정치로 다시 정하고 (refresh_models),
+        # warm-up 후에는 워커 실측 RSS 로 다시 맞춤 (warmup)
+        self.workers_setting = self.settings.get("workers", "auto")
+        self.auto_workers = self.workers_setting in (None, "auto")
+        self._footprint = estimate_model_footprint()  # 마지막으로 사용한 공용 풀 워커당 메모리
+        self.num_workers = resolve_worker_count(self.workers_setting, self._footprint)
+        self.threads_per_worker = threads_per_worker(self.num_workers)
+        self._rss_in_use = 0  # 마지막 warm-up 에서 측정한 공용 풀 워커 RSS 합계
+
+        # [Worker Recycling] 작업 수 / RSS 기준으로 워커를 교체하여 장시간 실행 시 메모리 증가를 제한
+        recycle = self.settings.get("recycle", {})
+        self.max_tasks_per_worker = recycle.get("max_tasks") or None
+        self.max_worker_rss = int(recycle.get("max_rss_mb") or 0) * 1024 * 1024
+
+        # [Worker Pools] 공용 풀 + (runtime.workers 를 지정한 모델의) 모델별 전용 풀
+        self._pools_lock = threading.Lock()
+        self.pools = {
+            DEFAULT_POOL: WorkerPool(DEFAULT_POOL, self.num_workers, self.threads_per_worker, self.max_tasks_per_worker)
+        }
+        logger.info(f"AI Engine: {self.num_workers} worker(s) x {self.threads_per_worker} thread(s)")
+        self.refresh_models()
+
+        # [Warm-up] idle -> warming -> ready / failed
+        self.warmup_status = {"state": "idle", "models": {}}
+
+    def _dedicated_workers(self):
+        """모델별 전용 풀의 워커 수 합계"""
+        return sum(pool.num_workers for name, pool in list(self.pools.items()) if name != DEFAULT_POOL)
+
+    def _resize_default_pool(self, footprint, in_use=0):
+        """
+        워커당 메모리(footprint)로 공용 풀의 워커 수를 다시 계산합니다. (workers: auto 일 때만)
+        in_use: 이미 떠 있는 워커들이 사용 중인 메모리 (가용 메모리에 더해서 계산)
+        전용 풀 워커가 쓰는 코어는 빼고 계산합니다. 교체된 풀의 집합을 반환합니다. (없으면 빈 집합)
+        """
+        if not self.auto_workers or not footprint:
+            return set()
+        self._footprint = footprint
+        available = psutil.virtual_memory().available + in_use if psutil is not None else None
+        cores = os.cpu_count() or 1
+        num_workers = resolve_worker_count(
+            "auto", footprint, cpu_count=max(1, cores - self._dedicated_workers()), available_memory=available
+        )
+        recycled = self._apply_pool_sizes(num_workers)
+        if recycled:
+            logger.info(
+                f"AI Engine resized: {num_workers} worker(s) x {self.threads_per_worker} thread(s) "
+                f"({footprint / (1024 * 1024):.0f}MB per worker)"
+            )
+        return recycled
+
+    def _apply_pool_sizes(self, num_workers):
+        """
+        공용 풀 워커 수를 num_workers 로 맞추고, 공용 + 전용 풀 워커 전체가 CPU 코어를 나눠 쓰도록
+        모든 풀의 워커당 스레드 수를 다시 정합니다. 교체(recycle)된 풀의 집합을 반환합니다.
+        """
+        num_threads = threads_per_worker(num_workers + self._dedicated_workers())
+        self.num_workers = num_workers
+        self.threads_per_worker = num_threads
+        recycled = set()
+        for name, pool in list(self.pools.items()):
+            size = num_workers if name == DEFAULT_POOL else pool.num_workers
+            if pool.resize(size, num_threads):
+                recycled.add(pool)
+        return recycled
+
+    @property
+    def is_ready(self):
+        """preload 대상이 모두 로드되었는지 (preload 를 하지 않으면 항상 True)"""
+        return self.warmup_status["state"] in ("idle", "ready")
+
+    def refresh_models(self):
+        """
+        플러그인 구성이 바뀌었으면 (plugin_loader.generation) 모델 목록을 다시 만들고,
+        workers: auto 이면 공용 풀 모델의 크기 추정치로 워커 수를 다시 계산합니다.
+        """
+        if not self.registry.sync(plugin_loader.plugins, plugin_loader.generation):
+            return
+        if self.auto_workers:
+            shared = [spec for spec in self._available_specs(self.registry.keys()) if not spec.get("workers")]
+            self._resize_default_pool(estimate_model_footprint(shared), in_use=self._rss_in_use)
+
+    def resolve_model(self, model_id):
+        """
+        model_id 의 spec 을 반환합니다. 등록되지 않았거나 파일이 없거나 sha256 이 다르면 예외.
+        (다른 모델로 대체하지 않고 바로 실패)
+        """
+        self.refresh_models()
+        return self.registry.get(model_id)
+
+    def _available_specs(self, keys):
+        specs = []
+        for key in keys:
+            try:
+                specs.append(self.registry.get(key))
+            except (KeyError, FileNotFoundError, ValueError):
+                pass
+        return specs
+
+    def pool_for(self, spec):
+        """spec 에 전용 워커 수(workers)가 있으면 모델별 풀을 (없으면 생성), 아니면 공용 풀을 반환"""
+        workers = spec.get("workers")
+        if not workers:
+            return self.pools[DEFAULT_POOL]
+
+        name = f"model:{spec['key']}"
+        with self._pools_lock:
+            pool = self.pools.get(name)
+            if pool is None:
+                num_threads = threads_per_worker(self.num_workers + self._dedicated_workers() + int(workers))
+                pool = WorkerPool(name, int(workers), num_threads, self.max_tasks_per_worker)
+                self.pools[name] = pool
+                logger.info(f"Dedicated worker pool for {spec['key']}: {workers} worker(s)")
+                # 전용 풀 워커만큼 공용 풀의 코어 몫을 줄임 (auto 면 워커 수, 아니면 스레드 수)
+                if self.auto_workers:
+                    self._resize_default_pool(self._footprint, in_use=self._rss_in_use)
+                else:
+                    self._apply_pool_sizes(self.num_workers)
+            return pool
+
+    async def warmup(self, model_keys):
+        """
+        모델이 사용하는 풀의 워커를 띄우고 각 워커에서 모델을 로드 + dummy forward 합니다.
+        모델 로드는 워커 initializer 가 담당하며 (재생성된 워커 포함),
+        워커 수만큼 제출하는 warm-up 작업은 워커 생성을 앞당기고 로드 결과를 확인합니다.
+        workers: auto 이면 warm-up 된 워커의 실측 RSS 로 공용 풀 크기를 다시 정합니다.
+        """
+        model_keys = list(model_keys)
+        if not model_keys:
+            return self.warmup_status
+
+        self.warmup_status = {"state": "warming", "models": {key: "loading" for key in model_keys}}
+        start_time = time.time()
+
+        models = {key: "ready" for key in model_keys}
+        by_pool = {}
+        loop = asyncio.get_running_loop()
+        for key in model_keys:
+            try:
+                # registry 동기화와 sha256 확인(모델 파일 해시)은 이벤트 루프 밖에서 실행
+                spec = await loop.run_in_executor(None, self.resolve_model, key)
+            except Exception as e:
+                models[key] = f"error: {e.args[0] if e.args else e}"
+                continue
+            by_pool.setdefault(self.pool_for(spec), []).append(spec)
+
+        for pool, specs in by_pool.items():
+            # 이후 생성되는 모든 워커가 initializer 에서 이 모델들을 미리 로드하도록 풀을 다시 만듦
+            if pool.preload != specs:
+                pool.preload = specs
+                pool.recycle()
+        rss = await self._warm_pools(by_pool, models)
+
+        # [Worker Sizing] 모델을 올린 워커의 실측 RSS 로 공용 풀 워커 수를 다시 계산
+        default_pool = self.pools[DEFAULT_POOL]
+        measured = list(rss.get(default_pool, {}).values())
+        if measured:
+            self._rss_in_use = sum(measured)
+            # 스레드 수가 바뀐 전용 풀도 교체되므로, 교체된 풀은 모두 다시 warm-up
+            recycled = self._resize_default_pool(max(measured), in_use=self._rss_in_use)
+            rewarm = {pool: specs for pool, specs in by_pool.items() if pool in recycled}
+            if rewarm:
+                rss = await self._warm_pools(rewarm, models)
+                if default_pool in rewarm:
+                    self._rss_in_use = sum(rss.get(default_pool, {}).values())
+
+        state = "ready" if all(status == "ready" for status in models.values()) else "failed"
+        self.warmup_status = {"state": state, "models": models}
+        logger.info(f"Warm-up {state} in {(time.time() - start_time) * 1000:.0f}ms: {models}")
+        return self.warmup_status
+
+    async def _warm_pools(self, by_pool, models):
+        """
+        풀마다 워커 수만큼 warm-up 작업을 제출하고 실패한 모델 상태를 models 에 기록합니다.
+        풀별로 warm-up 된 워커들의 {pid: RSS} 를 반환합니다. (한 워커가 여러 작업을 받을 수 있음)
+        """
+        futures, owners = [], []
+        for pool, specs in by_pool.items():
+            for _ in range(pool.num_workers):
+                futures.append(asyncio.wrap_future(pool.submit(_warmup_task, specs)[0]))
+                owners.append((pool, [spec["key"] for spec in specs]))
+        results = await asyncio.gather(*futures, return_exceptions=True)
+
+        rss = {}
+        for (pool, keys), result in zip(owners, results):
+            if isinstance(result, BaseException):
+                result = {"models": {key: f"error: {result}" for key in keys}, "rss": 0}
+            for key, status in result["models"].items():
+                if status != "ready":
+                    models[key] = status
+            if result["rss"]:
+                rss.setdefault(pool, {})[result["pid"]] = result["rss"]
+        return rss
+
+    def _submit_batch(self, spec, images):
+        """infer() 에서 검증한 spec 으로 배치를 제출합니다. (배치 스레드에서 다시 resolve 하지 않음)"""
+        pool = self.pool_for(spec)
+        inner, generation = pool.submit(_pooled_batch_task, spec, images, self.max_worker_rss)
+
+        outer = concurrent.futures.Future()
+
+        def _done(f):
+            try:
+                results, over_limit = f.result()
+            except BrokenProcessPool as e:
+                # 워커가 비정상 종료되면 풀 전체를 쓸 수 없으므로 새 풀로 교체
+                outer.set_exception(e)
+                pool.recycle(generation)
+                return
+            except Exception as e:
+                outer.set_exception(e)
+                return
+            outer.set_result(results)
+            if over_limit:
+                logger.warning("Worker RSS exceeded ai_engine.recycle.max_rss_mb, recycling pool")
+                pool.recycle(generation)
+
+        inner.add_done_callback(_done)
+        return outer
+
+    def _cached_spec(self, model_id):
         """
-        Submits inference task to the process pool.
+        플러그인 구성이 그대로이고 모델 파일의 sha256 이 캐시되어 있으면 파일을 해싱하지 않고 spec 을 반환합니다.
+        (동기화/해싱이 필요하면 None, 등록되지 않은 모델이면 KeyError)
+        """
+        if self.registry.generation != plugin_loader.generation:
+            return None
+        return self.registry.get(model_id, cached_only=True)
+
+    def _get_sync_lock(self):
+        # asyncio.Lock 은 처음 사용한 이벤트 루프에 묶이므로 루프마다 새로 만듦 (process_request 는 매번 asyncio.run)
+        loop = asyncio.get_running_loop()
+        if self._sync_lock is None or self._sync_lock[0] is not loop:
+            self._sync_lock = (loop, asyncio.Lock())
+        return self._sync_lock[1]
+
+    async def _check_model(self, model_id):
+        """
+        (spec, None) 을 반환합니다. 알 수 없는/사용할 수 없는 모델이면 배치에 넣기 전에 (None, 오류 응답).
+        보통은 캐시된 registry 로 바로 확인하고, 플러그인 구성이 바뀌었거나 파일을 다시 해싱해야 할 때만
+        lock 을 잡고 이벤트 루프 밖에서 resolve_model() 을 실행합니다.
+        """
+        try:
+            spec = self._cached_spec(model_id)
+            if spec is None:
+                async with self._get_sync_lock():
+                    # lock 을 기다리는 동안 다른 요청이 동기화를 끝냈을 수 있음
+                    spec = self._cached_spec(model_id)
+                    if spec is None:
+                        spec = await asyncio.get_running_loop().run_in_executor(None, self.resolve_model, model_id)
+            return spec, None
+        except Exception as e:
+            message = e.args[0] if e.args else str(e)
+            logger.warning(f"Rejected inference request: {message}")
+            return None, {"status": "error", "message": message}
+
+    def process_request(self, model_id, data, timeout=None):
+        """
+        Synchronous wrapper around infer() for callers outside an event loop.
+        """
+        return asyncio.run(self.infer(model_id, data, timeout))
+
+    def _resolve_timeout(self, timeout):
+        """요청별 timeout 은 설정값(request_timeout)을 넘지 않도록 제한 (0 이하, NaN 등 잘못된 값은 설정값 사용)"""
+        if timeout is None:
+            return self.request_timeout
+        try:
+            timeout = float(timeout)
+        except (TypeError, ValueError):
+            return self.request_timeout
+        if not 0.0 < timeout < float("inf"):
+            logger.warning(f"Ignoring invalid request timeout: {timeout}")
+            return self.request_timeout
+        return min(timeout, self.request_timeout)
+
+    @staticmethod
+    def _timeout_error(timeout):
+        return {"status": "error", "message": f"Inference Timeout ({timeout}s)"}
+
+    async def infer(self, model_id, data, timeout=None):
+        """
+        Submits inference task to the micro-batcher (-> process pool).
+        Awaits the worker result without occupying a threadpool thread.
+        If the caller is cancelled or times out while the request is still queued, it is dropped from the batch.
         """
         image_data = data.get("image")
         if not image_data:
             return {"status": "error", "message": "No image data"}
+        spec, error = await self._check_model(model_id)
+        if error:
+            return error
+
+        timeout = self._resolve_timeout(timeout)
+        future = self.batcher.submit(spec, image_data)
 
-        # Submit task
-        future = self.executor.submit(_inference_task, model_id, image_data, self.MODEL_DIR)
-        
         try:
-            return future.result()
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            logger.warning(f"Inference timed out after {timeout}s ({model_id})")
+            return self._timeout_error(timeout)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
         except Exception as e:
             logger.error(f"Process Execution Failed: {e}")
             return {"status": "error", "message": str(e)}
 
-# Singleton
-ai_engine = AIEngine()
\ No newline at end of file
+# Singleton (처음 사용할 때 생성: spawn 워커가 __main__ 을 다시 import 해도 엔진/워커 풀을 만들지 않음)
+_ai_engine = None
+_ai_engine_lock = threading.Lock()
+
+def get_ai_engine():
+    global _ai_engine
+    if _ai_engine is None:
+        with _ai_engine_lock:
+            if _ai_engine is None:
+                _ai_engine = AIEngine()
+    return _ai_engine
@@ -13,8 +13,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from core.plugin_loader import plugin_loader
 from core.schemas import MatchResponse, MatchRequest, ScriptInjection
-from core.matcher import UrlMatcher 
 from core.inference_router import router as inference_router
+from core.ai_engine import get_ai_engine, collect_preload_models
 
 # RemoteManager 임포트
 try:
@@ -51,16 +51,30 @@ class PluginConnectionManager:
 
 plugin_ws_mgr = PluginConnectionManager()
 remote_mgr = None
+warmup_task = None
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global remote_mgr
+    global remote_mgr, warmup_task
     logger.info("Starting AI Engine API...")
     try:
         plugin_loader.load_plugins()
     except Exception as e:
         logger.error(f"Plugin Load Error: {e}")
 
+    # [Warm-up] 플러그인이 사용하는 모델을 워커에 미리 로드 (준비 상태는 /health 로 확인)
+    try:
+        # 모델 파일 sha256 계산이 이벤트 루프(/health 등)를 막지 않도록 스레드에서 실행
+        ai_engine = get_ai_engine()
+        await asyncio.to_thread(ai_engine.refresh_models)
+        preload = collect_preload_models(
+            plugin_loader.plugins, ai_engine.settings.get("preload", True), ai_engine.registry
+        )
+        if preload:
+            warmup_task = asyncio.create_task(ai_engine.warmup(preload))
+    except Exception as e:
+        logger.error(f"Model Warm-up Error: {e}")
+
     if RemoteManager:
         relay_host = os.getenv("RELAY_HOST", "127.0.0.1")
         relay_port = int(os.getenv("RELAY_PORT", "9000"))
@@ -71,6 +85,8 @@ async def lifespan(app: FastAPI):
         asyncio.create_task(remote_mgr.start())
     yield
     logger.info("Shutting down AI Engine API...")
+    if warmup_task and not warmup_task.done():
+        warmup_task.cancel()
     if remote_mgr:
         remote_mgr.running = False
 
@@ -93,7 +109,13 @@ app.include_router(inference_router)
 # [중요] 이 엔드포인트가 있어야 Main 프로세스가 서버 시작을 감지할 수 있습니다.
 @app.get("/health")
 async def health_check():
-    return {"status": "ok", "service": "ai_engine"}
+    ai_engine = get_ai_engine()
+    return {
+        "status": "ok",
+        "service": "ai_engine",
+        "ready": ai_engine.is_ready,
+        "models": ai_engine.warmup_status["models"]
+    }
 
 @app.websocket("/ws/plugin/connect/{plugin_id}")
 async def websocket_plugin_endpoint(websocket: WebSocket, plugin_id: str):
@@ -107,28 +129,18 @@ async def websocket_plugin_endpoint(websocket: WebSocket, plugin_id: str):
 @app.post("/v1/match", response_model=MatchResponse)
 async def match_endpoint(request: MatchRequest):
     try:
-        url = request.url
-        scripts = []
-        plugins = plugin_loader.plugins
-        
-        for pid, ctx in plugins.items():
-            for script in ctx.manifest.content_scripts:
-                is_match = False
-                for pattern in script.matches:
-                    if UrlMatcher.match(pattern, url):
-                        is_match = True
-                        break
-                if is_match:
-                    for js in script.js:
-                        scripts.append(ScriptInjection(
-                            url=f"plugins/{pid}/{js}",
-                            run_at=script.run_at
-                        ))
+        result = plugin_loader.match_url(request.url)
+        scripts = [ScriptInjection(url=url, run_at=run_at) for url, run_at in result.injections]
         return MatchResponse(scripts=scripts)
     except Exception as e:
         logger.error(f"Match Error: {e}")
         return MatchResponse(scripts=[])
 
+@app.get("/v1/match/stats")
+async def match_stats():
+    """URL 매칭 캐시 적중률 확인용"""
+    return plugin_loader.match_cache.stats()
+
 def run_api_server(port: int):
     uvicorn.run(app, host="127.0.0.1", port=port)
 
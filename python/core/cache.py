@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+
+class GenerationLRU:
+    """
+    [Performance] 플러그인 generation 단위로 무효화되는 thread-safe LRU 캐시.
+    MatchCache / HostDecisionCache (core.matcher), PayloadCache (core.injector) 가 공통으로 사용합니다.
+    - 조회/저장 시 generation 이 바뀌었으면 저장된 항목을 모두 버림
+    - 이전 generation 으로 계산된 값의 저장은 무시 (계산 도중 플러그인이 다시 로드됨)
+    - maxsize 를 넘으면 가장 오래 사용하지 않은 항목부터 제거
+    - ttl (초) 을 지정하면 저장 후 ttl 이 지난 항목은 없는 것으로 취급
+    """
+    def __init__(self, maxsize: int, ttl: float = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (value, 만료 시각 또는 None)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def _set_generation(self, generation) -> None:
+        # self._lock 을 잡은 상태에서 호출
+        if generation != self.generation:
+            self._data.clear()
+            self.generation = generation
+
+    def get(self, key, generation):
+        """캐시된 값을 반환합니다. (없거나 만료되었으면 None)"""
+        with self._lock:
+            self._set_generation(generation)
+            entry = self._data.get(key)
+            if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, generation, value) -> None:
+        with self._lock:
+            if generation != self.generation and generation < self.generation:
+                return  # 계산 도중 플러그인이 다시 로드됨
+            self._set_generation(generation)
+            expires = time.monotonic() + self.ttl if self.ttl is not None else None
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return self._stats()
+
+    def _stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "generation": self.generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
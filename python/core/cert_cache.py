@@ -0,0 +1,148 @@
+import os
+import asyncio
+import logging
+import ipaddress
+from pathlib import Path
+from cryptography import x509
+from mitmproxy import ctx, certs
+from core.matcher import UrlMatcher
+
+logger = logging.getLogger("AiPlugs.CertCache")
+
+def collect_plugin_hosts(plugins: dict) -> list:
+    """
+    플러그인 manifest 의 content_scripts.matches 와 host_permissions 에서
+    인증서를 미리 만들 수 있는 구체적인 호스트 목록을 뽑습니다.
+    - '*.example.com' 은 example.com 만 포함 (하위 도메인은 알 수 없음)
+    - '<all_urls>', 호스트 '*' 등은 제외
+    """
+    hosts = {}
+    for plugin_ctx in plugins.values():
+        manifest = plugin_ctx.manifest
+        patterns = [p for block in manifest.content_scripts for p in block.matches]
+        patterns += list(manifest.host_permissions)
+        for pattern in patterns:
+            try:
+                compiled = UrlMatcher.compile(pattern)
+            except ValueError:
+                continue
+            if compiled.host_kind == "any" or compiled.schemes == frozenset(("http",)):
+                continue
+            host = compiled.host.lower().rstrip('.')
+            if host and '*' not in host:
+                hosts[host] = None
+    return list(hosts)
+
+def _san_for(host: str):
+    try:
+        return x509.IPAddress(ipaddress.ip_address(host))
+    except ValueError:
+        return x509.DNSName(host)
+
+class CertWarmer:
+    """
+    [Performance] 플러그인 호스트용 leaf 인증서를 미리 생성하여 mitmproxy CertStore 에 등록하고,
+    디스크에 저장해 다음 실행 시 다시 생성하지 않도록 합니다.
+    - 저장 위치: <cache_dir>/<CA 지문>/<host>.pem (CA 가 바뀌면 이전 인증서는 무시됨)
+    - 개인키는 저장하지 않음 (mitmproxy 의 leaf 인증서는 CertStore 기본 키를 공유)
+    CertStore 는 잠금 없이 mitmproxy 이벤트 루프에서 사용되므로, 인증서 생성과 파일 읽기/쓰기만
+    스레드에서 실행하고 CertStore 등록은 항상 이벤트 루프에서 합니다.
+    """
+    def __init__(self, certstore, cache_dir: str):
+        self.certstore = certstore
+        fingerprint = certstore.default_ca.fingerprint().hex()[:16]
+        self.cache_dir = Path(cache_dir) / fingerprint
+        self.loaded = 0
+        self.generated = 0
+
+    def _path(self, host: str) -> Path:
+        return self.cache_dir / f"{host}.pem"
+
+    def _entry(self, cert):
+        return certs.CertStoreEntry(
+            cert=cert,
+            privatekey=self.certstore.default_privatekey,
+            chain_file=self.certstore.default_chain_file,
+            chain_certs=self.certstore.default_chain_certs,
+        )
+
+    def load(self, host: str):
+        """[Thread] 디스크에 저장된 유효한 인증서 entry 를 반환합니다. (없거나 만료/손상 시 None)"""
+        path = self._path(host)
+        if not path.is_file():
+            return None
+        try:
+            cert = certs.Cert.from_pem(path.read_bytes())
+            if cert.public_key() != self.certstore.default_privatekey.public_key():
+                raise ValueError("certificate does not match the CertStore key")
+        except Exception as e:
+            logger.debug(f"Discarding cached cert for {host}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if cert.has_expired():
+            path.unlink(missing_ok=True)
+            return None
+        return self._entry(cert)
+
+    def generate(self, host: str):
+        """[Thread] 인증서를 생성하고 디스크에 저장한 뒤 entry 를 반환합니다. (CertStore 에는 등록하지 않음)"""
+        cert = certs.dummy_cert(
+            self.certstore.default_privatekey, self.certstore.default_ca._cert, host, [_san_for(host)]
+        )
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp = self._path(host).with_suffix(".tmp")
+        tmp.write_bytes(cert.to_pem())
+        os.replace(tmp, self._path(host))
+        return self._entry(cert)
+
+    def _build(self, host: str):
+        """[Thread] (entry, 디스크에서 읽었는지) 를 반환합니다."""
+        entry = self.load(host)
+        if entry is not None:
+            return entry, True
+        return self.generate(host), False
+
+    def register(self, host: str, entry) -> None:
+        """[Event loop] entry 를 CertStore 에 등록합니다. (그 사이 mitmproxy 가 만든 인증서가 있으면 유지)"""
+        if host not in self.certstore.certs:
+            self.certstore.add_cert(entry, host)
+
+    async def warm(self, hosts: list) -> None:
+        for host in hosts:
+            if host in self.certstore.certs:
+                continue
+            try:
+                entry, loaded = await asyncio.to_thread(self._build, host)
+            except Exception as e:
+                logger.warning(f"Certificate warm-up failed for {host}: {e}")
+                continue
+            self.register(host, entry)
+            if loaded:
+                self.loaded += 1
+            else:
+                self.generated += 1
+        logger.info(f"Certificate warm-up done: {self.loaded} loaded from disk, {self.generated} generated")
+
+
+class CertWarmupAddon:
+    """
+    mitmproxy 가 CertStore 를 준비한 직후(running) 이벤트 루프의 백그라운드 작업으로
+    플러그인 호스트 인증서를 미리 만들어 둡니다. 첫 방문 시 인증서 생성 지연을 없앱니다.
+    """
+    def __init__(self, hosts: list, cache_dir: str):
+        self.hosts = hosts
+        self.cache_dir = cache_dir
+        self.task = None
+
+    def running(self):
+        if not self.hosts:
+            return
+        tlsconfig = ctx.master.addons.get("tlsconfig")
+        certstore = getattr(tlsconfig, "certstore", None)
+        if certstore is None:
+            return
+
+        warmer = CertWarmer(certstore, self.cache_dir)
+        self.task = asyncio.get_running_loop().create_task(warmer.warm(self.hosts))
@@ -0,0 +1,19 @@
+import os
+import json
+import logging
+
+logger = logging.getLogger("AiPlugs.Config")
+
+CONFIG_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../config/config.json'))
+
+def load_system_settings() -> dict:
+    """
+    config/config.json 의 system_settings 섹션을 반환합니다.
+    파일이 없거나 형식이 잘못된 경우 빈 dict 를 반환합니다.
+    """
+    try:
+        with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f).get('system_settings', {}) or {}
+    except Exception as e:
+        logger.warning(f"Failed to load config.json: {e}")
+        return {}
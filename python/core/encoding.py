@@ -0,0 +1,211 @@
+import zlib
+import logging
+
+# 선택적 의존성 (mitmproxy 설치 시 함께 설치되는 경우가 많음)
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger("AiPlugs.Encoding")
+
+class _IdentityDecoder:
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+class _ZlibDecoder:
+    """gzip / deflate 증분 해제기 (gzip 다중 멤버, raw deflate 대응)"""
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        self._wbits = 16 + zlib.MAX_WBITS if encoding == "gzip" else zlib.MAX_WBITS
+        self._obj = zlib.decompressobj(self._wbits)
+        self._started = False
+
+    def decompress(self, data: bytes) -> bytes:
+        if not data:
+            return b""
+        if not self._started and self.encoding == "deflate":
+            self._started = True
+            try:
+                return self._decompress(data)
+            except zlib.error:
+                # 일부 서버는 zlib 헤더 없이 raw deflate 를 보냄
+                self._wbits = -zlib.MAX_WBITS
+                self._obj = zlib.decompressobj(self._wbits)
+        self._started = True
+        return self._decompress(data)
+
+    def _decompress(self, data: bytes) -> bytes:
+        out = self._obj.decompress(data)
+        # gzip 멤버가 여러 개 이어진 경우
+        while self._obj.eof and self._obj.unused_data:
+            rest = self._obj.unused_data
+            self._obj = zlib.decompressobj(self._wbits)
+            out += self._obj.decompress(rest)
+        return out
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+class _BrotliDecoder:
+    def __init__(self):
+        self._obj = brotli.Decompressor()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._obj.process(data) if data else b""
+
+    def flush(self) -> bytes:
+        return b""
+
+class _ZstdDecoder:
+    def __init__(self):
+        self._obj = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        return self._obj.decompress(data) if data else b""
+
+    def flush(self) -> bytes:
+        return b""
+
+def make_decoder(content_encoding: str):
+    """
+    Content-Encoding 값에 맞는 증분 해제기를 반환합니다.
+    지원하지 않는 인코딩(또는 필요한 모듈이 없는 경우)이면 None 을 반환합니다.
+    """
+    encoding = (content_encoding or "identity").strip().lower()
+    if encoding in ("", "identity", "none"):
+        return _IdentityDecoder()
+    if encoding in ("gzip", "x-gzip"):
+        return _ZlibDecoder("gzip")
+    if encoding == "deflate":
+        return _ZlibDecoder("deflate")
+    if encoding == "br" and brotli is not None:
+        return _BrotliDecoder()
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdDecoder()
+    logger.debug(f"Unsupported Content-Encoding for streaming: {content_encoding}")
+    return None
+
+
+# --- Output (re-)encoding ---
+
+# 클라이언트 q 값이 같을 때의 선호 순서 (압축률 우선)
+DEFAULT_ENCODINGS = ("br", "zstd", "gzip")
+DEFAULT_LEVELS = {"gzip": 6, "br": 4, "zstd": 3}
+
+def available_encodings() -> tuple:
+    """현재 환경에서 인코딩할 수 있는 Content-Encoding 목록"""
+    found = ["gzip"]
+    if brotli is not None:
+        found.append("br")
+    if zstandard is not None:
+        found.append("zstd")
+    return tuple(found)
+
+def parse_accept_encoding(header: str) -> dict:
+    """Accept-Encoding 헤더를 {coding: q} 로 변환합니다. (잘못된 q 값은 0 으로 취급)"""
+    result = {}
+    for item in (header or "").split(","):
+        coding, *params = item.strip().split(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.strip().partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        result[coding] = q
+    return result
+
+def choose_encoding(accept_encoding: str, preferred: tuple = DEFAULT_ENCODINGS):
+    """
+    클라이언트가 받을 수 있는 인코딩 중 가장 적합한 것을 고릅니다.
+    q 값이 높은 것을 우선하고, 같으면 preferred 순서를 따릅니다. (없으면 None)
+    """
+    accepted = parse_accept_encoding(accept_encoding)
+    available = available_encodings()
+    best, best_q = None, 0.0
+    for coding in preferred:
+        if coding not in available:
+            continue
+        q = accepted.get(coding, accepted.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+class _GzipEncoder:
+    def __init__(self, level: int):
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) if data else b""
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+class _BrotliEncoder:
+    def __init__(self, level: int):
+        self._obj = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data) if data else b""
+
+    def flush(self) -> bytes:
+        return self._obj.flush()
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+class _ZstdEncoder:
+    def __init__(self, level: int):
+        self._obj = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data) if data else b""
+
+    def flush(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+def make_encoder(content_encoding: str, level: int = None):
+    """
+    Content-Encoding 값에 맞는 증분 압축기를 반환합니다.
+    - compress(data): 압축 (내부 버퍼에 남을 수 있음)
+    - flush(): 지금까지의 입력을 내보냄 (스트리밍 청크 경계)
+    - finish(): 스트림 종료
+    지원하지 않는 인코딩이면 None 을 반환합니다.
+    """
+    encoding = (content_encoding or "").strip().lower()
+    if level is None:
+        level = DEFAULT_LEVELS.get(encoding)
+    if encoding == "gzip":
+        return _GzipEncoder(level)
+    if encoding == "br" and brotli is not None:
+        return _BrotliEncoder(level)
+    if encoding == "zstd" and zstandard is not None:
+        return _ZstdEncoder(level)
+    return None
+
+def encode_body(data: bytes, content_encoding: str, level: int = None) -> bytes:
+    """본문 전체를 한 번에 압축합니다."""
+    encoder = make_encoder(content_encoding, level)
+    if encoder is None:
+        raise ValueError(f"Unsupported Content-Encoding: {content_encoding}")
+    return encoder.compress(data) + encoder.finish()
@@ -7,7 +7,7 @@ from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 
 # [추가] AI Engine 직접 호출을 위한 임포트
-from core.ai_engine import ai_engine 
+from core.ai_engine import get_ai_engine
 from core.plugin_loader import plugin_loader
 from core.runtime_manager import runtime_manager
 
@@ -100,12 +100,13 @@ async def inference_endpoint(plugin_id: str, function_name: str, request: Reques
             exec_type = getattr(ctx.manifest.inference, "execution_type", "process")
             
             if exec_type == "none":
-                # AI Engine 직접 호출 (Blocking 함수일 가능성이 높으므로 threadpool 사용 권장)
+                # AI Engine 직접 호출 (스레드풀을 점유하지 않고 워커 결과를 비동기로 대기)
                 logger.info(f"[*] Direct AI Engine Call for {plugin_id}")
-                model_id = data.get("model_id", "MODEL_MELON")
+                # model_id 가 없으면 플러그인이 선언한 첫 번째 모델 사용
+                declared = ctx.manifest.inference.models
+                model_id = data.get("model_id") or (declared[0].key if declared else None)
                 
-                # ai_engine.process_request가 동기 함수라면 스레드풀에서 실행
-                return await run_in_threadpool(ai_engine.process_request, model_id, data)
+                return await get_ai_engine().infer(model_id, data, timeout=data.get("timeout"))
             
             else:
                 # IPC Process 통신 (기존 로직)
@@ -1,13 +1,24 @@
 import re
+from functools import lru_cache
+from core.cache import GenerationLRU
 
 # 정규표현식 미리 컴파일 (성능 최적화)
-RE_HEAD = re.compile(rb'(?i)(<head[^>]*>)')
-RE_HTML = re.compile(rb'(?i)(<html[^>]*>)')
+# 태그 이름 뒤에는 공백 또는 '>' 만 허용 (<header>, <html5> 등과 구분)
+RE_HEAD = re.compile(rb'(?i)(<head(?:\s[^>]*)?>)')
+RE_HTML = re.compile(rb'(?i)(<html(?:\s[^>]*)?>)')
 RE_BODY_END = re.compile(rb'(?i)(</body>)')
+BODY_END_TAG = b"</body>"
+# <meta charset=...> 또는 <meta http-equiv="Content-Type" content="...; charset=...">
+RE_META_CHARSET = re.compile(rb'(?i)<meta\s[^>]*charset[^>]*>')
 
+# 브라우저가 <meta> charset 선언을 찾는 prescan 구간 크기
+CHARSET_PRESCAN_SIZE = 1024
+
+@lru_cache(maxsize=16)
 def get_loader_script(api_port):
     """
     SPA 지원을 위한 History Hook 및 WebSocket 연결 정보 주입
+    (포트별로 한 번만 생성/인코딩하여 재사용)
     """
     return f"""
     <script>
@@ -44,38 +55,299 @@ def _make_script_tags(urls: list) -> bytes:
         tags += f'<script src="{url}"></script>'.encode('utf-8')
     return tags
 
+def build_payloads(api_port: int, head_scripts: list = (), body_scripts: list = ()) -> tuple:
+    """
+    (head_payload, body_payload) 바이트열을 만듭니다.
+    - head: Core Loader + document_start 스크립트
+    - body: document_end / document_idle 스크립트
+    """
+    payload_head = get_loader_script(api_port) + _make_script_tags(head_scripts)
+    payload_body = _make_script_tags(body_scripts)
+    return payload_head, payload_body
+
 def inject_script(html_content: bytes, api_port: int, head_scripts: list = [], body_scripts: list = []) -> bytes:
     """
     위치별(Head/Body) 스크립트 주입 함수
     """
-    loader = get_loader_script(api_port)
-    
     # 1. Head Injection (Core Loader + document_start)
-    payload_head = loader + _make_script_tags(head_scripts)
-    
     # 2. Body Injection (document_end / document_idle)
-    payload_body = _make_script_tags(body_scripts)
+    payload_head, payload_body = build_payloads(api_port, head_scripts, body_scripts)
+    return inject_payloads(html_content, payload_head, payload_body)
 
-    modified_html = html_content
+def inject_payloads(html_content: bytes, payload_head: bytes, payload_body: bytes) -> bytes:
+    """
+    미리 조립된 payload 바이트열을 HTML 에 끼워 넣습니다.
+    """
+    inserts = []
 
-    # --- Apply Head Injection ---
-    # <head> 태그 직후에 삽입
+    # --- Head Injection 위치 ---
+    # <head> 태그 직후에 삽입 (charset 선언이 있으면 그 뒤)
     if payload_head:
-        if RE_HEAD.search(modified_html):
-            modified_html = RE_HEAD.sub(rb'\1' + payload_head, modified_html, count=1)
-        elif RE_HTML.search(modified_html): # fallback: html 태그 뒤
-             modified_html = RE_HTML.sub(rb'\1' + payload_head, modified_html, count=1)
-        else:
-             # 정말 아무 태그도 없으면 맨 앞에 붙임
-             modified_html = payload_head + modified_html
-    
-    # --- Apply Body Injection ---
-    # </body> 태그 직전에 삽입
+        inserts.append((find_head_insert(html_content), payload_head))
+
+    # --- Body Injection 위치 ---
+    # 마지막 </body> 태그 직전에 삽입
     if payload_body:
-        if RE_BODY_END.search(modified_html):
-            modified_html = RE_BODY_END.sub(payload_body + rb'\1', modified_html, count=1)
+        pos = find_body_end(html_content)
+        # Body 닫는 태그가 없으면 맨 뒤에 붙임
+        inserts.append((pos if pos >= 0 else len(html_content), payload_body))
+
+    # 원본 문서를 한 번만 복사하며 두 위치에 동시에 삽입
+    return _splice(html_content, inserts)
+
+def find_head_insert(html_content: bytes) -> int:
+    """
+    head payload 를 삽입할 위치를 반환합니다.
+    <head> 직후 (없으면 <html> 직후, 그것도 없으면 문서 맨 앞) 이며,
+    prescan 구간 안에 <meta> charset 선언이 있으면 그 태그 뒤로 미룹니다.
+    """
+    m = RE_HEAD.search(html_content) or RE_HTML.search(html_content) # fallback: html 태그 뒤
+    return after_meta_charset(html_content, m.end() if m else 0)
+
+def after_meta_charset(html_content: bytes, pos: int) -> int:
+    """
+    pos 이후, 문서 앞 CHARSET_PRESCAN_SIZE 바이트 안에 <meta> charset 선언이 있으면 그 끝 위치를 반환합니다.
+    payload 가 선언을 prescan 구간 밖으로 밀어내면 non-UTF-8 문서가 잘못 디코딩되기 때문입니다.
+    """
+    m = RE_META_CHARSET.search(html_content, pos, CHARSET_PRESCAN_SIZE)
+    return m.end() if m else pos
+
+# 뒤에서부터 검색할 첫 구간 크기 (대부분의 </body> 는 문서 끝 수 KB 안에 있음)
+_TAIL_SCAN_START = 4096
+
+def find_body_end(html_content: bytes) -> int:
+    """
+    [Performance] 마지막 </body> 의 위치를 문서 끝에서부터 찾습니다. (없으면 -1)
+    끝부분 구간을 두 배씩 넓혀가며 검사하므로, 일반적인 문서는 전체를 스캔하지 않습니다.
+    이미 검사한 구간은 다시 스캔하지 않으므로 태그가 없는 문서도 전체를 한 번만 훑습니다.
+    """
+    size = len(html_content)
+    window = _TAIL_SCAN_START
+    end = size
+    while True:
+        start = max(0, size - window)
+        last = None
+        for m in RE_BODY_END.finditer(html_content, start, end):
+            last = m
+        if last is not None:
+            return last.start()
+        if start == 0:
+            return -1
+        # 경계에 걸친 태그도 찾도록 (태그 길이 - 1) 만큼 겹쳐서 다음 구간을 검사
+        end = start + len(BODY_END_TAG) - 1
+        window *= 2
+
+def _splice(data: bytes, inserts: list) -> bytes:
+    """(위치, payload) 목록을 원본 좌표 기준으로 한 번에 끼워 넣습니다."""
+    parts = []
+    prev = 0
+    for pos, payload in sorted(inserts, key=lambda item: item[0]):
+        parts.append(data[prev:pos])
+        parts.append(payload)
+        prev = pos
+    parts.append(data[prev:])
+    return b"".join(parts)
+
+class PayloadCache(GenerationLRU):
+    """
+    [Performance] 조립이 끝난 주입 payload (head, body 바이트열) 캐시.
+    (플러그인 generation, 매칭된 script 블록 조합) 단위로 보관하여
+    응답마다 문자열 포맷팅/인코딩을 반복하지 않습니다. generation 이 바뀌면 전부 버립니다.
+    """
+    def __init__(self, maxsize: int = 256):
+        super().__init__(maxsize)
+
+    def get_or_build(self, generation, key, build):
+        payloads = self.get(key, generation)
+        if payloads is None:
+            payloads = build()
+            self.put(key, generation, payloads)
+        return payloads
+
+# UTF-16/32 문서는 ASCII payload 를 바이트 그대로 끼워 넣을 수 없음
+_ASCII_INCOMPATIBLE_CHARSETS = ("utf-16", "utf16", "utf-32", "utf32", "ucs-2", "ucs2")
+
+def get_charset(content_type: str) -> str:
+    """Content-Type 헤더에서 charset 파라미터를 추출합니다. (없으면 빈 문자열)"""
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.strip().lower() == "charset":
+            return value.strip().strip('"\'').lower()
+    return ""
+
+# 본문 앞 BOM 은 Content-Type charset 보다 우선함 (UTF-32LE BOM 이 UTF-16LE BOM 으로 시작하므로 먼저 검사)
+_UTF_BOMS = (
+    (b"\x00\x00\xfe\xff", "utf-32-be"),
+    (b"\xff\xfe\x00\x00", "utf-32-le"),
+    (b"\xfe\xff", "utf-16-be"),
+    (b"\xff\xfe", "utf-16-le"),
+)
+UTF8_BOM = b"\xef\xbb\xbf"
+BOM_SNIFF_SIZE = 4
+
+def get_bom_encoding(data: bytes):
+    """본문 앞의 UTF-16/32 BOM 을 (bom, 인코딩) 으로 반환합니다. (없으면 None)"""
+    for bom, encoding in _UTF_BOMS:
+        if data.startswith(bom):
+            return bom, encoding
+    return None
+
+def is_ascii_compatible(content_type: str, data: bytes = b"") -> bool:
+    """
+    ASCII payload 를 바이트 단위로 삽입해도 안전한 문서인지 확인합니다.
+    data 로 본문 앞부분을 주면 BOM 을 먼저 확인합니다. (BOM 이 헤더 charset 보다 우선)
+    """
+    if get_bom_encoding(data):
+        return False
+    if data.startswith(UTF8_BOM):
+        return True
+    return not get_charset(content_type).startswith(_ASCII_INCOMPATIBLE_CHARSETS)
+
+
+RE_BODY_START = re.compile(rb'(?i)<body[\s>]')
+
+class StreamingInjector:
+    """
+    [Streaming] mitmproxy flow.response.stream 콜백.
+    청크가 도착하는 대로 (필요 시) 압축을 풀고, 주입 지점을 찾아 payload 를 끼워 넣은 뒤 바로 내보냅니다.
+    - head_payload: <head> 직후 (없으면 <html> 직후, 그것도 없으면 문서 맨 앞)
+      앞부분 CHARSET_PRESCAN_SIZE 바이트 안에 <meta> charset 선언이 있으면 그 뒤
+    - body_payload: 마지막 </body> 직전 (없으면 문서 맨 끝)
+    태그가 청크 경계에 걸쳐도 찾을 수 있도록 작은 carry-over 버퍼를 유지합니다.
+    HTTP/1.1 chunked 응답에서 빈 청크(0\r\n\r\n)는 본문 종료를 뜻하므로, 콜백은 비어 있지 않은
+    청크의 목록을 반환합니다. (보류 중이면 빈 목록 — mitmproxy 10+ 는 목록 반환을 지원)
+    encoder 가 주어지면 주입된 출력을 다시 압축하여 내보냅니다. (core.encoding.make_encoder)
+    본문이 UTF-16/32 BOM 으로 시작하면 (헤더만으로는 알 수 없음) 주입하지 않고 그대로 내보냅니다.
+    """
+    # <head> 를 이만큼 찾지 못하면 fallback 위치에 주입하고 스트리밍을 계속함
+    HEAD_SCAN_LIMIT = 64 * 1024
+
+    def __init__(self, head_payload: bytes = b"", body_payload: bytes = b"", decoder=None, encoder=None):
+        self.head_payload = head_payload
+        self.body_payload = body_payload
+        self.decoder = decoder
+        self.encoder = encoder
+        self._head_pending = bool(head_payload)
+        self._head_buf = b""
+        self._tail = b""
+        self._tail_has_tag = False
+        self._sniff_buf = b""
+        self._passthrough = False
+        self._finished = False
+
+    def __call__(self, chunk: bytes) -> list:
+        # mitmproxy 는 스트림 종료 시 빈 bytes 로 한 번 더 호출함
+        if not chunk:
+            if self._finished:
+                return []
+            out = self._encode(self.finish(), final=True)
+        else:
+            data = self.decoder.decompress(chunk) if self.decoder else chunk
+            out = self._encode(self.feed(data))
+        # 내보낼 바이트가 없으면 청크를 만들지 않음 (빈 청크 = 스트림 종료)
+        return [out] if out else []
+
+    def _encode(self, data: bytes, final: bool = False) -> bytes:
+        # 주입기가 보류한 구간(빈 출력)은 압축기를 거치지 않음 (빈 청크를 만들지 않기 위함)
+        if self.encoder is None or not (data or final):
+            return data
+        out = self.encoder.compress(data)
+        if final:
+            return out + self.encoder.finish()
+        # 청크마다 flush 하여 compress 가 내부 버퍼에 남긴 바이트까지 바로 내보냄
+        return out + self.encoder.flush()
+
+    def feed(self, data: bytes) -> bytes:
+        if self._sniff_buf is not None:
+            data = self._sniff(data, force=False)
+            if self._sniff_buf is not None:
+                return b""
+        if self._passthrough:
+            return data
+        if self._head_pending:
+            data = self._feed_head(data)
+            if self._head_pending:
+                return b""
+        return self._feed_body(data)
+
+    def finish(self) -> bytes:
+        if self._finished:
+            return b""
+        self._finished = True
+
+        out = b""
+        if self.decoder:
+            out = self.feed(self.decoder.flush())
+        if self._sniff_buf is not None:
+            out += self.feed(self._sniff(b"", force=True))
+        if self._passthrough:
+            return out
+        if self._head_pending:
+            out += self._feed_body(self._resolve_head(self._head_buf, force=True))
+
+        if not self.body_payload:
+            return out + self._tail
+        if self._tail_has_tag:
+            return out + self.body_payload + self._tail
+        # Body 닫는 태그가 없으면 맨 뒤에 붙임
+        return out + self._tail + self.body_payload
+
+    def _sniff(self, data: bytes, force: bool) -> bytes:
+        """본문 앞 BOM_SNIFF_SIZE 바이트를 모아 UTF-16/32 BOM 여부를 판별합니다."""
+        buf = self._sniff_buf + data
+        if len(buf) < BOM_SNIFF_SIZE and not force:
+            self._sniff_buf = buf
+            return b""
+        self._sniff_buf = None
+        self._passthrough = get_bom_encoding(buf) is not None
+        return buf
+
+    def _feed_head(self, data: bytes) -> bytes:
+        self._head_buf += data
+        return self._resolve_head(self._head_buf, force=False)
+
+    def _resolve_head(self, buf: bytes, force: bool) -> bytes:
+        m = RE_HEAD.search(buf)
+        if m:
+            pos = m.end()
+        elif force or len(buf) > self.HEAD_SCAN_LIMIT or RE_BODY_START.search(buf):
+            m = RE_HTML.search(buf) # fallback: html 태그 뒤
+            pos = m.end() if m else 0
+        else:
+            return b""
+
+        # charset 선언이 prescan 구간 안에 올 수 있으므로 구간을 다 받을 때까지 보류
+        meta = RE_META_CHARSET.search(buf, pos, CHARSET_PRESCAN_SIZE)
+        if meta:
+            pos = meta.end()
+        elif not force and len(buf) < CHARSET_PRESCAN_SIZE:
+            return b""
+
+        self._head_pending = False
+        self._head_buf = b""
+        return buf[:pos] + self.head_payload + buf[pos:]
+
+    def _feed_body(self, data: bytes) -> bytes:
+        if not self.body_payload:
+            out, self._tail = self._tail + data, b""
+            return out
+
+        # 이전 tail 의 끝부분과 새 데이터만 검사 (tail 전체를 다시 스캔하지 않음)
+        keep = len(BODY_END_TAG) - 1
+        overlap = min(keep, len(self._tail))
+        window = self._tail[len(self._tail) - overlap:] + data
+        pos = window.lower().rfind(BODY_END_TAG)
+
+        buf = self._tail + data
+        if pos >= 0:
+            cut = len(self._tail) - overlap + pos
+            self._tail_has_tag = True
+        elif self._tail_has_tag:
+            # 마지막 </body> 이후 내용은 끝까지 보관
+            self._tail = buf
+            return b""
         else:
-            # Body 닫는 태그가 없으면 맨 뒤에 붙임
-            modified_html += payload_body
+            cut = max(0, len(buf) - keep)
 
-    return modified_html
\ No newline at end of file
+        out, self._tail = buf[:cut], buf[cut:]
+        return out
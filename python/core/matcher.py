@@ -1,5 +1,109 @@
 import re
+import fnmatch
+from functools import lru_cache
 from urllib.parse import urlparse
+from core.cache import GenerationLRU
+
+_ANY_WEB_SCHEMES = frozenset(("http", "https"))
+
+class CompiledPattern:
+    """
+    manifest 매칭 패턴 하나를 미리 분해/컴파일해 둔 객체 (UrlMatcher.compile 결과).
+    매 요청마다 패턴 문자열을 다시 쪼개거나 정규식을 만들지 않도록 합니다.
+    """
+    __slots__ = ("pattern", "all_urls", "schemes", "host", "host_kind", "port", "path_kind", "path_arg")
+
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+        self.all_urls = pattern == "<all_urls>"
+        self.schemes = None
+        self.host = '*'
+        self.host_kind = "any"
+        self.port = None
+        self.path_kind = "any"
+        self.path_arg = None
+        if self.all_urls:
+            return
+
+        split = UrlMatcher._split_pattern(pattern)
+        if split is None:
+            raise ValueError(f"Invalid match pattern: {pattern!r}")
+        scheme_pat, host_port_pat, path_pat = split
+
+        # 1. Scheme
+        self.schemes = _ANY_WEB_SCHEMES if scheme_pat == '*' else frozenset((scheme_pat,))
+
+        # 2. Host / Port
+        if ':' in host_port_pat:
+            host, port = host_port_pat.split(':', 1)
+        else:
+            host, port = host_port_pat, None
+        self.port = None if not port or port == '*' else port
+
+        self.host = host
+        if host == '*':
+            self.host_kind = "any"
+        elif host.startswith('*.'):
+            self.host_kind = "suffix"
+            self.host = host[2:]
+        else:
+            self.host_kind = "exact"
+
+        # 3. Path: 단순한 형태는 정규식 없이 문자열 비교로 처리
+        stars = path_pat.count('*')
+        if path_pat.strip('*') == '/' and path_pat.startswith('/*'):
+            self.path_kind = "any"
+        elif stars == 0:
+            self.path_kind, self.path_arg = "exact", path_pat
+        elif stars == 1:
+            prefix, suffix = path_pat.split('*')
+            self.path_kind, self.path_arg = "affix", (prefix, suffix, len(prefix) + len(suffix))
+        else:
+            # 정규식 변환: 특수문자 이스케이프 후 *만 .*로 변경
+            regex = '^' + re.escape(path_pat).replace(r'\*', '.*') + '$'
+            self.path_kind, self.path_arg = "regex", re.compile(regex, re.DOTALL)
+
+    def match_parts(self, parts) -> bool:
+        """UrlMatcher.parse_url() 결과에 대해 매칭합니다. (파싱 실패 시 parts=None)"""
+        if self.all_urls:
+            return True
+        if parts is None:
+            return False
+        scheme, hostname, port, path = parts
+
+        if scheme not in self.schemes:
+            return False
+
+        if self.port is not None and str(port) != self.port:
+            return False
+
+        if self.host_kind == "exact":
+            if hostname != self.host:
+                return False
+        elif self.host_kind == "suffix":
+            if hostname is None:
+                return False
+            if hostname != self.host and not hostname.endswith('.' + self.host):
+                return False
+
+        kind = self.path_kind
+        if kind == "any":
+            return True
+        if kind == "affix":
+            prefix, suffix, min_len = self.path_arg
+            return len(path) >= min_len and path.startswith(prefix) and path.endswith(suffix)
+        if kind == "exact":
+            return path == self.path_arg
+        return self.path_arg.match(path) is not None
+
+    def matches(self, url: str) -> bool:
+        if self.all_urls:
+            return True
+        return self.match_parts(UrlMatcher.parse_url(url))
+
+    def __repr__(self):
+        return f"CompiledPattern({self.pattern!r})"
+
 
 class UrlMatcher:
     @staticmethod
@@ -8,86 +112,240 @@ class UrlMatcher:
         Chrome Extension 스타일의 매칭 로직을 구현합니다.
         <all_urls>, *://*/*, http://localhost:3000/* 등을 처리합니다.
         """
-        if pattern == "<all_urls>":
-            return True
-            
         try:
-            # 1. Scheme, Host(포트 포함), Path 분리
-            parts = pattern.split("://")
-            if len(parts) != 2:
-                # 스킴 와일드카드 처리 (예: *://google.com/*)
-                if pattern.startswith("*://"):
-                    scheme_pat = "*"
-                    rest = pattern[4:]
-                else:
-                    return False 
-            else:
-                scheme_pat, rest = parts
-            
-            if '/' in rest:
-                host_port_pat, path_pat = rest.split('/', 1)
-                path_pat = '/' + path_pat
-            else:
-                host_port_pat = rest
-                path_pat = '/*'
-
-            # 2. URL 파싱
-            parsed = urlparse(url)
-            u_scheme = parsed.scheme
-            u_hostname = parsed.hostname # 포트 제외된 호스트
-            u_port = parsed.port         # 포트 번호 (없으면 None)
-            u_path = parsed.path
-            
-            # 3. Scheme 매칭
-            if not UrlMatcher._match_scheme(scheme_pat, u_scheme):
-                return False
-                
-            # 4. Host 및 Port 매칭
-            if not UrlMatcher._match_host_and_port(host_port_pat, u_hostname, u_port):
-                return False
-                
-            # 5. Path 매칭
-            if not UrlMatcher._match_path(path_pat, u_path):
-                return False
-                
-            return True
-
+            return UrlMatcher.compile(pattern).matches(url)
         except Exception:
             return False
 
     @staticmethod
-    def _match_scheme(pattern, scheme):
-        if pattern == '*': return scheme in ['http', 'https']
-        return pattern == scheme
+    @lru_cache(maxsize=1024)
+    def compile(pattern: str) -> CompiledPattern:
+        """
+        패턴을 CompiledPattern 으로 변환합니다. (패턴 문자열 단위로 캐시)
+        형식이 잘못된 패턴이면 ValueError 를 발생시킵니다.
+        """
+        return CompiledPattern(pattern)
+
+    @staticmethod
+    def parse_url(url: str):
+        """
+        URL을 (scheme, hostname, port, path) 로 한 번만 파싱합니다.
+        빈 경로는 브라우저와 동일하게 '/' 로 취급하며,
+        파싱할 수 없는 URL(잘못된 포트 등)이면 None 을 반환합니다.
+        """
+        try:
+            parsed = urlparse(url)
+            return parsed.scheme, parsed.hostname, parsed.port, parsed.path or '/'
+        except Exception:
+            return None
 
     @staticmethod
-    def _match_host_and_port(pattern, hostname, port):
-        # 패턴에 포트가 명시되어 있는지 확인 (예: localhost:3000)
-        if ':' in pattern:
-            pat_host, pat_port = pattern.split(':', 1)
+    def _split_pattern(pattern: str):
+        """
+        패턴을 (scheme, host[:port], path) 로 분리합니다.
+        형식이 잘못된 패턴이면 None 을 반환합니다.
+        """
+        parts = pattern.split("://")
+        if len(parts) != 2:
+            # 스킴 와일드카드 처리 (예: *://google.com/*)
+            if pattern.startswith("*://"):
+                scheme_pat = "*"
+                rest = pattern[4:]
+            else:
+                return None
         else:
-            pat_host, pat_port = pattern, None
-
-        # 1) 포트 검사
-        if pat_port:
-            if pat_port == "*":
-                pass # 포트 와일드카드
-            elif str(port) != pat_port:
-                if port is None: 
-                    # URL에 포트가 없는데 패턴엔 있는 경우 (http=80 등 정규화 로직이 없다면 불일치 처리)
-                    return False
-                return False
+            scheme_pat, rest = parts
+
+        if '/' in rest:
+            host_port_pat, path_pat = rest.split('/', 1)
+            path_pat = '/' + path_pat
+        else:
+            host_port_pat = rest
+            path_pat = '/*'
+        return scheme_pat, host_port_pat, path_pat
+
+
+def host_matches(hostname: str, patterns) -> bool:
+    """
+    호스트가 glob 패턴 목록(예: '*.bank.co.kr', 'localhost') 중 하나와 일치하는지 검사합니다.
+    '*.example.com' 은 example.com 자체도 포함합니다. (대소문자 무시)
+    """
+    if not hostname:
+        return False
+    hostname = hostname.lower().rstrip('.')
+    for pattern in patterns or ():
+        pattern = pattern.lower()
+        if fnmatch.fnmatchcase(hostname, pattern):
+            return True
+        if pattern.startswith('*.') and hostname == pattern[2:]:
+            return True
+    return False
+
+
+class MatchResult:
+    """
+    URL 하나에 대한 매칭 결과.
+    blocks: 매칭된 (plugin_id, ContentScript) 목록 (플러그인/블록 선언 순서)
+    """
+    __slots__ = ("blocks", "matched_pids", "_injections")
+
+    def __init__(self, blocks=()):
+        self.blocks = tuple(blocks)
+        self.matched_pids = list(dict.fromkeys(pid for pid, _ in self.blocks))
+        self._injections = None
+
+    def __bool__(self):
+        return bool(self.blocks)
 
-        # 2) 호스트 검사
-        if pat_host == '*': return True
-        if pat_host.startswith('*.'):
-            suffix = pat_host[2:]
-            return hostname == suffix or hostname.endswith('.' + suffix)
-        
-        return pat_host == hostname
+    @property
+    def injections(self) -> list:
+        """/v1/match 응답용 (상대 스크립트 경로, run_at) 목록 (최초 접근 시 한 번만 생성)"""
+        if self._injections is None:
+            self._injections = [
+                (f"plugins/{pid}/{js}", block.run_at)
+                for pid, block in self.blocks
+                for js in block.js
+            ]
+        return self._injections
+
+
+class MatchCache(GenerationLRU):
+    """
+    [Performance] URL -> MatchResult LRU 캐시.
+    새로고침, SPA 뒤로/앞으로 가기, iframe 등으로 같은 URL이 반복될 때 매칭 단계를 생략합니다.
+    플러그인 목록이 바뀌면(generation 증가) 저장된 결과를 모두 버립니다.
+    """
+    def __init__(self, maxsize: int = 2048):
+        super().__init__(maxsize)
 
     @staticmethod
-    def _match_path(pattern, path):
-        # 정규식 변환: 특수문자 이스케이프 후 *만 .*로 변경
-        regex = '^' + re.escape(pattern).replace(r'\*', '.*') + '$'
-        return re.match(regex, path) is not None
\ No newline at end of file
+    def make_key(url: str) -> str:
+        # 매칭은 scheme/host/port/path 만 사용하므로 query/fragment 는 키에서 제외
+        return url.partition('#')[0].partition('?')[0]
+
+    def get(self, url: str, generation: int):
+        return super().get(self.make_key(url), generation)
+
+    def put(self, url: str, generation: int, result: MatchResult) -> None:
+        super().put(self.make_key(url), generation, result)
+
+
+class HostDecisionCache(GenerationLRU):
+    """
+    [Performance] 호스트(SNI) -> TLS 가로채기 여부(True: intercept, False: passthrough) 캐시.
+    같은 호스트로 반복되는 연결은 패턴 검사 없이 바로 결정합니다.
+    항목은 ttl 초 후 만료되며, 플러그인 목록이 바뀌면(generation 증가) 모두 버립니다.
+    """
+    def __init__(self, ttl: float = 300.0, maxsize: int = 4096):
+        super().__init__(maxsize, ttl=ttl)
+        self.intercepted = 0
+        self.passed_through = 0
+
+    def record(self, intercept: bool) -> None:
+        """연결 하나에 대한 최종 결정을 집계합니다."""
+        with self._lock:
+            if intercept:
+                self.intercepted += 1
+            else:
+                self.passed_through += 1
+
+    def _stats(self) -> dict:
+        decided = self.intercepted + self.passed_through
+        return {
+            **super()._stats(),
+            "ttl": self.ttl,
+            "intercepted": self.intercepted,
+            "passed_through": self.passed_through,
+            "passthrough_ratio": round(self.passed_through / decided, 4) if decided else 0.0,
+        }
+
+
+class _HostTrieNode:
+    __slots__ = ("children", "entries")
+
+    def __init__(self):
+        self.children = {}
+        self.entries = []
+
+
+class MatchIndex:
+    """
+    [Performance] content_scripts.matches 패턴을 호스트 기준으로 미리 분류한 인덱스.
+    PluginLoader.load_plugins() 시점에 한 번 만들어지며, 매칭 비용이 전체 패턴 수가 아닌
+    해당 호스트의 후보 패턴 수에 비례하도록 합니다.
+
+    - exact:     정확한 호스트 -> 항목 목록
+    - wildcard:  '*.example.com' -> 라벨 역순 트라이 (com -> example)
+    - catch_all: <all_urls>, 호스트 '*'
+    """
+    def __init__(self):
+        self._exact = {}
+        self._wildcard = _HostTrieNode()
+        self._catch_all = []
+        self._seq = 0
+        self.size = 0
+
+    @classmethod
+    def build(cls, plugins: dict) -> "MatchIndex":
+        index = cls()
+        for pid, ctx in plugins.items():
+            for block in ctx.manifest.content_scripts:
+                index.add(pid, block)
+        return index
+
+    def add(self, pid: str, block) -> None:
+        """script 블록 하나의 모든 패턴을 인덱스에 등록합니다."""
+        seq = self._seq
+        self._seq += 1
+
+        for pattern in block.matches:
+            try:
+                compiled = UrlMatcher.compile(pattern)
+            except ValueError:
+                continue # 잘못된 패턴은 어떤 URL과도 매칭되지 않음
+
+            entry = (seq, pid, block, compiled)
+            if compiled.host_kind == "any":
+                self._catch_all.append(entry)
+            elif compiled.host_kind == "suffix":
+                node = self._wildcard
+                for label in reversed(compiled.host.split('.')):
+                    node = node.children.setdefault(label, _HostTrieNode())
+                node.entries.append(entry)
+            else:
+                self._exact.setdefault(compiled.host, []).append(entry)
+            self.size += 1
+
+    def candidates(self, hostname) -> list:
+        """호스트에 대해 검사가 필요한 후보 항목만 모읍니다."""
+        found = list(self._catch_all)
+        if not hostname:
+            return found
+
+        found.extend(self._exact.get(hostname, ()))
+
+        node = self._wildcard
+        for label in reversed(hostname.split('.')):
+            node = node.children.get(label)
+            if node is None:
+                break
+            found.extend(node.entries)
+        return found
+
+    def could_match_host(self, hostname) -> bool:
+        """이 호스트의 URL 중 하나라도 매칭될 수 있는 패턴이 있는지 (경로/스킴은 보지 않음)"""
+        return bool(self.candidates(hostname.lower().rstrip('.') if hostname else hostname))
+
+    def lookup(self, url: str) -> MatchResult:
+        # URL은 한 번만 파싱하고, 후보 패턴은 파싱 결과로 바로 비교
+        parts = UrlMatcher.parse_url(url)
+        hostname = parts[1] if parts else None
+
+        matched = {}
+        for seq, pid, block, compiled in self.candidates(hostname):
+            if seq in matched:
+                continue
+            if compiled.match_parts(parts):
+                matched[seq] = (pid, block)
+
+        return MatchResult(matched[seq] for seq in sorted(matched))
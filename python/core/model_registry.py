@@ -0,0 +1,140 @@
+import os
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger("AiPlugs.ModelRegistry")
+
+# 엔진이 지원하는 모델 구조 (core.ai_engine.ARCHITECTURES 와 일치해야 함)
+SUPPORTED_ARCHITECTURES = ("crnn",)
+
+class ModelRegistry:
+    """
+    플러그인 manifest 의 inference.models 로부터 추론 모델 목록을 만듭니다.
+    모델별로 입력 크기, 모델 구조, 실행 옵션(runtime)을 기록하며,
+    등록되지 않은 모델 id 는 get() 에서 바로 실패합니다. (다른 모델로 대체 실행하지 않음)
+
+    spec (워커로 그대로 전달되는 dict):
+    - key, filename, path: 모델 키, 파일명, 실제 경로 (환경변수 <key> 가 있으면 우선)
+    - architecture, width, height: 모델 구조와 입력 크기
+    - runtime, torchscript, min_agreement: 실행 방식 (core.ai_engine.RUNTIME_VARIANTS 참고)
+    - workers: 전용 워커 풀 크기 (None 이면 공용 풀 사용)
+    - sha256: 실제 파일의 sha256 (get() 시 채워짐)
+    """
+    def __init__(self, model_dir: str):
+        self.model_dir = model_dir
+        self.generation = None
+        self._specs = {}
+        self._errors = {}
+        self._hashes = {}  # path -> (mtime_ns, size, sha256)
+        self._lock = threading.Lock()
+        self._hash_lock = threading.Lock()  # _hashes 는 API 요청 스레드와 배치/동기화 스레드가 함께 사용
+
+    def __contains__(self, key):
+        return key in self._specs
+
+    def keys(self):
+        return list(self._specs)
+
+    def sync(self, plugins: dict, generation=None):
+        """
+        로드된 플러그인 전체로 목록을 다시 만듭니다. (generation 이 같으면 생략)
+        같은 키를 여러 플러그인이 선언하면 먼저 등록된 정의를 사용합니다.
+        목록을 다시 만들었으면 True 를 반환합니다.
+        """
+        if generation is not None and generation == self.generation:
+            return False
+        specs, errors = {}, {}
+        for plugin_id, ctx in plugins.items():
+            for model in ctx.manifest.inference.models:
+                try:
+                    spec = self._build_spec(model)
+                except ValueError as e:
+                    errors[model.key] = str(e)
+                    logger.error(f"[{plugin_id}] Invalid model {model.key}: {e}")
+                    continue
+                if model.key in specs:
+                    if spec != specs[model.key]:
+                        logger.warning(f"[{plugin_id}] Model {model.key} already registered with a different definition")
+                    continue
+                specs[model.key] = spec
+
+        with self._lock:
+            self._specs = specs
+            self._errors = errors
+            self.generation = generation
+
+        # 등록 시점에 한 번 검증 (결과는 파일 mtime 기준으로 캐시됨)
+        for key in specs:
+            try:
+                self.get(key)
+            except (FileNotFoundError, ValueError) as e:
+                logger.warning(f"Model {key} not available yet: {e}")
+        logger.info(f"Model registry: {len(specs)} model(s) registered")
+        return True
+
+    def _build_spec(self, model) -> dict:
+        architecture = model.architecture.lower()
+        if architecture not in SUPPORTED_ARCHITECTURES:
+            raise ValueError(f"unsupported architecture '{model.architecture}'")
+        if model.input is None:
+            raise ValueError("input geometry (input.width / input.height) is required")
+        runtime = model.runtime
+        return {
+            "key": model.key,
+            "filename": model.filename,
+            "architecture": architecture,
+            "width": model.input.width,
+            "height": model.input.height,
+            "runtime": runtime.variant,
+            "torchscript": runtime.torchscript,
+            "min_agreement": runtime.min_agreement,
+            "workers": runtime.workers,
+            "expected_sha256": model.sha256.lower() if model.sha256 else None,
+        }
+
+    def get(self, key, cached_only=False) -> dict:
+        """
+        워커에 전달할 spec 을 반환합니다.
+        - 등록되지 않은 키: KeyError
+        - 모델 파일 없음: FileNotFoundError
+        - sha256 불일치: ValueError
+        cached_only=True 이면 파일을 해싱하지 않고, 캐시된 sha256 이 없으면 None 을 반환합니다.
+        """
+        spec = self._specs.get(key)
+        if spec is None:
+            reason = self._errors.get(key)
+            raise KeyError(f"Unknown model: {key}" + (f" ({reason})" if reason else ""))
+
+        path = os.getenv(key) or os.path.join(self.model_dir, spec["filename"])
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Model file not found: {path}")
+        digest = self.file_sha256(path, cached_only)
+        if digest is None:
+            return None
+        expected = spec["expected_sha256"]
+        if expected and digest != expected:
+            raise ValueError(f"sha256 mismatch for {key}: expected {expected[:12]}..., got {digest[:12]}...")
+        return {**spec, "path": path, "sha256": digest}
+
+    def file_sha256(self, path, cached_only=False) -> str:
+        """
+        파일 sha256 (mtime / 크기가 바뀌지 않았으면 이전 결과를 재사용, 해싱 중에는 lock 을 잡지 않음)
+        cached_only=True 이면 재사용할 결과가 없을 때 해싱하지 않고 None 을 반환합니다.
+        """
+        stat = os.stat(path)
+        with self._hash_lock:
+            cached = self._hashes.get(path)
+        if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+            return cached[2]
+        if cached_only:
+            return None
+
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        result = digest.hexdigest()
+        with self._hash_lock:
+            self._hashes[path] = (stat.st_mtime_ns, stat.st_size, result)
+        return result
@@ -11,6 +11,9 @@ from mitmproxy.tools.dump import DumpMaster
 from mitmproxy import options
 from core.api_server import run_api_server
 from core.proxy_server import AiPlugsAddon
+from core.plugin_loader import plugin_loader
+from core.cert_cache import CertWarmupAddon, collect_plugin_hosts
+from core.config import load_system_settings
 from utils.system_proxy import SystemProxy
 
 class SystemOrchestrator:
@@ -21,6 +24,7 @@ class SystemOrchestrator:
         self.system_proxy = SystemProxy()
         self.api_thread = None
         self.mitm_master = None
+        self.settings = load_system_settings()
 
     # ▼▼▼ [누락된 부분] 아래 함수가 클래스 내부에 포함되어야 합니다 ▼▼▼
     def force_clear_system_proxy(self):
@@ -61,7 +65,23 @@ class SystemOrchestrator:
 
         opts = options.Options(listen_host='127.0.0.1', listen_port=self.proxy_port)
         self.mitm_master = DumpMaster(opts, with_termlog=False, with_dumper=False)
-        self.mitm_master.addons.add(AiPlugsAddon(self.api_port))
+        proxy_settings = self.settings.get("proxy", {})
+        self.mitm_master.addons.add(AiPlugsAddon(
+            self.api_port,
+            streaming=proxy_settings.get("streaming", False),
+            compression=proxy_settings.get("compression"),
+            ssl_passthrough=self.settings.get("ssl_passthrough"),
+            tls_decision_ttl=proxy_settings.get("tls_decision_ttl", 300.0)
+        ))
+
+        # [Performance] 플러그인 호스트 인증서 미리 생성 (백그라운드, 디스크 캐시)
+        cert_settings = proxy_settings.get("cert_cache", {})
+        if cert_settings.get("enabled", True):
+            cache_dir = cert_settings.get("dir") or os.path.join(
+                os.path.expanduser(opts.confdir), "aiplugs-certs"
+            )
+            hosts = collect_plugin_hosts(plugin_loader.plugins)
+            self.mitm_master.addons.add(CertWarmupAddon(hosts, cache_dir))
         
         self.logger.info(f"Mitmproxy running on port {self.proxy_port}")
         await self.mitm_master.run()
@@ -6,6 +6,9 @@ import fnmatch
 from typing import Dict, Optional, Any
 from multiprocessing import Process
 from core.schemas import PluginManifest
+from core.matcher import MatchIndex, MatchResult, MatchCache
+
+MATCH_CACHE_SIZE = 2048
 
 # 로거 설정
 logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(levelname)s] %(name)s - %(message)s')
@@ -35,15 +38,26 @@ class PluginContext:
 
 class PluginLoader:
     _instance = None
-    plugins: Dict[str, PluginContext]
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(PluginLoader, cls).__new__(cls)
+            cls._instance.generation = 0
+            cls._instance.match_cache = MatchCache(MATCH_CACHE_SIZE)
             cls._instance.plugins = {}
             cls._instance.plugins_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../plugins"))
         return cls._instance
 
+    @property
+    def plugins(self) -> Dict[str, PluginContext]:
+        return self._plugins
+
+    @plugins.setter
+    def plugins(self, value: Dict[str, PluginContext]):
+        # 플러그인 목록 교체 시 매칭 인덱스/캐시도 함께 갱신
+        self._plugins = value
+        self.rebuild_match_index()
+
     def _load_settings(self) -> dict:
         settings_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../config/settings.json"))
         if os.path.exists(settings_path):
@@ -107,6 +121,30 @@ class PluginLoader:
                 except Exception as e:
                     logger.error(f"Load Error {folder}: {e}")
 
+        self.rebuild_match_index()
+
+    def rebuild_match_index(self):
+        """
+        로드된 플러그인의 content_scripts 패턴으로 매칭 인덱스를 다시 만듭니다.
+        generation 을 올려 이전 플러그인 구성으로 캐시된 매칭 결과를 무효화합니다.
+        """
+        self.match_index = MatchIndex.build(self._plugins)
+        self.generation += 1
+        logger.info(f"Match index built: {self.match_index.size} patterns from {len(self._plugins)} plugins (gen {self.generation})")
+
+    def match_url(self, url: str) -> MatchResult:
+        """URL에 매칭되는 플러그인과 script 블록을 조회합니다. (URL 단위 LRU 캐시)"""
+        generation = self.generation
+        result = self.match_cache.get(url, generation)
+        if result is None:
+            result = self.match_index.lookup(url)
+            self.match_cache.put(url, generation, result)
+        return result
+
+    def could_match_host(self, hostname: str) -> bool:
+        """이 호스트로 가는 요청에 주입될 가능성이 있는지 (TLS 가로채기 여부 판단용)"""
+        return self.match_index.could_match_host(hostname)
+
     def get_plugin(self, plugin_id: str) -> Optional[PluginContext]:
         return self.plugins.get(plugin_id)
 
@@ -1,9 +1,24 @@
-import re
 from mitmproxy import http
 from core.plugin_loader import plugin_loader
 from core.security import SecuritySanitizer
-from core.matcher import UrlMatcher 
-from core.injector import get_loader_script # [New] 로더 스크립트 생성 함수 임포트
+from core.injector import (
+    inject_payloads, build_payloads, is_ascii_compatible, get_bom_encoding, StreamingInjector, PayloadCache
+)
+from core.encoding import (
+    make_decoder, make_encoder, encode_body, choose_encoding, DEFAULT_ENCODINGS, DEFAULT_LEVELS
+)
+
+def has_no_body(flow: http.HTTPFlow) -> bool:
+    """
+    본문이 없어야 하는 응답인지 확인합니다. (HEAD 요청, 1xx / 204 / 304, Content-Length: 0)
+    이런 응답에 본문을 만들면 (chunked 종료 청크 포함) keep-alive 연결이 깨집니다.
+    """
+    if flow.request.method.upper() == "HEAD":
+        return True
+    status = flow.response.status_code
+    if 100 <= status < 200 or status in (204, 304):
+        return True
+    return flow.response.headers.get("Content-Length", "").strip() == "0"
 
 class ProxyHandler:
     def process(self, flow: http.HTTPFlow, context: dict) -> bool:
@@ -43,92 +58,146 @@ class Decoder(ProxyHandler):
 
 class PluginMatcher(ProxyHandler):
     def process(self, flow: http.HTTPFlow, context: dict) -> bool:
-        url = flow.request.url
-        matched_pids = []
-        
-        for pid, ctx in plugin_loader.plugins.items():
-            for script_block in ctx.manifest.content_scripts:
-                matched = False
-                for pattern in script_block.matches:
-                    if UrlMatcher.match(pattern, url):
-                        matched = True
-                        break
-                if matched:
-                    if pid not in matched_pids:
-                        matched_pids.append(pid)
-                    # 하나의 플러그인에서 하나라도 맞으면 해당 플러그인은 대상
-                    break
-        
-        context['matched_pids'] = matched_pids
-        return True
+        # 사전 컴파일된 매칭 인덱스로 한 번에 조회
+        # 매칭된 script 블록(run_at, all_frames 포함)까지 기록하여 Injector 가 재매칭하지 않도록 함
+        context['generation'] = plugin_loader.generation
+        result = plugin_loader.match_url(flow.request.url)
+        blocks = result.blocks
+        if context.get('is_iframe', False):
+            # Iframe 에는 all_frames 블록만 주입 대상
+            blocks = tuple(item for item in blocks if item[1].all_frames)
+
+        context['matched_pids'] = list(dict.fromkeys(pid for pid, _ in blocks))
+        context['matched_blocks'] = blocks
+        # [Early Exit] 매칭이 없으면 압축 해제/주입/헤더 재작성 없이 원본 그대로 통과
+        return bool(blocks)
 
 class Injector(ProxyHandler):
     def __init__(self, api_port: int):
         self.api_port = api_port
+        self.payload_cache = PayloadCache()
+
+    def _collect_scripts(self, context: dict) -> tuple:
+        """
+        매칭된 script 블록에서 주입할 스크립트 URL 을 run_at 기준으로 나눕니다.
+        - document_start: <head> 직후, <meta> charset 선언 뒤 (페이지 자체 스크립트보다 먼저 실행)
+        - document_end / document_idle: </body> 직전
+        (iframe 의 all_frames 필터링은 PluginMatcher 에서 이미 적용됨)
+        """
+        head_scripts, body_scripts = [], []
+
+        for pid, script_block in context.get('matched_blocks', ()):
+            target = head_scripts if script_block.run_at == "document_start" else body_scripts
+            for js_file in script_block.js:
+                # API 서버를 통해 서빙되는 URL 생성
+                target.append(f"http://127.0.0.1:{self.api_port}/plugins/{pid}/{js_file}")
+        return head_scripts, body_scripts
+
+    def _get_payloads(self, context: dict):
+        """
+        (head_payload, body_payload) 를 반환합니다. 주입할 스크립트가 없으면 None.
+        같은 블록 조합에 대해서는 캐시된 바이트열을 그대로 재사용합니다.
+        """
+        blocks = context.get('matched_blocks', ())
+        # 블록 객체는 같은 generation 안에서 유지되므로 id 로 조합을 식별
+        key = tuple(id(block) for _, block in blocks)
+
+        def build():
+            head_scripts, body_scripts = self._collect_scripts(context)
+            if not (head_scripts or body_scripts):
+                return False
+            return build_payloads(self.api_port, head_scripts, body_scripts)
+
+        return self.payload_cache.get_or_build(context.get('generation', 0), key, build) or None
+
+    def _log_injection(self, flow: http.HTTPFlow, context: dict, label: str = ""):
+        frame_tag = "[IFRAME]" if context.get('is_iframe', False) else "[TOP]"
+        print(f"[Proxy] {frame_tag}{label} Injected {context.get('matched_pids', [])} into {flow.request.url[:50]}...")
 
     def process(self, flow: http.HTTPFlow, context: dict) -> bool:
-        matched_pids = context.get('matched_pids', [])
-        if not matched_pids:
+        if not context.get('matched_blocks'):
             return True
 
-        is_iframe = context.get('is_iframe', False)
-        scripts_to_inject = []
+        payloads = self._get_payloads(context)
         
-        for pid in matched_pids:
-            ctx = plugin_loader.get_plugin(pid)
-            if not ctx: continue
-            
-            for script_block in ctx.manifest.content_scripts:
-                # Iframe 필터링
-                if is_iframe and not script_block.all_frames:
-                    continue
-                
-                # 해당 스크립트 블록이 현재 URL과 매칭되는지 다시 확인 (세부 매칭)
-                is_block_match = False
-                for pattern in script_block.matches:
-                    if UrlMatcher.match(pattern, flow.request.url):
-                        is_block_match = True
-                        break
-                
-                if is_block_match:
-                    for js_file in script_block.js:
-                        # API 서버를 통해 서빙되는 URL 생성
-                        url = f"http://127.0.0.1:{self.api_port}/plugins/{pid}/{js_file}"
-                        scripts_to_inject.append(f'<script src="{url}"></script>')
-        
-        if scripts_to_inject:
+        if payloads:
             # 캐시 무효화
             for h in ["Cache-Control", "Expires", "ETag"]:
                 if h in flow.response.headers: del flow.response.headers[h]
 
-            html = flow.response.text # text 속성 사용하여 문자열 처리
-            
-            # [수정] Core Loader Script (환경변수 설정 포함) 가져오기
-            try:
-                # get_loader_script는 bytes를 반환하므로 decode 필요
-                loader_script = get_loader_script(self.api_port).decode('utf-8')
-            except Exception:
-                # Fallback if import fails or error
-                loader_script = f"""<script>window.__AI_API_BASE_URL__ = "http://127.0.0.1:{self.api_port}";</script>"""
-
-            # Loader 스크립트를 가장 먼저 주입
-            injection_code = loader_script + "\n" + "\n".join(scripts_to_inject)
-            
-            # 대소문자 구분 없이 </body> 태그 찾기
-            pattern = re.compile(r'(</body>)', re.IGNORECASE)
-            
-            if pattern.search(html):
-                # </body> 앞에 주입
-                flow.response.text = pattern.sub(lambda m: injection_code + m.group(0), html)
+            # Core Loader + document_start 는 <head> 에, 나머지는 </body> 앞에 주입
+            html = flow.response.content or b""
+            bom = get_bom_encoding(html)
+            if is_ascii_compatible(flow.response.headers.get("Content-Type", ""), html):
+                # [Performance] charset 판별/디코딩 없이 바이트 그대로 주입
+                flow.response.content = inject_payloads(html, *payloads)
+            elif bom:
+                # UTF-16/32 BOM 문서는 BOM 의 인코딩으로 풀어서 주입 (헤더 charset 보다 우선)
+                mark, encoding = bom
+                text = html[len(mark):].decode(encoding, 'replace')
+                modified = inject_payloads(text.encode('utf-8'), *payloads)
+                flow.response.content = mark + modified.decode('utf-8').encode(encoding)
             else:
-                # 태그가 없으면 맨 뒤에 추가
-                flow.response.text = html + injection_code
+                # UTF-16 등 ASCII 비호환 문서는 문자열 단위로 처리
+                html = (flow.response.text or "").encode('utf-8')
+                modified = inject_payloads(html, *payloads)
+                flow.response.text = modified.decode('utf-8')
 
             context['injected'] = True
+            self._log_injection(flow, context)
             
-            frame_tag = "[IFRAME]" if is_iframe else "[TOP]"
-            print(f"[Proxy] {frame_tag} Injected {matched_pids} into {flow.request.url[:50]}...")
-            
+        return True
+
+class StreamInjector(Injector):
+    """
+    [Streaming] responseheaders 단계에서 실행되어, 본문 전체를 버퍼링하지 않고
+    청크 단위로 압축 해제 + 주입하도록 flow.response.stream 을 설정합니다.
+    처리할 수 없는 응답(미지원 Content-Encoding, ASCII 비호환 charset)은 False 를 반환하여
+    기존 버퍼링 경로(response 훅)로 넘깁니다.
+    본문이 없는 응답(HEAD, 1xx/204/304, Content-Length: 0)은 헤더를 건드리지 않고
+    context['passthrough'] 를 표시하여 원본 그대로 통과시킵니다.
+    """
+    def __init__(self, api_port: int, output_encoder: "OutputEncoder" = None):
+        super().__init__(api_port)
+        self.sanitizer = SecuritySanitizer()
+        self.output_encoder = output_encoder
+
+    def process(self, flow: http.HTTPFlow, context: dict) -> bool:
+        if has_no_body(flow):
+            context['passthrough'] = True
+            return False
+        payloads = self._get_payloads(context)
+        if not payloads:
+            return False
+
+        headers = flow.response.headers
+        if not is_ascii_compatible(headers.get("Content-Type", "")):
+            return False
+        decoder = make_decoder(headers.get("Content-Encoding", ""))
+        if decoder is None:
+            return False
+
+        # 압축기/주입기를 먼저 모두 만들고, 헤더는 그 다음에 변경
+        # (도중에 실패하면 원본 헤더 그대로 버퍼링 경로(response 훅)로 넘어감)
+        encoding, encoder = self.output_encoder.stream_encoder(flow) if self.output_encoder else (None, None)
+        stream = StreamingInjector(*payloads, decoder=decoder, encoder=encoder)
+
+        # 캐시 무효화 + 본문 길이/인코딩이 바뀌므로 관련 헤더 제거
+        for h in ["Cache-Control", "Expires", "ETag", "Content-Encoding", "Content-Length"]:
+            if h in headers: del headers[h]
+        # chunked 는 HTTP/1.1 전용: 업스트림이 아닌 클라이언트 쪽 연결의 HTTP 버전으로 결정
+        # (HTTP/1.0 클라이언트는 연결 종료로 본문 끝을 판단)
+        if flow.request.http_version == "HTTP/1.1":
+            headers["Transfer-Encoding"] = "chunked"
+        if encoding:
+            # 주입된 출력을 클라이언트가 지원하는 인코딩으로 다시 압축
+            self.output_encoder.set_headers(flow, encoding)
+        self.sanitizer.sanitize(flow)
+
+        flow.response.stream = stream
+        context['injected'] = True
+        context['streamed'] = True
+        self._log_injection(flow, context, "[STREAM]")
         return True
 
 class HeaderNormalizer(ProxyHandler):
@@ -150,4 +219,69 @@ class HeaderNormalizer(ProxyHandler):
             if context.get('injected'):
                 self.sanitizer.sanitize(flow)
                 
-        return True
\ No newline at end of file
+        return True
+
+class OutputEncoder(ProxyHandler):
+    """
+    [Bandwidth] 수정된(압축 해제된) 본문을 클라이언트의 Accept-Encoding 중
+    가장 적합한 인코딩(br / zstd / gzip)으로 다시 압축합니다. HeaderNormalizer 다음에 실행됩니다.
+
+    settings (config.json system_settings.proxy.compression):
+    - enabled:   재압축 여부 (기본 True)
+    - min_size:  이 크기(bytes) 미만의 본문은 압축하지 않음 (기본 1024)
+    - encodings: q 값이 같을 때의 선호 순서 (기본 br, zstd, gzip)
+    - levels:    인코딩별 압축 레벨 (예: {"gzip": 6, "br": 4, "zstd": 3})
+    """
+    def __init__(self, settings: dict = None):
+        settings = settings or {}
+        self.enabled = settings.get("enabled", True)
+        self.min_size = settings.get("min_size", 1024)
+        self.encodings = tuple(settings.get("encodings", DEFAULT_ENCODINGS))
+        self.levels = {**DEFAULT_LEVELS, **settings.get("levels", {})}
+
+    def select(self, flow: http.HTTPFlow):
+        """이 flow 에 사용할 Content-Encoding (압축하지 않으면 None)"""
+        if not self.enabled:
+            return None
+        return choose_encoding(flow.request.headers.get("Accept-Encoding", ""), self.encodings)
+
+    def stream_encoder(self, flow: http.HTTPFlow):
+        """
+        [Streaming] (encoding, 증분 압축기) 를 반환합니다. (압축하지 않으면 (None, None))
+        응답 헤더는 바꾸지 않으며, 호출한 쪽이 스트림 설정을 마친 뒤 set_headers() 로 설정합니다.
+        """
+        encoding = self.select(flow)
+        encoder = make_encoder(encoding, self.levels.get(encoding)) if encoding else None
+        if encoder is None:
+            return None, None
+        return encoding, encoder
+
+    def set_headers(self, flow: http.HTTPFlow, encoding: str):
+        headers = flow.response.headers
+        headers["Content-Encoding"] = encoding
+        vary = headers.get("Vary", "")
+        if "accept-encoding" not in vary.lower() and vary.strip() != "*":
+            headers["Vary"] = f"{vary}, Accept-Encoding" if vary else "Accept-Encoding"
+
+    def process(self, flow: http.HTTPFlow, context: dict) -> bool:
+        # 본문을 건드리지 않은 응답은 원래 인코딩 그대로 전달됨
+        if not (context.get('injected') or context.get('decoded')):
+            return True
+        if "Content-Encoding" in flow.response.headers:
+            return True
+
+        content = flow.response.raw_content
+        if not content or len(content) < self.min_size:
+            return True
+
+        encoding = self.select(flow)
+        if not encoding:
+            return True
+
+        encoded = encode_body(content, encoding, self.levels.get(encoding))
+        self.set_headers(flow, encoding)
+        # content 대신 raw_content 에 기록 (mitmproxy 가 다시 인코딩하지 않도록)
+        flow.response.raw_content = encoded
+        flow.response.headers["Content-Length"] = str(len(encoded))
+        context['encoded'] = encoding
+        return True
@@ -1,32 +1,174 @@
 # python/core/proxy_server.py
 
-from mitmproxy import http
+import time
+from mitmproxy import http, tls
 from core.plugin_loader import plugin_loader
+from core.matcher import host_matches, HostDecisionCache
 from core.proxy_pipeline import (
     ContentTypeFilter, ResourceFilter, Decoder, PluginMatcher, 
-    Injector, HeaderNormalizer
+    Injector, StreamInjector, HeaderNormalizer, OutputEncoder, has_no_body
 )
 
 class AiPlugsAddon:
-    def __init__(self, api_port: int):
+    # TLS 가로채기/통과 집계와 URL 매칭 캐시 적중률을 로그로 남기는 주기 (초)
+    # (API 서버가 별도 프로세스로 실행될 수 있으므로 proxy 프로세스의 통계는 여기서 출력)
+    STATS_INTERVAL = 300.0
+
+    def __init__(self, api_port: int, streaming: bool = False, compression: dict = None,
+                 ssl_passthrough: list = None, tls_decision_ttl: float = 300.0):
         self.api_port = api_port
+        self.streaming = streaming
+        self.ssl_passthrough = list(ssl_passthrough or [])
+        self.tls_decisions = HostDecisionCache(ttl=tls_decision_ttl)
+        self._next_stats = time.monotonic() + self.STATS_INTERVAL
+        self.output_encoder = OutputEncoder(compression)
         
         if not plugin_loader.plugins:
             plugin_loader.load_plugins()
             
         # 파이프라인 조립
+        # [Early Exit] URL 매칭을 본문 작업(압축 해제/주입)보다 먼저 수행
         self.pipeline = [
             ContentTypeFilter(),
             ResourceFilter(),
-            Decoder(),
             PluginMatcher(),
+            Decoder(),
             Injector(self.api_port),
-            HeaderNormalizer()
+            HeaderNormalizer(),
+            self.output_encoder
         ]
+
+        # 요청 단계에서 판단 가능한 단계 (Sec-Fetch-* 헤더 + URL 매칭)
+        self.request_pipeline = [
+            ResourceFilter(),
+            PluginMatcher()
+        ]
+
+        # 헤더만 보고 판단 가능한 단계 (본문 버퍼링 전)
+        self.match_pipeline = [
+            ContentTypeFilter(),
+            ResourceFilter(),
+            PluginMatcher()
+        ]
+
+        # [Streaming] 매칭 후 곧바로 청크 단위 주입까지 설정
+        self.stream_pipeline = self.match_pipeline + [StreamInjector(self.api_port, self.output_encoder)]
         
-        print(f"[Proxy] AiPlugs Core initialized with Pipeline. API Port: {self.api_port}")
+        mode = "Streaming" if self.streaming else "Buffered"
+        print(f"[Proxy] AiPlugs Core initialized with Pipeline ({mode}). API Port: {self.api_port}")
+
+    def tls_clienthello(self, data: tls.ClientHelloData):
+        """
+        TLS 핸드셰이크 시작 시 호출됨. 주입 대상이 될 수 없는 호스트는 가로채지 않고
+        암호화된 그대로 전달하여 인증서 생성/복호화/재암호화 비용을 없앱니다.
+        - config 의 ssl_passthrough 패턴에 해당하는 호스트 (은행, 관공서 등)
+        - 어떤 플러그인의 content_scripts.matches 로도 매칭될 수 없는 호스트
+        """
+        host = data.client_hello.sni
+        if not host and data.context.server.address:
+            host = data.context.server.address[0]
+        if not host:
+            return # 판단 불가 -> 기존대로 가로챔
+
+        try:
+            intercept = self.should_intercept(host.lower().rstrip('.'))
+        except Exception as e:
+            print(f"[Proxy] TLS Passthrough Check Error for {host}: {e}")
+            return
+
+        self.tls_decisions.record(intercept)
+        if not intercept:
+            data.ignore_connection = True
+        self.log_stats()
+
+    def log_stats(self, force: bool = False):
+        """
+        STATS_INTERVAL 마다 TLS 가로채기/통과 비율 (+ 결정 캐시 적중률) 과
+        PluginMatcher 가 사용하는 URL 매칭 캐시 적중률을 출력합니다.
+        """
+        now = time.monotonic()
+        if not force and now < self._next_stats:
+            return
+        self._next_stats = now + self.STATS_INTERVAL
+
+        stats = self.tls_decisions.stats()
+        if stats["intercepted"] or stats["passed_through"]:
+            print(f"[Proxy] TLS: {stats['intercepted']} intercepted, {stats['passed_through']} passed through "
+                  f"({stats['passthrough_ratio']:.1%} passthrough, decision cache hit rate {stats['hit_rate']:.1%})")
+
+        stats = plugin_loader.match_cache.stats()
+        if stats["hits"] or stats["misses"]:
+            print(f"[Proxy] Match cache: {stats['hits']} hits, {stats['misses']} misses "
+                  f"({stats['hit_rate']:.1%} hit rate, {stats['size']}/{stats['maxsize']} entries)")
+
+    def done(self):
+        """mitmproxy 종료 시 호출됨 (마지막 집계 출력)"""
+        self.log_stats(force=True)
+
+    def should_intercept(self, host: str) -> bool:
+        """호스트 단위 가로채기 여부 (호스트별 캐시, 플러그인 재로드 시 무효화)"""
+        generation = plugin_loader.generation
+        intercept = self.tls_decisions.get(host, generation)
+        if intercept is None:
+            intercept = (not host_matches(host, self.ssl_passthrough)
+                         and plugin_loader.could_match_host(host))
+            self.tls_decisions.put(host, generation, intercept)
+        return intercept
+
+    def request(self, flow: http.HTTPFlow):
+        """
+        요청 수신 직후 호출됨. 이미지/XHR/미디어 등 주입 후보가 아닌 flow 를 미리 표시하여
+        응답이 도착하면 파이프라인 없이 곧바로 스트리밍으로 통과시킵니다.
+        """
+        self.log_stats()
+        context = {}
+        try:
+            for handler in self.request_pipeline:
+                if not handler.process(flow, context):
+                    flow.metadata['aiplugs'] = {'passthrough': True}
+                    return
+        except Exception as e:
+            # 판단할 수 없으면 후보로 간주 (응답 단계에서 다시 검사)
+            print(f"[Proxy] Request Classification Error for {flow.request.url}: {e}")
+
+    def responseheaders(self, flow: http.HTTPFlow):
+        """
+        응답 헤더 수신 직후 호출됨. 주입 대상이 아닌 응답은 (모드와 관계없이)
+        압축된 상태 그대로 버퍼링 없이 흘려보내고, 스트리밍 모드에서는 여기서 주입까지 설정합니다.
+        """
+        state = flow.metadata.get('aiplugs')
+        if isinstance(state, dict) and state.get('passthrough'):
+            flow.response.stream = True # 요청 단계에서 후보가 아님이 확정됨
+            return
+        if has_no_body(flow):
+            # 304 / 204 / HEAD 등은 (스트리밍/버퍼링 모두) 헤더와 빈 본문을 그대로 전달
+            flow.response.stream = True
+            flow.metadata['aiplugs'] = {'passthrough': True}
+            return
+
+        pipeline = self.stream_pipeline if self.streaming else self.match_pipeline
+
+        context = {}
+        try:
+            for handler in pipeline:
+                if not handler.process(flow, context):
+                    break
+        except Exception as e:
+            print(f"[Proxy] Stream Setup Error for {flow.request.url}: {e}")
+            return
+
+        if context.get('streamed'):
+            flow.metadata['aiplugs'] = context
+        elif context.get('passthrough') or not context.get('matched_blocks'):
+            flow.response.stream = True
+            flow.metadata['aiplugs'] = {'passthrough': True}
+        # 매칭됨 (버퍼링 모드 또는 스트리밍 불가) -> response 훅에서 버퍼링 처리
 
     def response(self, flow: http.HTTPFlow):
+        state = flow.metadata.get('aiplugs')
+        if isinstance(state, dict) and (state.get('streamed') or state.get('passthrough')):
+            return # 이미 스트리밍으로 주입 완료, 또는 원본 그대로 통과
+
         context = {}
         try:
             for handler in self.pipeline:
@@ -34,4 +176,4 @@ class AiPlugsAddon:
                 if not should_continue:
                     break
         except Exception as e:
-            print(f"[Proxy] Pipeline Error processing {flow.request.url}: {e}")
\ No newline at end of file
+            print(f"[Proxy] Pipeline Error processing {flow.request.url}: {e}")
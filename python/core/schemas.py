@@ -5,6 +5,18 @@ from pydantic import BaseModel, Field
 # [Plugin Manifest Schemas]
 # -------------------------------------------------------------------------
 
+class ModelInput(BaseModel):
+    """모델 입력 이미지 크기 (grayscale)"""
+    width: int
+    height: int
+
+class ModelRuntime(BaseModel):
+    """AI Engine 실행 옵션"""
+    variant: Literal["fp32", "fused", "int8"] = "fp32"
+    torchscript: bool = True
+    min_agreement: Optional[float] = None  # variant 정확도 검사 기준 (None: 엔진 기본값)
+    workers: Optional[int] = None          # 전용 워커 풀 크기 (None: 공용 풀)
+
 class ModelRequirement(BaseModel):
     """플러그인 실행에 필요한 AI 모델 정의"""
     key: str              # 환경변수 키 (예: "YOLO_MODEL")
@@ -12,6 +24,10 @@ class ModelRequirement(BaseModel):
     source_url: Optional[str] = None
     sha256: Optional[str] = None
     description: Optional[str] = None
+    # [AI Engine] execution_type "none" 플러그인이 AI Engine 으로 추론할 때 사용
+    architecture: str = "crnn"
+    input: Optional[ModelInput] = None
+    runtime: ModelRuntime = Field(default_factory=ModelRuntime)
 
 class InferenceConfig(BaseModel):
     """추론 설정 (로컬/웹/SOA 분기)"""
@@ -102,6 +102,54 @@ def mock_mitmproxy_flow():
     return flow
 
 
+@pytest.fixture
+def create_flow():
+    """
+    Build a real mitmproxy test flow (mitmproxy.test.tflow), a top-level navigation by default.
+    - dest / mode: Sec-Fetch-Dest / Sec-Fetch-Mode request headers
+    - accept_encoding: Accept-Encoding request header (omitted when None)
+    - response: attach a response (False for request-phase tests)
+    - content: response body (Content-Length is set to match)
+    - response_headers: http.Headers keyword arguments (default content_type="text/html")
+    """
+    def _create(url="https://example.com/page", dest="document", mode="navigate",
+                accept_encoding=None, response=True, content=None, **response_headers):
+        from mitmproxy.test import tflow
+        from mitmproxy import http
+
+        flow = tflow.tflow(resp=response)
+        flow.request.url = url
+        flow.request.headers = http.Headers(sec_fetch_dest=dest, sec_fetch_mode=mode)
+        if accept_encoding is not None:
+            flow.request.headers["Accept-Encoding"] = accept_encoding
+        if response:
+            flow.response.headers = http.Headers(**{"content_type": "text/html", **response_headers})
+            if content is not None:
+                flow.response.content = content
+                flow.response.headers["Content-Length"] = str(len(content))
+        return flow
+
+    return _create
+
+
+@pytest.fixture
+def create_plugin_context():
+    """
+    Build a minimal plugin context stub for matcher / certificate tests.
+    - blocks: one (matches, js) tuple per content script block
+    - host_permissions: manifest host_permissions patterns
+    """
+    def _create(*blocks, host_permissions=()):
+        ctx = MagicMock()
+        ctx.manifest.content_scripts = [
+            MagicMock(matches=list(matches), js=list(js)) for matches, js in blocks
+        ]
+        ctx.manifest.host_permissions = list(host_permissions)
+        return ctx
+
+    return _create
+
+
 @pytest.fixture
 def temp_config_dir(tmp_path):
     """Create a temporary config directory."""
@@ -137,3 +185,32 @@ def sample_config():
             }
         }
     }
+
+
+@pytest.fixture
+def mock_process_pool():
+    """Replace ProcessPoolExecutor for the whole test so no worker process is spawned."""
+    with patch('concurrent.futures.ProcessPoolExecutor') as mock_executor:
+        yield mock_executor
+
+
+@pytest.fixture
+def create_ai_engine(mock_process_pool):
+    """
+    Build an AIEngine without worker processes.
+    - settings: the ai_engine section of system_settings (default {"workers": 1})
+    - models: {model_id: spec} returned by resolve_model (unknown ids raise KeyError);
+      the cached lookup (_cached_spec) reports a miss so requests go through resolve_model.
+      None keeps the real registry lookup
+    """
+    def _create(settings=None, models=None):
+        from core.ai_engine import AIEngine
+
+        with patch('core.ai_engine.load_system_settings', return_value={"ai_engine": settings or {"workers": 1}}):
+            engine = AIEngine()
+        if models is not None:
+            engine.resolve_model = MagicMock(side_effect=lambda model_id: models[model_id])
+            engine._cached_spec = MagicMock(return_value=None)
+        return engine
+
+    return _create
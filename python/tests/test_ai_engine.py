@@ -4,32 +4,36 @@ Note: These tests use mocking extensively since actual PyTorch inference require
 """
 import pytest
 import os
-from unittest.mock import patch, MagicMock
+import sys
+from unittest.mock import patch, MagicMock, ANY
 
 
-class TestAIEngineConfiguration:
-    """Tests for AI Engine configuration constants."""
+def _worker_state():
+    """spawn 워커에서 실행: (pid, 워커에 AIEngine 싱글톤이 만들어졌는지)"""
+    from core import ai_engine
+    return os.getpid(), ai_engine._ai_engine is not None
 
-    def test_supported_models_defined(self):
-        from core.ai_engine import SUPPORTED_MODELS
 
-        assert "MODEL_MELON" in SUPPORTED_MODELS
-        assert "MODEL_NOL" in SUPPORTED_MODELS
+def _spec(key="MODEL_MELON", **overrides):
+    """ModelRegistry.get() 이 반환하는 형태의 spec"""
+    spec = {
+        "key": key, "filename": "model_melon.pt", "path": "/models/model_melon.pt",
+        "architecture": "crnn", "width": 230, "height": 70,
+        "runtime": "fp32", "torchscript": True, "min_agreement": None, "workers": None,
+        "expected_sha256": None, "sha256": "0" * 64,
+    }
+    spec.update(overrides)
+    return spec
 
-    def test_model_melon_config(self):
-        from core.ai_engine import SUPPORTED_MODELS
 
-        melon = SUPPORTED_MODELS["MODEL_MELON"]
-        assert melon["width"] == 230
-        assert melon["height"] == 70
-        assert melon["filename"] == "model_melon.pt"
+@pytest.fixture
+def engine(create_ai_engine):
+    """MODEL_MELON 하나만 resolve 되는, 워커 프로세스 없는 AIEngine"""
+    return create_ai_engine(models={"MODEL_MELON": _spec()})
 
-    def test_model_nol_config(self):
-        from core.ai_engine import SUPPORTED_MODELS
 
-        nol = SUPPORTED_MODELS["MODEL_NOL"]
-        assert nol["width"] == 210
-        assert nol["height"] == 70
+class TestAIEngineConfiguration:
+    """Tests for AI Engine configuration constants."""
 
     def test_alphabet_configuration(self):
         from core.ai_engine import ALPHABETS, NUM_CLASSES, BLANK_LABEL
@@ -49,73 +53,1017 @@ class TestAIEngineConfiguration:
 class TestAIEngineInitialization:
     """Tests for AIEngine class initialization."""
 
-    @patch('concurrent.futures.ProcessPoolExecutor')
-    def test_engine_initialization(self, mock_executor):
-        from core.ai_engine import AIEngine
+    def test_engine_initialization(self, create_ai_engine, mock_process_pool):
+        from core.ai_engine import _init_worker, DEFAULT_POOL
+
+        engine = create_ai_engine({"workers": 1})
+
+        assert engine.pools[DEFAULT_POOL].executor is not None
+        assert engine.num_workers == 1
+        mock_process_pool.assert_called_once_with(
+            max_workers=1, mp_context=ANY, initializer=_init_worker, initargs=(engine.threads_per_worker, ())
+        )
+        assert mock_process_pool.call_args.kwargs["mp_context"].get_start_method() == "spawn"
+
+    @patch('core.ai_engine.resolve_worker_count', return_value=2)
+    @patch('core.ai_engine.os.cpu_count', return_value=8)
+    def test_engine_auto_workers_split_threads(self, mock_cpu, mock_resolve, create_ai_engine, mock_process_pool):
+        with patch.dict(os.environ, {"OMP_NUM_THREADS": "1", "MKL_NUM_THREADS": "1"}):
+            engine = create_ai_engine({"workers": "auto"})
+            # 스레드 수는 initializer 인자로만 전달 (플러그인 서브프로세스가 상속하지 않도록)
+            assert os.environ["OMP_NUM_THREADS"] == os.environ["MKL_NUM_THREADS"] == "1"
+
+        assert engine.num_workers == 2
+        assert engine.threads_per_worker == 4
+        assert mock_process_pool.call_args.kwargs["max_workers"] == 2
+        assert mock_process_pool.call_args.kwargs["initargs"][0] == 4
+
+    @patch('core.ai_engine.os.cpu_count', return_value=8)
+    def test_auto_workers_resized_when_models_registered(self, mock_cpu, create_ai_engine):
+        from core.ai_engine import DEFAULT_POOL, WORKER_BASE_MEMORY
+
+        gb = 1024 ** 3
+        memory = MagicMock()
+        memory.virtual_memory.return_value.available = 8 * gb
+        with patch('core.ai_engine.psutil', memory), patch.dict(os.environ), \
+             patch('core.ai_engine.estimate_model_footprint', return_value=WORKER_BASE_MEMORY) as mock_estimate:
+            engine = create_ai_engine({"workers": "auto"})
+            assert engine.num_workers == 8
+
+            # 플러그인 로드 후 (generation 변경) 모델 크기 추정치로 다시 계산
+            engine.registry = MagicMock()
+            engine.registry.sync.return_value = True
+            engine.registry.keys.return_value = ["MODEL_A", "MODEL_B"]
+            engine.registry.get.side_effect = lambda key: _spec(key, workers=2 if key == "MODEL_B" else None)
+            mock_estimate.return_value = 2 * gb
+            engine.refresh_models()
 
-        engine = AIEngine()
+            assert mock_estimate.call_args.args[0] == [_spec("MODEL_A")]
+            assert engine.num_workers == engine.pools[DEFAULT_POOL].num_workers == 2
+            assert engine.threads_per_worker == 4
 
-        assert engine.executor is not None
-        mock_executor.assert_called_once_with(max_workers=1)
+            # 모델 목록이 그대로면 다시 계산하지 않음
+            calls = mock_estimate.call_count
+            engine.registry.sync.return_value = False
+            engine.refresh_models()
+            assert mock_estimate.call_count == calls
 
-    @patch('concurrent.futures.ProcessPoolExecutor')
-    def test_engine_sets_model_dir(self, mock_executor):
-        from core.ai_engine import AIEngine
+    @patch('core.ai_engine.os.cpu_count', return_value=8)
+    def test_resize_leaves_parent_environment(self, mock_cpu, create_ai_engine, mock_process_pool):
+        from core.ai_engine import DEFAULT_POOL
 
-        engine = AIEngine()
+        gb = 1024 ** 3
+        memory = MagicMock()
+        memory.virtual_memory.return_value.available = 8 * gb
+        env = {"OMP_NUM_THREADS": "1", "MKL_NUM_THREADS": "1"}
+        with patch('core.ai_engine.psutil', memory), patch.dict(os.environ, env):
+            engine = create_ai_engine({"workers": "auto"})
+            before = dict(os.environ)
+
+            assert engine._resize_default_pool(4 * gb) == {engine.pools[DEFAULT_POOL]}
+            assert engine.threads_per_worker == 8
+
+            # worker_manager.spawn_worker 가 띄우는 플러그인 프로세스는 계속 1 스레드를 상속
+            assert dict(os.environ) == before
+        assert mock_process_pool.call_args.kwargs["initargs"][0] == 8
+
+    def test_explicit_workers_not_resized(self, create_ai_engine, mock_process_pool):
+        engine = create_ai_engine({"workers": 3})
+        engine.registry = MagicMock()
+        engine.registry.sync.return_value = True
+        engine.registry.keys.return_value = ["MODEL_A"]
+        engine.registry.get.return_value = _spec()
+        engine.refresh_models()
+
+        assert engine.num_workers == 3
+        assert mock_process_pool.call_count == 1
+
+    def test_engine_sets_model_dir(self, create_ai_engine):
+        engine = create_ai_engine()
 
         assert hasattr(engine, 'MODEL_DIR')
         assert 'models' in engine.MODEL_DIR
 
 
+class TestWorkerSizing:
+    """Tests for worker count / thread sizing helpers."""
+
+    def test_explicit_worker_count(self):
+        from core.ai_engine import resolve_worker_count
+
+        assert resolve_worker_count(3, footprint=0) == 3
+        assert resolve_worker_count("2", footprint=0) == 2
+        assert resolve_worker_count(0, footprint=0) == 1
+
+    def test_auto_limited_by_memory(self):
+        from core.ai_engine import resolve_worker_count
+
+        gb = 1024 ** 3
+        # 4GB 중 절반(2GB) / 워커당 1GB -> 2개
+        assert resolve_worker_count("auto", footprint=gb, cpu_count=8, available_memory=4 * gb) == 2
+
+    def test_auto_limited_by_cores(self):
+        from core.ai_engine import resolve_worker_count
+
+        gb = 1024 ** 3
+        assert resolve_worker_count("auto", footprint=gb // 2, cpu_count=2, available_memory=64 * gb) == 2
+
+    def test_auto_at_least_one(self):
+        from core.ai_engine import resolve_worker_count
+
+        gb = 1024 ** 3
+        assert resolve_worker_count(None, footprint=8 * gb, cpu_count=4, available_memory=gb) == 1
+
+    def test_invalid_setting_falls_back_to_auto(self):
+        from core.ai_engine import resolve_worker_count
+
+        gb = 1024 ** 3
+        assert resolve_worker_count("many", footprint=gb, cpu_count=2, available_memory=64 * gb) == 2
+
+    def test_threads_per_worker(self):
+        from core.ai_engine import threads_per_worker
+
+        assert threads_per_worker(2, cpu_count=8) == 4
+        assert threads_per_worker(3, cpu_count=8) == 2
+        assert threads_per_worker(16, cpu_count=8) == 1
+
+    def test_footprint_uses_model_file_size(self, tmp_path):
+        from core.ai_engine import estimate_model_footprint, WORKER_BASE_MEMORY
+
+        specs = []
+        for key in ("MODEL_A", "MODEL_B"):
+            (tmp_path / f"{key}.pt").write_bytes(b"x" * 1000)
+            specs.append(_spec(key, path=str(tmp_path / f"{key}.pt")))
+
+        assert estimate_model_footprint(specs) == WORKER_BASE_MEMORY + 2000 * len(specs)
+
+    def test_footprint_measures_architecture_without_files(self, tmp_path):
+        pytest.importorskip("torch")
+        from core.ai_engine import estimate_model_footprint, WORKER_BASE_MEMORY
+
+        assert estimate_model_footprint([_spec(path=str(tmp_path / "missing.pt"))]) > WORKER_BASE_MEMORY
+        assert estimate_model_footprint([]) == WORKER_BASE_MEMORY
+
+    def test_init_worker_sets_threads(self):
+        torch = pytest.importorskip("torch")
+        from core.ai_engine import _init_worker
+
+        before = torch.get_num_threads()
+        try:
+            with patch.dict(os.environ, {"OMP_NUM_THREADS": "1"}):
+                _init_worker(2)
+                assert os.environ["OMP_NUM_THREADS"] == "1"
+            assert torch.get_num_threads() == 2
+        finally:
+            torch.set_num_threads(before)
+
+
 class TestAIEngineProcessRequest:
     """Tests for AIEngine.process_request method."""
 
-    @patch('concurrent.futures.ProcessPoolExecutor')
-    def test_process_request_no_image(self, mock_executor):
-        from core.ai_engine import AIEngine
-
-        engine = AIEngine()
+    def test_process_request_no_image(self, engine):
         result = engine.process_request("MODEL_MELON", {})
 
         assert result["status"] == "error"
         assert "No image data" in result["message"]
 
-    @patch('concurrent.futures.ProcessPoolExecutor')
-    def test_process_request_with_image(self, mock_executor):
-        from core.ai_engine import AIEngine
+    def test_process_request_with_image(self, engine, mock_process_pool):
+        import concurrent.futures
 
-        # Mock the executor and future
-        mock_future = MagicMock()
-        mock_future.result.return_value = {
+        # Mock the executor and (batch) future
+        mock_future = concurrent.futures.Future()
+        mock_future.set_result(([{
             "status": "success",
             "predicted_text": "ABCD",
             "confidence": 0.95
-        }
-        mock_executor_instance = MagicMock()
-        mock_executor_instance.submit.return_value = mock_future
-        mock_executor.return_value = mock_executor_instance
+        }], False))
+        mock_process_pool.return_value.submit.return_value = mock_future
 
-        engine = AIEngine()
         result = engine.process_request("MODEL_MELON", {"image": "base64data"})
 
         assert result["status"] == "success"
-        mock_executor_instance.submit.assert_called_once()
+        mock_process_pool.return_value.submit.assert_called_once()
+        assert mock_process_pool.return_value.submit.call_args.args[1] == _spec()
 
-    @patch('concurrent.futures.ProcessPoolExecutor')
-    def test_process_request_handles_exception(self, mock_executor):
-        from core.ai_engine import AIEngine
+    def test_process_request_handles_exception(self, engine, mock_process_pool):
+        import concurrent.futures
 
-        mock_future = MagicMock()
-        mock_future.result.side_effect = Exception("Process failed")
-        mock_executor_instance = MagicMock()
-        mock_executor_instance.submit.return_value = mock_future
-        mock_executor.return_value = mock_executor_instance
+        mock_future = concurrent.futures.Future()
+        mock_future.set_exception(Exception("Process failed"))
+        mock_process_pool.return_value.submit.return_value = mock_future
 
-        engine = AIEngine()
         result = engine.process_request("MODEL_MELON", {"image": "base64data"})
 
+        assert result == {"status": "error", "message": "Process failed"}
+
+    def test_process_request_unknown_model_fails_fast(self, create_ai_engine):
+        engine = create_ai_engine()
+        engine.batcher = MagicMock()
+        result = engine.process_request("MODEL_UNKNOWN", {"image": "base64data"})
+
+        assert result == {"status": "error", "message": "Unknown model: MODEL_UNKNOWN"}
+        engine.batcher.submit.assert_not_called()
+
+    def test_process_request_delegates_to_infer(self, engine):
+        from unittest.mock import AsyncMock
+
+        engine.infer = AsyncMock(return_value={"status": "success"})
+
+        result = engine.process_request("MODEL_MELON", {"image": "x"}, timeout=2)
+
+        assert result == {"status": "success"}
+        engine.infer.assert_awaited_once_with("MODEL_MELON", {"image": "x"}, 2)
+
+
+class TestAIEngineInfer:
+    """Tests for the async AIEngine.infer entry point."""
+
+    @pytest.fixture
+    def engine(self, create_ai_engine):
+        engine = create_ai_engine({"workers": 1, "request_timeout": 30}, models={"MODEL_MELON": _spec()})
+        engine.batcher = MagicMock()
+        return engine
+
+    @pytest.mark.asyncio
+    async def test_infer_returns_result(self, engine):
+        import concurrent.futures
+
+        def submit(spec, image):
+            future = concurrent.futures.Future()
+            future.set_result({"status": "success", "predicted_text": "AB"})
+            return future
+
+        engine.batcher.submit.side_effect = submit
+        result = await engine.infer("MODEL_MELON", {"image": "data"})
+
+        assert result["predicted_text"] == "AB"
+
+    @pytest.mark.asyncio
+    async def test_infer_submits_resolved_spec_off_loop(self, engine):
+        import concurrent.futures
+        import threading
+
+        threads = []
+        future = concurrent.futures.Future()
+        future.set_result({"status": "success"})
+        engine.batcher.submit.side_effect = lambda *a: future
+        engine.resolve_model.side_effect = lambda model_id: threads.append(threading.current_thread()) or _spec()
+
+        await engine.infer("MODEL_MELON", {"image": "data"})
+
+        assert threads and threads[0] is not threading.main_thread()
+        engine.resolve_model.assert_called_once_with("MODEL_MELON")
+        engine.batcher.submit.assert_called_once_with(_spec(), "data")
+
+    @pytest.mark.asyncio
+    async def test_infer_uses_cached_spec_inline(self, engine):
+        import concurrent.futures
+
+        future = concurrent.futures.Future()
+        future.set_result({"status": "success"})
+        engine.batcher.submit.side_effect = lambda *a: future
+        engine._cached_spec.return_value = _spec()
+
+        await engine.infer("MODEL_MELON", {"image": "data"})
+
+        engine.resolve_model.assert_not_called()
+        engine.batcher.submit.assert_called_once_with(_spec(), "data")
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_sync_registry_once(self, engine):
+        import asyncio
+        import time
+        import concurrent.futures
+
+        synced = []
+        future = concurrent.futures.Future()
+        future.set_result({"status": "success"})
+        engine.batcher.submit.side_effect = lambda *a: future
+        engine._cached_spec.side_effect = lambda model_id: _spec() if synced else None
+        engine.resolve_model.side_effect = lambda model_id: time.sleep(0.05) or synced.append(model_id) or _spec()
+
+        results = await asyncio.gather(*(engine.infer("MODEL_MELON", {"image": "data"}) for _ in range(5)))
+
+        assert all(result["status"] == "success" for result in results)
+        engine.resolve_model.assert_called_once_with("MODEL_MELON")
+
+    def test_sync_lock_recreated_per_event_loop(self, engine):
+        import concurrent.futures
+
+        future = concurrent.futures.Future()
+        future.set_result({"status": "success"})
+        engine.batcher.submit.side_effect = lambda *a: future
+
+        assert engine.process_request("MODEL_MELON", {"image": "data"})["status"] == "success"
+        assert engine.process_request("MODEL_MELON", {"image": "data"})["status"] == "success"
+
+    @pytest.mark.asyncio
+    async def test_infer_no_image(self, engine):
+        result = await engine.infer("MODEL_MELON", {})
+
         assert result["status"] == "error"
+        engine.batcher.submit.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_infer_timeout_cancels_pending_request(self, engine):
+        import concurrent.futures
+
+        pending = concurrent.futures.Future()
+        engine.batcher.submit.side_effect = lambda *a: pending
+        result = await engine.infer("MODEL_MELON", {"image": "data"}, timeout=0.05)
+
+        assert result["status"] == "error"
+        assert "Timeout" in result["message"]
+        assert pending.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_infer_caller_cancellation_propagates(self, engine):
+        import asyncio
+        import concurrent.futures
+
+        pending = concurrent.futures.Future()
+        engine.batcher.submit.side_effect = lambda *a: pending
+        task = asyncio.ensure_future(engine.infer("MODEL_MELON", {"image": "data"}))
+        await asyncio.sleep(0.01)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert pending.cancelled()
+
+    @pytest.mark.asyncio
+    async def test_infer_worker_error(self, engine):
+        import concurrent.futures
+
+        def submit(spec, image):
+            future = concurrent.futures.Future()
+            future.set_exception(RuntimeError("worker died"))
+            return future
+
+        engine.batcher.submit.side_effect = submit
+        result = await engine.infer("MODEL_MELON", {"image": "data"})
+
+        assert result["status"] == "error"
+        assert "worker died" in result["message"]
+
+    @pytest.mark.asyncio
+    async def test_infer_unverified_model_fails_fast(self, engine):
+        engine.resolve_model.side_effect = ValueError("sha256 mismatch for MODEL_MELON")
+
+        result = await engine.infer("MODEL_MELON", {"image": "data"})
+
+        assert result == {"status": "error", "message": "sha256 mismatch for MODEL_MELON"}
+        engine.batcher.submit.assert_not_called()
+
+    def test_request_timeout_is_upper_bound(self, engine):
+        assert engine._resolve_timeout(None) == 30.0
+        assert engine._resolve_timeout(5) == 5.0
+        assert engine._resolve_timeout(600) == 30.0
+        assert engine._resolve_timeout("bad") == 30.0
+
+    @pytest.mark.parametrize("timeout", [0, -1, float("nan"), float("inf"), "nan"])
+    def test_invalid_timeout_uses_request_timeout(self, engine, timeout):
+        assert engine._resolve_timeout(timeout) == 30.0
+
+
+class TestWarmup:
+    """Tests for model preload / warm-up."""
+
+    def _plugins(self, *keys):
+        ctx = MagicMock()
+        ctx.manifest.inference.models = [MagicMock(key=key) for key in keys]
+        return {"p1": ctx}
+
+    def test_collect_from_manifests(self):
+        from core.ai_engine import collect_preload_models
+
+        plugins = self._plugins("MODEL_MELON", "MODEL_MELON", "YOLO_MODEL")
+
+        assert collect_preload_models(plugins) == ["MODEL_MELON", "YOLO_MODEL"]
+        assert collect_preload_models(plugins, registry={"MODEL_MELON"}) == ["MODEL_MELON"]
+
+    def test_collect_explicit_list_and_disabled(self):
+        from core.ai_engine import collect_preload_models
+
+        plugins = self._plugins("MODEL_MELON")
+
+        assert collect_preload_models(plugins, ["MODEL_NOL"]) == ["MODEL_NOL"]
+        assert collect_preload_models(plugins, False) == []
+
+    def test_warmup_task_runs_dummy_forward(self, tmp_path):
+        pytest.importorskip("torch")
+        from core import ai_engine
+
+        model = MagicMock()
+        with patch('core.ai_engine._load_model_in_worker', return_value=model), \
+             patch('core.ai_engine._worker_rss', return_value=123):
+            result = ai_engine._warmup_task([_spec(width=210)])
+
+        assert result == {"models": {"MODEL_MELON": "ready"}, "pid": os.getpid(), "rss": 123}
+        assert model.call_args.args[0].shape == (1, 1, 70, 210)
+
+    def test_warmup_task_reports_missing_model(self, tmp_path):
+        from core import ai_engine
+
+        with patch('core.ai_engine._load_model_in_worker', side_effect=FileNotFoundError("missing")):
+            result = ai_engine._warmup_task([_spec()])
+
+        assert result["models"]["MODEL_MELON"].startswith("error")
+
+    def _pool(self, engine, results, rss=0, pool=None):
+        """풀(기본: 공용 풀)의 warm-up 작업이 results 순서대로 {"models": result} 를 반환하도록 구성"""
+        import concurrent.futures
+        from core.ai_engine import DEFAULT_POOL
+
+        pool = pool or engine.pools[DEFAULT_POOL]
+        pool.num_workers = len(results)
+        futures = []
+        for pid, result in enumerate(results):
+            future = concurrent.futures.Future()
+            future.set_result({"models": result, "pid": pid, "rss": rss})
+            futures.append(future)
+        pool.executor = MagicMock()
+        pool.executor.submit.side_effect = futures
+        pool._create_executor = MagicMock(return_value=pool.executor)
+        return pool
+
+    @pytest.mark.asyncio
+    async def test_warmup_submits_one_task_per_worker(self, engine):
+        pool = self._pool(engine, [{"MODEL_MELON": "ready"}, {"MODEL_MELON": "ready"}])
+        assert engine.is_ready is True
+
+        status = await engine.warmup(["MODEL_MELON"])
+
+        assert pool.executor.submit.call_count == 2
+        assert status == {"state": "ready", "models": {"MODEL_MELON": "ready"}}
+        assert engine.is_ready is True
+
+    @pytest.mark.asyncio
+    async def test_warmup_resolves_models_off_event_loop(self, engine):
+        import asyncio
+
+        self._pool(engine, [{"MODEL_MELON": "ready"}, {"MODEL_MELON": "ready"}])
+        loops = []
+
+        def resolve(model_id):
+            # registry 동기화 + sha256 계산은 executor 스레드에서 실행되어야 함 (실행 중인 루프 없음)
+            try:
+                loops.append(asyncio.get_running_loop())
+            except RuntimeError:
+                loops.append(None)
+            return _spec(model_id)
+
+        engine.resolve_model = MagicMock(side_effect=resolve)
+
+        status = await engine.warmup(["MODEL_MELON"])
+
+        assert loops == [None]
+        assert status["state"] == "ready"
+
+    @pytest.mark.asyncio
+    async def test_warmup_failure_marks_not_ready(self, engine):
+        self._pool(engine, [{"MODEL_MELON": "ready"}, {"MODEL_MELON": "error: missing"}])
+
+        status = await engine.warmup(["MODEL_MELON"])
+
+        assert status["state"] == "failed"
+        assert status["models"]["MODEL_MELON"] == "error: missing"
+        assert engine.is_ready is False
+
+    @pytest.mark.asyncio
+    async def test_warmup_resizes_auto_pool_from_measured_rss(self, engine):
+        gb = 1024 ** 3
+        pool = self._pool(engine, [{"MODEL_MELON": "ready"}] * 3, rss=int(1.5 * gb))
+        engine.auto_workers = True
+        pool.num_workers, pool.num_threads = 2, 4  # 세 번째 결과는 크기 조정 후 warm-up 용
+
+        memory = MagicMock()
+        memory.virtual_memory.return_value.available = gb
+        with patch('core.ai_engine.psutil', memory), patch('core.ai_engine.os.cpu_count', return_value=8):
+            status = await engine.warmup(["MODEL_MELON"])
+
+        # (1GB 가용 + 워커 2개 x 1.5GB 사용 중) x 0.5 / 1.5GB -> 워커 1개로 줄이고 다시 warm-up
+        assert pool.num_workers == engine.num_workers == 1
+        assert pool.num_threads == engine.threads_per_worker == 8
+        assert pool.executor.submit.call_count == 3
+        assert status["state"] == "ready"
+
+    @pytest.mark.asyncio
+    async def test_warmup_rewarms_recycled_dedicated_pools(self, create_ai_engine):
+        gb = 1024 ** 3
+        engine = create_ai_engine(models={"MODEL_MELON": _spec(), "MODEL_NOL": _spec("MODEL_NOL", workers=1)})
+        dedicated = self._pool(
+            engine, [{"MODEL_NOL": "ready"}] * 2, pool=engine.pool_for(_spec("MODEL_NOL", workers=1))
+        )
+        pool = self._pool(engine, [{"MODEL_MELON": "ready"}] * 3, rss=int(1.5 * gb))
+        engine.auto_workers = True
+        # 세 번째 / 두 번째 결과는 크기 조정 후 다시 warm-up 할 때 사용
+        pool.num_workers, pool.num_threads = 2, 4
+        dedicated.num_workers, dedicated.num_threads = 1, 2
+
+        memory = MagicMock()
+        memory.virtual_memory.return_value.available = gb
+        with patch('core.ai_engine.psutil', memory), patch('core.ai_engine.os.cpu_count', return_value=8):
+            status = await engine.warmup(["MODEL_MELON", "MODEL_NOL"])
+
+        # 공용 풀 크기 조정으로 스레드 수가 바뀐 전용 풀도 교체되었으므로 다시 warm-up 되어야 함
+        assert pool.num_workers == 1
+        assert dedicated.num_threads == pool.num_threads == 4
+        assert dedicated.executor.submit.call_count == 2
+        assert pool.executor.submit.call_count == 3
+        assert status["state"] == "ready"
+
+    @pytest.mark.asyncio
+    async def test_warmup_keeps_explicit_worker_count(self, engine):
+        pool = self._pool(engine, [{"MODEL_MELON": "ready"}] * 2, rss=8 * 1024 ** 3)
+        engine.auto_workers = False
+
+        await engine.warmup(["MODEL_MELON"])
+
+        assert pool.num_workers == 2
+        assert pool.executor.submit.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_warmup_unknown_model_fails_without_submitting(self, engine):
+        pool = self._pool(engine, [])
+
+        status = await engine.warmup(["MODEL_UNKNOWN"])
+
+        assert status["models"]["MODEL_UNKNOWN"].startswith("error")
+        assert status["state"] == "failed"
+        pool.executor.submit.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_warmup_without_models_is_noop(self, engine):
+        pool = self._pool(engine, [])
+
+        await engine.warmup([])
+
+        pool.executor.submit.assert_not_called()
+        assert engine.is_ready is True
+
+
+class TestWorkerRecycling:
+    """Tests for worker initializer and pool recycling."""
+
+    def _pool(self, engine):
+        from core.ai_engine import DEFAULT_POOL
+
+        return engine.pools[DEFAULT_POOL]
+
+    def test_max_tasks_passed_to_pool(self, create_ai_engine, mock_process_pool):
+        create_ai_engine({"workers": 1, "recycle": {"max_tasks": 50}})
+
+        assert mock_process_pool.call_args.kwargs["max_tasks_per_child"] == 50
+
+    def test_resize_recycles_only_on_change(self, engine):
+        pool = self._pool(engine)
+        pool._create_executor = MagicMock()
+
+        assert pool.resize(pool.num_workers, pool.num_threads) is False
+        assert pool.resize(3, 1) is True
+
+        assert (pool.num_workers, pool.num_threads) == (3, 1)
+        assert pool._create_executor.call_count == 1
+        assert pool.generation == 1
+
+    @pytest.mark.skipif(sys.version_info < (3, 11), reason="max_tasks_per_child requires Python 3.11+")
+    def test_recycled_pool_spawns_real_workers(self):
+        from core.ai_engine import WorkerPool
+
+        pool = WorkerPool("test", 1, 1, max_tasks_per_worker=1)
+        try:
+            states = [pool.submit(_worker_state)[0].result(timeout=120) for _ in range(2)]
+        finally:
+            pool.executor.shutdown()
+
+        # 작업마다 새 워커로 교체되고, 워커가 모듈을 다시 import 해도 엔진/워커 풀을 만들지 않음
+        assert states[0][0] != states[1][0] != os.getpid()
+        assert [created for _, created in states] == [False, False]
+
+    def test_initializer_preloads_models(self, tmp_path):
+        pytest.importorskip("torch")
+        from core.ai_engine import _init_worker
+
+        specs = (_spec("MODEL_MELON"), _spec("MODEL_NOL"))
+        with patch('core.ai_engine._warm_model') as mock_warm, patch.dict(os.environ), \
+             patch('core.ai_engine.torch.set_num_threads') as mock_threads:
+            _init_worker(2, specs)
+
+        mock_threads.assert_called_once_with(2)
+        assert [c.args[0]["key"] for c in mock_warm.call_args_list] == ["MODEL_MELON", "MODEL_NOL"]
+
+    def test_initializer_survives_preload_failure(self, tmp_path):
+        pytest.importorskip("torch")
+        from core.ai_engine import _init_worker
+
+        with patch('core.ai_engine._warm_model', side_effect=FileNotFoundError("missing")), \
+             patch.dict(os.environ), patch('core.ai_engine.torch.set_num_threads'):
+            _init_worker(1, (_spec(),))
+
+    def test_pooled_task_reports_rss(self, tmp_path):
+        from core import ai_engine
+
+        with patch('core.ai_engine._batch_inference_task', return_value=["r"]), \
+             patch('core.ai_engine._worker_rss', return_value=200):
+            assert ai_engine._pooled_batch_task(_spec(), ["a"], 100) == (["r"], True)
+            assert ai_engine._pooled_batch_task(_spec(), ["a"], 0) == (["r"], False)
+
+    def _submit_with(self, engine, value):
+        import concurrent.futures
+
+        pool = self._pool(engine)
+        inner = concurrent.futures.Future()
+        inner.set_result(value)
+        pool.executor = MagicMock()
+        pool.executor.submit.return_value = inner
+        pool._create_executor = MagicMock(return_value=MagicMock())
+        old = pool.executor
+        return engine._submit_batch(_spec(), ["a"]), old
+
+    def test_rss_over_limit_recycles_pool(self, engine):
+        future, old = self._submit_with(engine, (["ok"], True))
+        pool = self._pool(engine)
+
+        assert future.result() == ["ok"]
+        assert pool.generation == 1
+        assert pool.executor is pool._create_executor.return_value
+        old.shutdown.assert_called_once_with(wait=False)
+
+    def test_rss_under_limit_keeps_pool(self, engine):
+        future, _ = self._submit_with(engine, (["ok"], False))
+
+        assert future.result() == ["ok"]
+        assert self._pool(engine).generation == 0
+
+    def test_broken_pool_is_replaced(self, engine):
+        import concurrent.futures
+        from concurrent.futures.process import BrokenProcessPool
+
+        pool = self._pool(engine)
+        inner = concurrent.futures.Future()
+        inner.set_exception(BrokenProcessPool("worker died"))
+        pool.executor = MagicMock()
+        pool.executor.submit.return_value = inner
+        pool._create_executor = MagicMock()
+
+        future = engine._submit_batch(_spec(), ["a"])
+
+        with pytest.raises(BrokenProcessPool):
+            future.result()
+        assert pool.generation == 1
+
+    def test_stale_recycle_request_ignored(self, engine):
+        pool = self._pool(engine)
+        pool._create_executor = MagicMock()
+        pool.recycle()
+
+        pool.recycle(generation=0)
+
+        assert pool.generation == 1
+        assert pool._create_executor.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_warmup_rebuilds_pool_with_preload_models(self, engine):
+        import concurrent.futures
+
+        pool = self._pool(engine)
+        new_executor = MagicMock()
+        future = concurrent.futures.Future()
+        future.set_result({"models": {"MODEL_MELON": "ready"}, "pid": 1, "rss": 0})
+        new_executor.submit.return_value = future
+        pool._create_executor = MagicMock(return_value=new_executor)
+
+        await engine.warmup(["MODEL_MELON"])
+
+        assert pool.preload == [_spec()]
+        assert pool.executor is new_executor
+        assert engine.warmup_status["state"] == "ready"
+
+
+class TestWorkerPools:
+    """Tests for routing models to shared / dedicated worker pools."""
+
+    def test_models_without_workers_share_default_pool(self, engine):
+        from core.ai_engine import DEFAULT_POOL
+
+        assert engine.pool_for(_spec("MODEL_A")) is engine.pools[DEFAULT_POOL]
+        assert engine.pool_for(_spec("MODEL_B")) is engine.pools[DEFAULT_POOL]
+
+    def test_dedicated_pool_created_once_per_model(self, engine, mock_process_pool):
+        pool = engine.pool_for(_spec("MODEL_A", workers=3))
+
+        assert engine.pool_for(_spec("MODEL_A", workers=3)) is pool
+        assert pool.num_workers == 3
+        assert mock_process_pool.call_args.kwargs["max_workers"] == 3
+        assert len(engine.pools) == 2
+
+    def _total_threads(self, engine):
+        return sum(pool.num_workers * pool.num_threads for pool in engine.pools.values())
+
+    @patch('core.ai_engine.os.cpu_count', return_value=8)
+    def test_dedicated_pool_shares_thread_budget(self, mock_cpu, create_ai_engine):
+        from core.ai_engine import DEFAULT_POOL
+
+        engine = create_ai_engine({"workers": 2})
+        assert self._total_threads(engine) == 8
+
+        pool = engine.pool_for(_spec("MODEL_A", workers=2))
+
+        # 공용 2 + 전용 2 워커가 8 코어를 나눠 씀 (워커당 2 스레드)
+        assert engine.pools[DEFAULT_POOL].num_threads == pool.num_threads == engine.threads_per_worker == 2
+        assert self._total_threads(engine) <= 8
+
+    @patch('core.ai_engine.os.cpu_count', return_value=8)
+    def test_dedicated_pool_shrinks_auto_default_pool(self, mock_cpu, create_ai_engine):
+        from core.ai_engine import DEFAULT_POOL, WORKER_BASE_MEMORY
+
+        memory = MagicMock()
+        memory.virtual_memory.return_value.available = 64 * 1024 ** 3
+        with patch('core.ai_engine.psutil', memory), \
+             patch('core.ai_engine.estimate_model_footprint', return_value=WORKER_BASE_MEMORY):
+            engine = create_ai_engine({"workers": "auto"})
+            assert engine.num_workers == 8
+
+            engine.pool_for(_spec("MODEL_A", workers=3))
+
+        assert engine.pools[DEFAULT_POOL].num_workers == engine.num_workers == 5
+        assert self._total_threads(engine) == 8
+
+    def test_batches_routed_to_model_pool(self, engine):
+        import concurrent.futures
+        from core.ai_engine import DEFAULT_POOL
+
+        engine.resolve_model = MagicMock()
+        pool = engine.pool_for(_spec("MODEL_A", workers=1))
+        inner = concurrent.futures.Future()
+        inner.set_result((["ok"], False))
+        pool.executor = MagicMock()
+        pool.executor.submit.return_value = inner
+        engine.pools[DEFAULT_POOL].executor = MagicMock()
+
+        assert engine._submit_batch(_spec("MODEL_A", workers=1), ["a"]).result() == ["ok"]
+        engine.pools[DEFAULT_POOL].executor.submit.assert_not_called()
+        engine.resolve_model.assert_not_called()
+
+
+class TestGreedyDecode:
+    """Tests for vectorized CTC greedy decoding."""
+
+    def _logits(self, paths, num_classes=27):
+        import torch
+
+        # paths: 배치별 step 인덱스 목록 -> (T, B, C) one-hot 에 가까운 logits
+        T, B = len(paths[0]), len(paths)
+        logits = torch.zeros(T, B, num_classes)
+        for b, path in enumerate(paths):
+            for t, idx in enumerate(path):
+                logits[t, b, idx] = 10.0
+        return logits
+
+    def _legacy(self, logits):
+        from core.ai_engine import BLANK_LABEL, IDX_TO_CHAR
+
+        decoded = []
+        for p in logits.argmax(dim=2).cpu().numpy().transpose(1, 0):
+            seq, prev = [], -1
+            for idx in p:
+                if idx != prev and idx != BLANK_LABEL and idx in IDX_TO_CHAR:
+                    seq.append(IDX_TO_CHAR[idx])
+                prev = idx
+            decoded.append("".join(seq))
+        return decoded
+
+    def test_collapses_repeats_and_blanks(self):
+        pytest.importorskip("torch")
+        from core.ai_engine import _greedy_decode, BLANK_LABEL
+
+        B_ = BLANK_LABEL
+        logits = self._logits([
+            [0, 0, B_, 0, 1, 1, B_, B_],   # A A _ A B B _ _ -> "AAB"
+            [B_, B_, B_, B_, B_, B_, B_, B_],  # -> ""
+        ])
+
+        texts, char_confidences, _, _ = _greedy_decode(logits)
+
+        assert texts == ["AAB", ""]
+        assert len(char_confidences[0]) == 3
+        assert char_confidences[1] == []
+
+    def test_matches_legacy_loop_on_random_logits(self):
+        torch = pytest.importorskip("torch")
+        from core.ai_engine import _greedy_decode
+
+        torch.manual_seed(0)
+        logits = torch.randn(29, 16, 27)
+
+        texts, char_confidences, _, _ = _greedy_decode(logits)
+
+        assert texts == self._legacy(logits)
+        assert [len(c) for c in char_confidences] == [len(t) for t in texts]
+
+    def test_char_confidences_are_probabilities(self):
+        torch = pytest.importorskip("torch")
+        from core.ai_engine import _greedy_decode
+
+        logits = self._logits([[2, 2, 26, 3]])
+
+        _, char_confidences, _, _ = _greedy_decode(logits)
+
+        assert all(0.99 < c <= 1.0 for c in char_confidences[0])
+
+    def test_sequence_confidence_is_product_of_char_probs(self):
+        torch = pytest.importorskip("torch")
+        import numpy as np
+        from core.ai_engine import _greedy_decode, BLANK_LABEL
+
+        torch.manual_seed(1)
+        logits = torch.randn(12, 4, 27)
+
+        texts, _, confidences, means = _greedy_decode(logits)
+
+        probs = torch.softmax(logits.double(), dim=2)
+        step_probs, preds = probs.max(dim=2)
+        for b, text in enumerate(texts):
+            emitted = [
+                step_probs[t, b].item() for t in range(logits.shape[0])
+                if preds[t, b] != BLANK_LABEL and (t == 0 or preds[t, b] != preds[t - 1, b])
+            ]
+            assert len(emitted) == len(text)
+            if emitted:
+                assert confidences[b] == pytest.approx(float(np.prod(emitted)), rel=1e-4)
+                assert means[b] == pytest.approx(float(np.mean(emitted)), rel=1e-4)
+
+    def test_confident_path_scores_higher_than_uncertain(self):
+        pytest.importorskip("torch")
+        from core.ai_engine import _greedy_decode
+
+        sharp = self._logits([[0, 1, 2, 3]])
+        flat = sharp / 10
+
+        _, _, (sharp_conf,), _ = _greedy_decode(sharp)
+        _, _, (flat_conf,), _ = _greedy_decode(flat)
+
+        assert sharp_conf > 0.99
+        assert flat_conf < sharp_conf
+
+    def test_empty_text_uses_path_geometric_mean(self):
+        torch = pytest.importorskip("torch")
+        from core.ai_engine import _greedy_decode, BLANK_LABEL
+
+        logits = self._logits([[BLANK_LABEL] * 6])
+
+        texts, char_confidences, confidences, means = _greedy_decode(logits)
+
+        expected = torch.softmax(logits[:, 0], dim=1)[:, BLANK_LABEL].log().mean().exp().item()
+        assert texts == [""] and char_confidences == [[]]
+        assert confidences[0] == pytest.approx(expected, rel=1e-5)
+        assert means[0] == confidences[0]
+
+
+class TestMicroBatcher:
+    """Tests for the per-model micro-batching scheduler."""
+
+    def _echo_submit(self, calls):
+        import concurrent.futures
+
+        def submit(spec, images):
+            calls.append((spec["key"], list(images)))
+            future = concurrent.futures.Future()
+            future.set_result([f"{spec['key']}:{image}" for image in images])
+            return future
+        return submit
+
+    def test_concurrent_requests_share_one_batch(self):
+        from core.ai_engine import MicroBatcher
+
+        calls = []
+        batcher = MicroBatcher(self._echo_submit(calls), max_batch_size=8, max_wait_ms=200)
+        futures = [batcher.submit(_spec("MODEL_MELON"), f"img{i}") for i in range(3)]
+
+        assert [f.result(timeout=5) for f in futures] == [f"MODEL_MELON:img{i}" for i in range(3)]
+        assert calls == [("MODEL_MELON", ["img0", "img1", "img2"])]
+
+    def test_full_batch_dispatches_without_waiting(self):
+        import time
+        from core.ai_engine import MicroBatcher
+
+        calls = []
+        batcher = MicroBatcher(self._echo_submit(calls), max_batch_size=2, max_wait_ms=10_000)
+        start = time.monotonic()
+        futures = [batcher.submit(_spec("MODEL_MELON"), f"img{i}") for i in range(2)]
+
+        assert futures[1].result(timeout=5) == "MODEL_MELON:img1"
+        assert time.monotonic() - start < 5
+
+    def test_batches_are_per_model(self):
+        from core.ai_engine import MicroBatcher
+
+        calls = []
+        batcher = MicroBatcher(self._echo_submit(calls), max_batch_size=8, max_wait_ms=50)
+        a = batcher.submit(_spec("MODEL_MELON"), "a")
+        b = batcher.submit(_spec("MODEL_NOL"), "b")
+
+        assert a.result(timeout=5) == "MODEL_MELON:a"
+        assert b.result(timeout=5) == "MODEL_NOL:b"
+        assert sorted(calls) == [("MODEL_MELON", ["a"]), ("MODEL_NOL", ["b"])]
+
+    def test_model_file_change_starts_new_batch(self):
+        from core.ai_engine import MicroBatcher
+
+        calls = []
+        batcher = MicroBatcher(self._echo_submit(calls), max_batch_size=8, max_wait_ms=50)
+        old = batcher.submit(_spec(sha256="a" * 64), "old")
+        new = batcher.submit(_spec(sha256="b" * 64), "new")
+
+        assert old.result(timeout=5) == "MODEL_MELON:old"
+        assert new.result(timeout=5) == "MODEL_MELON:new"
+        assert sorted(calls) == [("MODEL_MELON", ["new"]), ("MODEL_MELON", ["old"])]
+
+    def test_batch_failure_propagates_to_every_caller(self):
+        import concurrent.futures
+        from core.ai_engine import MicroBatcher
+
+        def submit(spec, images):
+            future = concurrent.futures.Future()
+            future.set_exception(RuntimeError("worker died"))
+            return future
+
+        batcher = MicroBatcher(submit, max_batch_size=2, max_wait_ms=50)
+        futures = [batcher.submit(_spec("MODEL_MELON"), i) for i in range(2)]
+
+        for future in futures:
+            with pytest.raises(RuntimeError):
+                future.result(timeout=5)
+
+    def test_cancelled_request_is_dropped(self):
+        from core.ai_engine import MicroBatcher
+
+        calls = []
+        batcher = MicroBatcher(self._echo_submit(calls), max_batch_size=8, max_wait_ms=100)
+        cancelled = batcher.submit(_spec("MODEL_MELON"), "gone")
+        kept = batcher.submit(_spec("MODEL_MELON"), "kept")
+        assert cancelled.cancel() is True
+
+        assert kept.result(timeout=5) == "MODEL_MELON:kept"
+        assert calls == [("MODEL_MELON", ["kept"])]
+
+
+class TestBatchInferenceTask:
+    """Tests for the batched worker entry point."""
+
+    def _png(self):
+        import io
+        from PIL import Image
+
+        buf = io.BytesIO()
+        Image.new("L", (230, 70), color=255).save(buf, format="PNG")
+        return buf.getvalue()
+
+    def test_one_forward_pass_for_batch(self, tmp_path):
+        torch = pytest.importorskip("torch")
+        from core import ai_engine
+
+        model = ai_engine.CRNN(img_h=70, num_classes=ai_engine.NUM_CLASSES).eval()
+        forward = MagicMock(side_effect=model.forward)
+        model.forward = forward
+
+        with patch('core.ai_engine._load_model_in_worker', return_value=model):
+            results = ai_engine._batch_inference_task(_spec(), [self._png(), self._png()])
+
+        assert forward.call_count == 1
+        assert forward.call_args.args[0].shape[0] == 2
+        assert [r["status"] for r in results] == ["success", "success"]
+        assert results[0]["batch_size"] == 2
+
+    def test_bad_image_fails_only_its_slot(self, tmp_path):
+        pytest.importorskip("torch")
+        from core import ai_engine
+
+        model = ai_engine.CRNN(img_h=70, num_classes=ai_engine.NUM_CLASSES).eval()
+        with patch('core.ai_engine._load_model_in_worker', return_value=model):
+            results = ai_engine._batch_inference_task(_spec(), [b"not an image", self._png()])
+
+        assert results[0]["status"] == "error"
+        assert results[1]["status"] == "success"
+
+    def test_load_failure_fails_all(self, tmp_path):
+        from core import ai_engine
+
+        with patch('core.ai_engine._load_model_in_worker', side_effect=FileNotFoundError("missing")):
+            results = ai_engine._batch_inference_task(_spec(), ["a", "b"])
+
+        assert [r["status"] for r in results] == ["error", "error"]
+
+    def test_result_reports_requested_model(self):
+        pytest.importorskip("torch")
+        from core import ai_engine
+
+        model = ai_engine.CRNN(img_h=70, num_classes=ai_engine.NUM_CLASSES).eval()
+        with patch('core.ai_engine._load_model_in_worker', return_value=model):
+            results = ai_engine._batch_inference_task(_spec("MODEL_NOL", width=210), [self._png()])
+
+        assert results[0]["model_type"] == "MODEL_NOL"
 
 
 class TestWorkerFunctions:
@@ -134,7 +1082,7 @@ class TestWorkerFunctions:
         from core.ai_engine import _load_model_in_worker
 
         with pytest.raises(ImportError):
-            _load_model_in_worker("MODEL_MELON", str(tmp_path))
+            _load_model_in_worker(_spec(path=str(tmp_path / "model_melon.pt")))
 
 
 class TestCRNNModel:
@@ -176,3 +1124,303 @@ class TestCRNNModel:
             assert output.dim() == 3
         except NameError:
             pytest.skip("CRNN not available (HAS_DEPS=False)")
+
+
+class TestRuntimeVariants:
+    """Tests for fused / int8 model variants and the fp32 accuracy check."""
+
+    def _model(self):
+        torch = pytest.importorskip("torch")
+        from core.ai_engine import CRNN, NUM_CLASSES
+
+        torch.manual_seed(0)
+        model = CRNN(img_h=70, num_classes=NUM_CLASSES)
+        # BN 통계를 기본값에서 바꿔서 fuse 시 가중치 접기가 실제로 검증되도록 함
+        for layer in model.cnn:
+            if isinstance(layer, torch.nn.BatchNorm2d):
+                layer.running_mean.uniform_(-0.5, 0.5)
+                layer.running_var.uniform_(0.5, 2.0)
+        return model.eval()
+
+    def test_fused_matches_fp32(self):
+        import torch
+        from core.ai_engine import build_runtime_variant
+
+        model = self._model()
+        fused = build_runtime_variant(model, "fused")
+        x = torch.randn(2, 1, 70, 230)
+
+        with torch.inference_mode():
+            assert torch.allclose(fused(x), model(x), atol=1e-4)
+        assert not any(isinstance(m, torch.nn.BatchNorm2d) for m in fused.modules())
+        assert any(isinstance(m, torch.nn.BatchNorm2d) for m in model.modules())
+
+    def test_int8_quantizes_lstm_and_linear(self):
+        import torch
+        from core.ai_engine import build_runtime_variant
+
+        model = self._model()
+        quantized = build_runtime_variant(model, "int8", torch.device("cpu"))
+        x = torch.randn(2, 1, 70, 230)
+
+        assert type(quantized.rnn).__module__.startswith("torch.ao.nn.quantized.dynamic")
+        assert type(quantized.fc).__module__.startswith("torch.ao.nn.quantized.dynamic")
+        with torch.inference_mode():
+            assert quantized(x).shape == model(x).shape
+
+    def test_int8_on_gpu_falls_back_to_fused(self):
+        import torch
+        from core.ai_engine import build_runtime_variant
+
+        model = self._model()
+        fused = build_runtime_variant(model, "int8", torch.device("cuda"))
+
+        assert isinstance(fused.rnn, torch.nn.LSTM)
+        assert not any(isinstance(m, torch.nn.BatchNorm2d) for m in fused.modules())
+
+    def test_unknown_variant_rejected(self):
+        from core.ai_engine import build_runtime_variant
+
+        with pytest.raises(ValueError):
+            build_runtime_variant(self._model(), "fp8")
+
+    def test_low_agreement_falls_back_to_fp32(self, tmp_path):
+        import torch
+        from core import ai_engine
+
+        model = self._model()
+        spec = _spec(path=str(tmp_path / "model_melon.pt"), runtime="int8")
+        with patch('core.ai_engine.load_sample_batch', return_value=torch.zeros(4, 1, 70, 230)), \
+             patch('core.ai_engine.check_variant_accuracy', return_value=0.5):
+            result, used = ai_engine._apply_runtime_variant(spec, model, torch.device("cpu"))
+
+        assert result is model
+        assert used == "fp32"
+
+    def _write_samples(self, tmp_path, count=3):
+        from PIL import Image
+        from core import ai_engine
+
+        sample_dir = tmp_path / ai_engine.SAMPLE_DIRNAME / "MODEL_MELON"
+        sample_dir.mkdir(parents=True)
+        for i in range(count):
+            Image.new("L", (230, 70), color=80 * i).save(sample_dir / f"{i}.png")
+
+    def test_missing_samples_fall_back_to_fp32(self, tmp_path):
+        import torch
+        from core import ai_engine
+
+        model = self._model()
+        spec = _spec(path=str(tmp_path / "model_melon.pt"), runtime="int8")
+        with patch('core.ai_engine.build_runtime_variant') as mock_build:
+            result, used = ai_engine._apply_runtime_variant(spec, model, torch.device("cpu"))
+
+        assert result is model
+        assert used == "fp32"
+        mock_build.assert_not_called()
+
+    def test_variant_rejected_on_sample_disagreement(self, tmp_path):
+        import torch
+        from core import ai_engine
+
+        def _always(char_idx):
+            # 모든 샘플을 같은 한 글자로 읽는 모델 (T=4, 나머지는 blank)
+            def forward(x):
+                logits = torch.full((4, x.shape[0], ai_engine.NUM_CLASSES + 1), -10.0)
+                logits[:, :, ai_engine.BLANK_LABEL] = 0.0
+                logits[0, :, char_idx] = 10.0
+                return logits
+            return forward
+
+        self._write_samples(tmp_path)
+        reference = _always(0)  # "A"
+        spec = _spec(path=str(tmp_path / "model_melon.pt"), runtime="int8", min_agreement=0.5)
+        with patch('core.ai_engine.build_runtime_variant', return_value=_always(1)):  # "B"
+            result, used = ai_engine._apply_runtime_variant(spec, reference, torch.device("cpu"))
+
+        assert result is reference
+        assert used == "fp32"
+
+    def test_passing_agreement_uses_variant(self, tmp_path):
+        import torch
+        from core import ai_engine
+
+        self._write_samples(tmp_path)
+        model = self._model()
+        spec = _spec(path=str(tmp_path / "model_melon.pt"), runtime="fused")
+        result, used = ai_engine._apply_runtime_variant(spec, model, torch.device("cpu"))
+
+        assert result is not model
+        assert used == "fused"
+        assert ai_engine.load_sample_batch(spec).shape == (3, 1, 70, 230)
+
+    def test_worker_loads_configured_variant(self, tmp_path):
+        import torch
+        from core import ai_engine
+
+        torch.save(self._model().state_dict(), tmp_path / "model_melon.pt")
+        self._write_samples(tmp_path)
+        spec = _spec(path=str(tmp_path / "model_melon.pt"), runtime="int8", torchscript=False, min_agreement=0.0)
+
+        with patch.dict(ai_engine._worker_models, clear=True):
+            model = ai_engine._load_model_in_worker(spec)
+
+        assert type(model.rnn).__module__.startswith("torch.ao.nn.quantized.dynamic")
+
+
+class TestModelArtifacts:
+    """Tests for the TorchScript artifact cache next to the .pt file."""
+
+    def _save_weights(self, path, seed=0):
+        torch = pytest.importorskip("torch")
+        from core.ai_engine import CRNN, NUM_CLASSES
+
+        torch.manual_seed(seed)
+        torch.save(CRNN(img_h=70, num_classes=NUM_CLASSES).state_dict(), path)
+
+    def _load(self, model_dir, **overrides):
+        from core import ai_engine
+
+        path = str(model_dir / "model_melon.pt")
+        spec = _spec(path=path, sha256=ai_engine._file_sha256(path), **overrides)
+        with patch.dict(ai_engine._worker_models, clear=True):
+            return ai_engine._load_model_in_worker(spec)
+
+    def _artifacts(self, model_dir):
+        from core.ai_engine import ARTIFACT_SUFFIX
+
+        return sorted(p.name for p in model_dir.iterdir() if p.name.endswith(ARTIFACT_SUFFIX))
+
+    def test_artifact_key_includes_hash_and_torch_version(self, tmp_path):
+        import torch
+        from core.ai_engine import artifact_path
+
+        self._save_weights(tmp_path / "model_melon.pt")
+        path = artifact_path(str(tmp_path / "model_melon.pt"), "fp32", torch.device("cpu"))
+
+        assert path.startswith(str(tmp_path / "model_melon.fp32.cpu."))
+        assert path.endswith(f".torch{torch.__version__}.ts")
+
+        self._save_weights(tmp_path / "model_melon.pt", seed=1)
+        assert artifact_path(str(tmp_path / "model_melon.pt"), "fp32", torch.device("cpu")) != path
+
+    def test_first_load_exports_and_later_loads_skip_construction(self, tmp_path):
+        import torch
+        from core import ai_engine
+
+        self._save_weights(tmp_path / "model_melon.pt")
+        first = self._load(tmp_path)
+
+        assert isinstance(first, torch.jit.ScriptModule)
+        assert len(self._artifacts(tmp_path)) == 1
+
+        with patch('core.ai_engine._build_model', side_effect=AssertionError("constructed")):
+            second = self._load(tmp_path)
+
+        x = torch.rand(3, 1, 70, 230)
+        with torch.inference_mode():
+            assert torch.allclose(first(x), second(x), atol=1e-5)
+
+    def test_fallback_is_not_cached_as_variant(self, tmp_path):
+        from PIL import Image
+        from core import ai_engine
+
+        self._save_weights(tmp_path / "model_melon.pt")
+
+        # 샘플이 없으면 fp32 로 동작하고 int8 이름의 artifact 를 만들지 않음
+        fallback = self._load(tmp_path, runtime="int8", min_agreement=0.0)
+        assert not isinstance(fallback.rnn, ai_engine.torch.ao.nn.quantized.dynamic.LSTM)
+        assert self._artifacts(tmp_path) == []
+
+        # 샘플을 추가하면 다음 로드에서 검사를 통과한 int8 모델이 저장되고 재사용됨
+        sample_dir = tmp_path / ai_engine.SAMPLE_DIRNAME / "MODEL_MELON"
+        sample_dir.mkdir(parents=True)
+        Image.new("L", (230, 70), color=128).save(sample_dir / "0.png")
+        with patch('core.ai_engine.build_runtime_variant', wraps=ai_engine.build_runtime_variant) as mock_build:
+            self._load(tmp_path, runtime="int8", min_agreement=0.0)
+
+        mock_build.assert_called_once()
+        [name] = self._artifacts(tmp_path)
+        assert name.startswith("model_melon.int8.cpu.")
+
+        with patch('core.ai_engine._build_model', side_effect=AssertionError("constructed")):
+            cached = self._load(tmp_path, runtime="int8", min_agreement=0.0)
+        assert "quantized" in str(cached.graph)
+
+    def test_artifact_matches_eager_model(self, tmp_path):
+        import torch
+
+        self._save_weights(tmp_path / "model_melon.pt")
+        eager = self._load(tmp_path, torchscript=False)
+        scripted = self._load(tmp_path)
+
+        x = torch.rand(2, 1, 70, 230)
+        with torch.inference_mode():
+            assert torch.allclose(eager(x), scripted(x), atol=1e-4)
+
+    def test_changed_weights_replace_stale_artifact(self, tmp_path):
+        self._save_weights(tmp_path / "model_melon.pt")
+        self._load(tmp_path)
+        before = self._artifacts(tmp_path)
+
+        self._save_weights(tmp_path / "model_melon.pt", seed=1)
+        self._load(tmp_path)
+        after = self._artifacts(tmp_path)
+
+        assert len(after) == 1
+        assert after != before
+
+    def test_corrupt_artifact_is_rebuilt(self, tmp_path):
+        import torch
+        from core.ai_engine import artifact_path, load_artifact
+
+        self._save_weights(tmp_path / "model_melon.pt")
+        path = artifact_path(str(tmp_path / "model_melon.pt"), "fp32", torch.device("cpu"))
+        with open(path, "wb") as f:
+            f.write(b"garbage")
+
+        model = self._load(tmp_path)
+
+        assert isinstance(model, torch.jit.ScriptModule)
+        assert load_artifact(path, torch.device("cpu")) is not None
+
+    def test_unwritable_dir_still_uses_scripted_model(self, tmp_path):
+        import torch
+
+        self._save_weights(tmp_path / "model_melon.pt")
+        with patch('core.ai_engine.torch.jit.save', side_effect=OSError("read-only")):
+            model = self._load(tmp_path)
+
+        assert isinstance(model, torch.jit.ScriptModule)
+        assert self._artifacts(tmp_path) == []
+
+    def test_disabled_keeps_eager_model(self, tmp_path):
+        from core import ai_engine
+
+        self._save_weights(tmp_path / "model_melon.pt")
+        model = self._load(tmp_path, torchscript=False)
+
+        assert isinstance(model, ai_engine.CRNN)
+        assert self._artifacts(tmp_path) == []
+
+    def test_worker_cache_reloads_changed_weights(self, tmp_path):
+        from core import ai_engine
+
+        self._save_weights(tmp_path / "model_melon.pt")
+        path = str(tmp_path / "model_melon.pt")
+        with patch.dict(ai_engine._worker_models, clear=True):
+            first = ai_engine._load_model_in_worker(_spec(path=path, sha256="a" * 64, torchscript=False))
+            same = ai_engine._load_model_in_worker(_spec(path=path, sha256="a" * 64, torchscript=False))
+            changed = ai_engine._load_model_in_worker(_spec(path=path, sha256="b" * 64, torchscript=False))
+
+        assert same is first
+        assert changed is not first
+
+    def test_unsupported_architecture_rejected(self, tmp_path):
+        from core import ai_engine
+
+        self._save_weights(tmp_path / "model_melon.pt")
+        spec = _spec(path=str(tmp_path / "model_melon.pt"), architecture="resnet", torchscript=False)
+
+        with patch.dict(ai_engine._worker_models, clear=True), pytest.raises(ValueError):
+            ai_engine._load_model_in_worker(spec)
@@ -1,9 +1,11 @@
 """
 Tests for core/api_server.py - FastAPI server endpoints.
 """
+import asyncio
 import pytest
 from unittest.mock import patch, MagicMock, AsyncMock
 from fastapi.testclient import TestClient
+from core.matcher import MatchIndex, MatchResult
 
 
 @pytest.fixture
@@ -11,6 +13,7 @@ def mock_plugin_loader():
     """Mock the plugin_loader module."""
     with patch('core.api_server.plugin_loader') as mock:
         mock.plugins = {}
+        mock.match_url.return_value = MatchResult()
         mock.load_plugins = MagicMock()
         yield mock
 
@@ -40,6 +43,68 @@ class TestHealthEndpoint:
         data = response.json()
         assert data["status"] == "ok"
         assert data["service"] == "ai_engine"
+        assert data["ready"] is True
+
+    def test_health_reports_warmup_progress(self, test_client):
+        with patch('core.api_server.get_ai_engine') as mock_get_engine:
+            mock_engine = mock_get_engine.return_value
+            mock_engine.is_ready = False
+            mock_engine.warmup_status = {"state": "warming", "models": {"MODEL_MELON": "loading"}}
+
+            data = test_client.get("/health").json()
+
+        assert data["status"] == "ok"
+        assert data["ready"] is False
+        assert data["models"] == {"MODEL_MELON": "loading"}
+
+
+def _running_on_event_loop():
+    try:
+        asyncio.get_running_loop()
+        return True
+    except RuntimeError:
+        return False
+
+
+class TestLifespanWarmup:
+    """Tests for model preload at startup."""
+
+    def test_starts_warmup_for_manifest_models(self, mock_plugin_loader, mock_remote_manager):
+        from core.api_server import app
+
+        ctx = MagicMock()
+        ctx.manifest.inference.models = [MagicMock(key="MODEL_MELON")]
+        mock_plugin_loader.plugins = {"captcha_solver": ctx}
+
+        calls = []
+        with patch('core.api_server.get_ai_engine') as mock_get_engine:
+            mock_engine = mock_get_engine.return_value
+            mock_engine.settings = {}
+            mock_engine.registry = {"MODEL_MELON"}
+            mock_engine.warmup = AsyncMock()
+            mock_engine.refresh_models.side_effect = lambda: calls.append(_running_on_event_loop())
+            with TestClient(app):
+                pass
+
+        # 모델 파일 해시가 이벤트 루프를 막지 않도록 스레드에서 실행
+        assert calls == [False]
+        mock_engine.warmup.assert_called_once_with(["MODEL_MELON"])
+
+    def test_preload_disabled(self, mock_plugin_loader, mock_remote_manager):
+        from core.api_server import app
+
+        ctx = MagicMock()
+        ctx.manifest.inference.models = [MagicMock(key="MODEL_MELON")]
+        mock_plugin_loader.plugins = {"captcha_solver": ctx}
+
+        with patch('core.api_server.get_ai_engine') as mock_get_engine:
+            mock_engine = mock_get_engine.return_value
+            mock_engine.settings = {"preload": False}
+            mock_engine.warmup = AsyncMock()
+            with TestClient(app):
+                pass
+
+        mock_engine.warmup.assert_not_called()
 
 
 class TestMatchEndpoint:
@@ -67,18 +132,18 @@ class TestMatchEndpoint:
             )
         ]
         mock_plugin_loader.plugins = {"test_plugin": mock_ctx}
+        mock_plugin_loader.match_url.side_effect = MatchIndex.build(mock_plugin_loader.plugins).lookup
 
-        with patch('core.api_server.UrlMatcher') as mock_matcher:
-            mock_matcher.match.return_value = True
-
-            response = test_client.post(
-                "/v1/match",
-                json={"url": "https://example.com/page"}
-            )
+        response = test_client.post(
+            "/v1/match",
+            json={"url": "https://example.com/page"}
+        )
 
         assert response.status_code == 200
         data = response.json()
-        assert len(data["scripts"]) > 0
+        assert data["scripts"] == [
+            {"url": "plugins/test_plugin/content.js", "run_at": "document_end"}
+        ]
 
     def test_match_no_matching_plugin(self, test_client, mock_plugin_loader):
         mock_ctx = MagicMock()
@@ -90,19 +155,25 @@ class TestMatchEndpoint:
             )
         ]
         mock_plugin_loader.plugins = {"test_plugin": mock_ctx}
+        mock_plugin_loader.match_url.side_effect = MatchIndex.build(mock_plugin_loader.plugins).lookup
 
-        with patch('core.api_server.UrlMatcher') as mock_matcher:
-            mock_matcher.match.return_value = False
-
-            response = test_client.post(
-                "/v1/match",
-                json={"url": "https://example.com/page"}
-            )
+        response = test_client.post(
+            "/v1/match",
+            json={"url": "https://example.com/page"}
+        )
 
         assert response.status_code == 200
         data = response.json()
         assert data["scripts"] == []
 
+    def test_match_stats(self, test_client, mock_plugin_loader):
+        mock_plugin_loader.match_cache.stats.return_value = {"hits": 3, "misses": 1}
+
+        response = test_client.get("/v1/match/stats")
+
+        assert response.status_code == 200
+        assert response.json()["hits"] == 3
+
     def test_match_invalid_request(self, test_client):
         response = test_client.post("/v1/match", json={})
         assert response.status_code == 422  # Validation error
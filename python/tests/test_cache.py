@@ -0,0 +1,79 @@
+"""
+Tests for core/cache.py - Generation-keyed LRU cache.
+"""
+import threading
+import pytest
+from unittest.mock import patch
+from core.cache import GenerationLRU
+
+
+class TestGenerationLRU:
+    """Tests for the shared cache behind MatchCache, HostDecisionCache and PayloadCache."""
+
+    def test_miss_then_hit(self):
+        cache = GenerationLRU(maxsize=4)
+
+        assert cache.get("k", 1) is None
+        cache.put("k", 1, "v")
+        assert cache.get("k", 1) == "v"
+
+        stats = cache.stats()
+        assert (stats["hits"], stats["misses"], stats["size"]) == (1, 1, 1)
+        assert stats["hit_rate"] == pytest.approx(0.5)
+
+    def test_falsy_values_are_cached(self):
+        cache = GenerationLRU(maxsize=4)
+        cache.put("k", 1, False)
+
+        assert cache.get("k", 1) is False
+
+    def test_generation_change_clears(self):
+        cache = GenerationLRU(maxsize=4)
+        cache.put("k", 1, "v")
+
+        assert cache.get("k", 2) is None
+        assert len(cache) == 0
+        assert cache.generation == 2
+
+    def test_stale_put_ignored(self):
+        cache = GenerationLRU(maxsize=4)
+        cache.get("k", 2)
+        cache.put("k", 1, "old")
+
+        assert len(cache) == 0
+
+    def test_evicts_least_recently_used(self):
+        cache = GenerationLRU(maxsize=2)
+        cache.put("a", 1, 1)
+        cache.put("b", 1, 2)
+        cache.get("a", 1)
+        cache.put("c", 1, 3)
+
+        assert cache.get("a", 1) == 1
+        assert cache.get("b", 1) is None
+
+    def test_ttl_expiry(self):
+        cache = GenerationLRU(maxsize=4, ttl=10)
+        with patch('core.cache.time.monotonic', return_value=100.0):
+            cache.put("k", 1, "v")
+        with patch('core.cache.time.monotonic', return_value=109.0):
+            assert cache.get("k", 1) == "v"
+        with patch('core.cache.time.monotonic', return_value=110.0):
+            assert cache.get("k", 1) is None
+
+    def test_concurrent_access_stays_bounded(self):
+        cache = GenerationLRU(maxsize=8)
+
+        def worker(offset):
+            for i in range(500):
+                cache.put(offset + i, 1, i)
+                cache.get(offset + i // 2, 1)
+
+        threads = [threading.Thread(target=worker, args=(n * 1000,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(cache) <= 8
+        assert cache.hits + cache.misses == 2000
@@ -0,0 +1,178 @@
+"""
+Tests for core/cert_cache.py - Plugin host certificate warm-up.
+"""
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+@pytest.fixture(scope="module")
+def store_dir(tmp_path_factory):
+    return tmp_path_factory.mktemp("mitmproxy")
+
+
+@pytest.fixture
+def certstore(store_dir):
+    from mitmproxy import certs
+    return certs.CertStore.from_store(store_dir, "mitmproxy", 2048)
+
+
+class TestCollectPluginHosts:
+    """Tests for host extraction from manifests."""
+
+    def test_concrete_hosts(self, create_plugin_context):
+        from core.cert_cache import collect_plugin_hosts
+
+        plugins = {
+            "p1": create_plugin_context((["*://ticket.melon.com/*", "https://Example.com/app/*"], ["a.js"])),
+            "p2": create_plugin_context((["*://*.test.org/*"], ["a.js"]), host_permissions=["https://api.test.org/*"]),
+        }
+
+        assert collect_plugin_hosts(plugins) == ["ticket.melon.com", "example.com", "test.org", "api.test.org"]
+
+    def test_skips_catch_all_and_http_only(self, create_plugin_context):
+        from core.cert_cache import collect_plugin_hosts
+
+        patterns = ["<all_urls>", "*://*/*", "http://plain.com/*", "bad pattern"]
+        plugins = {"p1": create_plugin_context((patterns, ["a.js"]))}
+
+        assert collect_plugin_hosts(plugins) == []
+
+    def test_deduplicates(self, create_plugin_context):
+        from core.cert_cache import collect_plugin_hosts
+
+        plugins = {
+            "p1": create_plugin_context((["*://example.com/*"], ["a.js"])),
+            "p2": create_plugin_context((["https://example.com/*"], ["a.js"])),
+        }
+
+        assert collect_plugin_hosts(plugins) == ["example.com"]
+
+
+class TestCertWarmer:
+    """Tests for certificate generation and disk persistence."""
+
+    async def test_generates_and_persists(self, certstore, tmp_path):
+        from core.cert_cache import CertWarmer
+
+        warmer = CertWarmer(certstore, str(tmp_path))
+        await warmer.warm(["example.com", "127.0.0.1"])
+
+        assert warmer.generated == 2
+        assert "example.com" in certstore.certs
+        assert (warmer.cache_dir / "example.com.pem").is_file()
+        assert b"PRIVATE KEY" not in (warmer.cache_dir / "example.com.pem").read_bytes()
+
+    async def test_loads_from_disk_on_next_run(self, store_dir, tmp_path):
+        from mitmproxy import certs
+        from core.cert_cache import CertWarmer
+
+        first = CertWarmer(certs.CertStore.from_store(store_dir, "mitmproxy", 2048), str(tmp_path))
+        await first.warm(["example.com"])
+
+        store = certs.CertStore.from_store(store_dir, "mitmproxy", 2048)
+        second = CertWarmer(store, str(tmp_path))
+        await second.warm(["example.com"])
+
+        assert second.loaded == 1
+        assert second.generated == 0
+        assert store.certs["example.com"].cert.cn == "example.com"
+
+    async def test_registered_cert_is_used_for_host(self, certstore, tmp_path):
+        from cryptography import x509
+        from core.cert_cache import CertWarmer
+
+        warmer = CertWarmer(certstore, str(tmp_path))
+        await warmer.warm(["example.com"])
+
+        entry = certstore.get_cert("example.com", [x509.DNSName("example.com")])
+
+        assert entry is certstore.certs["example.com"]
+
+    async def test_discards_corrupt_file(self, certstore, tmp_path):
+        from core.cert_cache import CertWarmer
+
+        warmer = CertWarmer(certstore, str(tmp_path))
+        warmer.cache_dir.mkdir(parents=True)
+        (warmer.cache_dir / "example.com.pem").write_bytes(b"garbage")
+
+        await warmer.warm(["example.com"])
+
+        assert warmer.loaded == 0
+        assert warmer.generated == 1
+
+    async def test_failure_does_not_stop_warmup(self, certstore, tmp_path):
+        from core.cert_cache import CertWarmer
+
+        warmer = CertWarmer(certstore, str(tmp_path))
+        built = warmer._build("b.com")
+        with patch.object(warmer, "_build", side_effect=[Exception("boom"), built]):
+            await warmer.warm(["a.com", "b.com"])
+
+        assert warmer.generated == 1
+        assert "a.com" not in certstore.certs
+        assert "b.com" in certstore.certs
+
+
+    async def test_certstore_only_touched_on_event_loop(self, certstore, tmp_path):
+        import asyncio
+        import threading
+        from core.cert_cache import CertWarmer
+
+        loop_thread = threading.get_ident()
+        threads = []
+        store_certs = certstore.certs
+
+        class RecordingCerts(dict):
+            def __setitem__(self, key, value):
+                threads.append(threading.get_ident())
+                super().__setitem__(key, value)
+
+        certstore.certs = RecordingCerts(store_certs)
+        warmer = CertWarmer(certstore, str(tmp_path))
+        await warmer.warm(["example.com", "b.example.com"])
+
+        assert threads and set(threads) == {loop_thread}
+
+    async def test_keeps_cert_created_during_warmup(self, certstore, tmp_path):
+        from cryptography import x509
+        from core.cert_cache import CertWarmer
+
+        warmer = CertWarmer(certstore, str(tmp_path))
+        build = warmer._build
+
+        def racing_build(host):
+            result = build(host)
+            # 스레드에서 생성하는 동안 mitmproxy 가 같은 호스트 인증서를 먼저 만든 경우
+            certstore.certs[host] = existing
+            return result
+
+        existing = certstore.get_cert("other.com", [x509.DNSName("other.com")])
+        with patch.object(warmer, "_build", side_effect=racing_build):
+            await warmer.warm(["example.com"])
+
+        assert certstore.certs["example.com"] is existing
+
+
+class TestCertWarmupAddon:
+    """Tests for the mitmproxy addon wrapper."""
+
+    @patch('core.cert_cache.ctx')
+    async def test_warms_on_event_loop(self, mock_ctx, certstore, tmp_path):
+        from core.cert_cache import CertWarmupAddon
+
+        mock_ctx.master.addons.get.return_value = MagicMock(certstore=certstore)
+        addon = CertWarmupAddon(["example.com"], str(tmp_path))
+
+        addon.running()
+        await addon.task
+
+        assert "example.com" in certstore.certs
+
+    @patch('core.cert_cache.ctx')
+    def test_no_hosts_no_task(self, mock_ctx, tmp_path):
+        from core.cert_cache import CertWarmupAddon
+
+        addon = CertWarmupAddon([], str(tmp_path))
+        addon.running()
+
+        assert addon.task is None
@@ -0,0 +1,35 @@
+"""
+Tests for core/config.py - System settings loader.
+"""
+import json
+from unittest.mock import patch
+
+
+class TestLoadSystemSettings:
+    """Tests for load_system_settings function."""
+
+    def test_reads_system_settings(self, tmp_path):
+        from core import config
+
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps({"system_settings": {"proxy": {"streaming": True}}}))
+
+        with patch.object(config, 'CONFIG_PATH', str(path)):
+            settings = config.load_system_settings()
+
+        assert settings["proxy"]["streaming"] is True
+
+    def test_missing_file_returns_empty(self, tmp_path):
+        from core import config
+
+        with patch.object(config, 'CONFIG_PATH', str(tmp_path / "missing.json")):
+            assert config.load_system_settings() == {}
+
+    def test_invalid_json_returns_empty(self, tmp_path):
+        from core import config
+
+        path = tmp_path / "config.json"
+        path.write_text("not json")
+
+        with patch.object(config, 'CONFIG_PATH', str(path)):
+            assert config.load_system_settings() == {}
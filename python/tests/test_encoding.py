@@ -0,0 +1,113 @@
+"""
+Tests for core/encoding.py - Incremental Content-Encoding decoders.
+"""
+import gzip
+import zlib
+import pytest
+from core.encoding import make_decoder, make_encoder, encode_body, choose_encoding, parse_accept_encoding
+
+
+def _feed(decoder, data, size=7):
+    out = b""
+    for i in range(0, len(data), size):
+        out += decoder.decompress(data[i:i + size])
+    return out + decoder.flush()
+
+
+PAYLOAD = b"<html><head></head><body>" + b"x" * 5000 + b"</body></html>"
+
+
+class TestMakeDecoder:
+    """Tests for decoder selection."""
+
+    @pytest.mark.parametrize("encoding", ["", "identity", None])
+    def test_identity(self, encoding):
+        decoder = make_decoder(encoding)
+        assert _feed(decoder, PAYLOAD) == PAYLOAD
+
+    def test_unsupported_encoding(self):
+        assert make_decoder("compress") is None
+
+    def test_case_insensitive(self):
+        assert make_decoder("GZIP") is not None
+
+
+class TestIncrementalDecoding:
+    """Tests for chunked decompression."""
+
+    def test_gzip(self):
+        assert _feed(make_decoder("gzip"), gzip.compress(PAYLOAD)) == PAYLOAD
+
+    def test_gzip_multi_member(self):
+        data = gzip.compress(PAYLOAD[:100]) + gzip.compress(PAYLOAD[100:])
+        assert _feed(make_decoder("gzip"), data, size=4096) == PAYLOAD
+
+    def test_deflate_zlib_wrapped(self):
+        assert _feed(make_decoder("deflate"), zlib.compress(PAYLOAD), size=64) == PAYLOAD
+
+    def test_deflate_raw(self):
+        obj = zlib.compressobj(wbits=-zlib.MAX_WBITS)
+        data = obj.compress(PAYLOAD) + obj.flush()
+        assert _feed(make_decoder("deflate"), data, size=64) == PAYLOAD
+
+    def test_brotli(self):
+        brotli = pytest.importorskip("brotli")
+        assert _feed(make_decoder("br"), brotli.compress(PAYLOAD)) == PAYLOAD
+
+
+class TestChooseEncoding:
+    """Tests for Accept-Encoding negotiation."""
+
+    def test_parse_q_values(self):
+        assert parse_accept_encoding("gzip, br;q=0.5, zstd;q=bad") == {"gzip": 1.0, "br": 0.5, "zstd": 0.0}
+
+    def test_prefers_brotli_on_tie(self):
+        pytest.importorskip("brotli")
+        assert choose_encoding("gzip, deflate, br") == "br"
+
+    def test_respects_q_value(self):
+        assert choose_encoding("br;q=0.1, gzip") == "gzip"
+
+    def test_excluded_with_q_zero(self):
+        assert choose_encoding("gzip;q=0") is None
+
+    def test_wildcard(self):
+        assert choose_encoding("*", preferred=("gzip",)) == "gzip"
+
+    def test_no_header(self):
+        assert choose_encoding("") is None
+
+    def test_identity_only(self):
+        assert choose_encoding("identity") is None
+
+
+class TestEncoders:
+    """Tests for output encoders (round trip through the decoders)."""
+
+    @pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+    def test_round_trip(self, encoding):
+        encoder = make_encoder(encoding)
+        if encoder is None:
+            pytest.skip(f"{encoding} not available")
+        assert _feed(make_decoder(encoding), encode_body(PAYLOAD, encoding)) == PAYLOAD
+
+    @pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+    def test_flush_emits_decodable_prefix(self, encoding):
+        encoder = make_encoder(encoding)
+        if encoder is None:
+            pytest.skip(f"{encoding} not available")
+        decoder = make_decoder(encoding)
+
+        first = encoder.compress(b"<html>") + encoder.flush()
+        assert decoder.decompress(first) == b"<html>"
+
+        rest = encoder.compress(b"</html>") + encoder.finish()
+        assert decoder.decompress(rest) + decoder.flush() == b"</html>"
+
+    def test_custom_level(self):
+        assert len(encode_body(PAYLOAD, "gzip", 9)) < len(encode_body(PAYLOAD, "gzip", 0))
+
+    def test_unsupported(self):
+        assert make_encoder("compress") is None
+        with pytest.raises(ValueError):
+            encode_body(PAYLOAD, "compress")
@@ -83,7 +83,8 @@ class TestInferenceEndpoint:
     def mock_dependencies(self):
         with patch('core.inference_router.plugin_loader') as mock_loader, \
              patch('core.inference_router.runtime_manager') as mock_runtime, \
-             patch('core.inference_router.ai_engine') as mock_engine:
+             patch('core.inference_router.get_ai_engine') as mock_get_engine:
+            mock_engine = mock_get_engine.return_value
             yield {
                 'loader': mock_loader,
                 'runtime': mock_runtime,
@@ -139,7 +140,6 @@ class TestInferenceEndpoint:
     @pytest.mark.asyncio
     async def test_inference_local_soa_mode(self, mock_dependencies):
         from core.inference_router import inference_endpoint
-        from fastapi.concurrency import run_in_threadpool
 
         # Setup mock plugin in local/SOA mode
         mock_ctx = MagicMock()
@@ -147,22 +147,43 @@ class TestInferenceEndpoint:
         mock_ctx.manifest.inference.execution_type = "none"
         mock_dependencies['loader'].get_plugin.return_value = mock_ctx
 
-        mock_dependencies['engine'].process_request.return_value = {
+        mock_dependencies['engine'].infer = AsyncMock(return_value={
             "status": "success",
             "predicted_text": "TEST"
-        }
+        })
 
         mock_request = AsyncMock()
         mock_request.json.return_value = {
-            "payload": {"image": "base64", "model_id": "MODEL_MELON"}
+            "payload": {"image": "base64", "model_id": "MODEL_MELON", "timeout": 5}
         }
 
         with patch('core.inference_router.run_in_threadpool', new_callable=AsyncMock) as mock_threadpool:
-            mock_threadpool.return_value = {"status": "success", "predicted_text": "TEST"}
-
             result = await inference_endpoint("test_plugin", "predict", mock_request)
 
             assert result["status"] == "success"
+            # 스레드풀을 거치지 않고 비동기 infer 를 직접 await
+            mock_threadpool.assert_not_called()
+            mock_dependencies['engine'].infer.assert_awaited_once_with(
+                "MODEL_MELON", {"image": "base64", "model_id": "MODEL_MELON", "timeout": 5}, timeout=5
+            )
+
+    @pytest.mark.asyncio
+    async def test_inference_soa_defaults_to_declared_model(self, mock_dependencies):
+        from core.inference_router import inference_endpoint
+
+        mock_ctx = MagicMock()
+        mock_ctx.mode = "local"
+        mock_ctx.manifest.inference.execution_type = "none"
+        mock_ctx.manifest.inference.models = [MagicMock(key="MODEL_NOL"), MagicMock(key="MODEL_MELON")]
+        mock_dependencies['loader'].get_plugin.return_value = mock_ctx
+        mock_dependencies['engine'].infer = AsyncMock(return_value={"status": "success"})
+
+        mock_request = AsyncMock()
+        mock_request.json.return_value = {"payload": {"image": "base64"}}
+
+        await inference_endpoint("test_plugin", "predict", mock_request)
+
+        assert mock_dependencies['engine'].infer.await_args.args[0] == "MODEL_NOL"
 
     @pytest.mark.asyncio
     async def test_inference_local_process_mode(self, mock_dependencies):
@@ -20,6 +20,10 @@ class TestRegexPatterns:
         html = b'<html><head lang="en">content</head></html>'
         assert RE_HEAD.search(html) is not None
 
+    def test_head_pattern_ignores_header(self):
+        html = b'<html><body><header class="top">x</header></body></html>'
+        assert RE_HEAD.search(html) is None
+
     def test_html_pattern_matches(self):
         html = b"<html><body>content</body></html>"
         assert RE_HTML.search(html) is not None
@@ -176,3 +180,389 @@ class TestInjectScriptEdgeCases:
         result = inject_script(html, 8000, head_scripts=["http://localhost/new.js"])
         assert b"existing.js" in result
         assert b"new.js" in result
+
+
+def _stream(injector, html, size):
+    chunks = []
+    for i in range(0, len(html), size):
+        chunks += injector(html[i:i + size])
+    return b"".join(chunks + injector(b""))
+
+
+def _chunked(injector, data, size):
+    """mitmproxy Http1Server 처럼 콜백 결과를 HTTP/1.1 chunk 로 감싸고, 종료 chunk 를 붙입니다."""
+    calls = [injector(data[i:i + size]) for i in range(0, len(data), size)] + [injector(b"")]
+    wire = b""
+    for chunks in calls:
+        assert isinstance(chunks, list)
+        for chunk in chunks:
+            wire += b"%x\r\n%s\r\n" % (len(chunk), chunk)
+    return wire + b"0\r\n\r\n"
+
+
+def _dechunk(wire):
+    """첫 번째 빈 chunk 에서 본문이 끝난 것으로 보고, 뒤에 남은 바이트도 함께 반환합니다."""
+    body = b""
+    while True:
+        size_line, _, wire = wire.partition(b"\r\n")
+        size = int(size_line, 16)
+        if size == 0:
+            return body, wire[2:]
+        body += wire[:size]
+        wire = wire[size + 2:]
+
+
+class TestCharsetHelpers:
+    """Tests for charset detection helpers."""
+
+    def test_get_charset(self):
+        from core.injector import get_charset
+        assert get_charset('text/html; charset="UTF-8"') == "utf-8"
+        assert get_charset("text/html") == ""
+
+    def test_ascii_compatible(self):
+        from core.injector import is_ascii_compatible
+        assert is_ascii_compatible("text/html; charset=euc-kr")
+        assert is_ascii_compatible("text/html")
+        assert not is_ascii_compatible("text/html; charset=utf-16le")
+
+    def test_bom_overrides_header_charset(self):
+        from core.injector import is_ascii_compatible, get_bom_encoding
+
+        assert not is_ascii_compatible("text/html", "<html>".encode("utf-16"))
+        assert not is_ascii_compatible("text/html; charset=utf-8", b"\x00\x00\xfe\xff")
+        assert is_ascii_compatible("text/html; charset=utf-16", b"\xef\xbb\xbf<html>")
+        assert get_bom_encoding(b"\xff\xfe\x00\x00<") == (b"\xff\xfe\x00\x00", "utf-32-le")
+        assert get_bom_encoding(b"\xfe\xff\x00<") == (b"\xfe\xff", "utf-16-be")
+        assert get_bom_encoding(b"<html>") is None
+
+
+class TestStreamingInjector:
+    """Tests for chunked StreamingInjector."""
+
+    HTML = b"<html><head><title>T</title></head><body>" + b"<p>x</p>" * 200 + b"</body></html>"
+
+    @pytest.mark.parametrize("size", [1, 3, 7, 64, 100000])
+    def test_body_injection_any_chunk_size(self, size):
+        from core.injector import StreamingInjector
+
+        result = _stream(StreamingInjector(body_payload=b"<!--P-->"), self.HTML, size)
+
+        assert result == self.HTML.replace(b"</body>", b"<!--P--></body>")
+
+    @pytest.mark.parametrize("size", [1, 5, 64])
+    def test_head_injection_any_chunk_size(self, size):
+        from core.injector import StreamingInjector
+
+        result = _stream(StreamingInjector(head_payload=b"<!--H-->"), self.HTML, size)
+
+        assert result == self.HTML.replace(b"<head>", b"<head><!--H-->")
+
+    def test_injects_before_last_body_end(self):
+        from core.injector import StreamingInjector
+
+        html = b"<body><script>'</body>'</script>text</BODY>\n<!-- tail -->"
+        result = _stream(StreamingInjector(body_payload=b"P"), html, 4)
+
+        assert result == b"<body><script>'</body>'</script>textP</BODY>\n<!-- tail -->"
+
+    def test_appends_without_body_end(self):
+        from core.injector import StreamingInjector
+
+        result = _stream(StreamingInjector(body_payload=b"P"), b"<div>no body</div>", 3)
+
+        assert result == b"<div>no body</div>P"
+
+    def test_head_fallback_to_html_tag(self):
+        from core.injector import StreamingInjector
+
+        result = _stream(StreamingInjector(head_payload=b"H"), b"<html lang='ko'><body>x</body>", 2)
+
+        assert result == b"<html lang='ko'>H<body>x</body>"
+
+    def test_head_fallback_prepends(self):
+        from core.injector import StreamingInjector
+
+        result = _stream(StreamingInjector(head_payload=b"H"), b"plain text", 3)
+
+        assert result == b"Hplain text"
+
+    def test_streams_before_end(self):
+        from core.injector import StreamingInjector
+
+        injector = StreamingInjector(body_payload=b"P")
+        emitted = b"".join(injector(b"<html><body>" + b"x" * 1000))
+
+        # 대부분의 바이트는 스트림 종료 전에 바로 전달되어야 함
+        assert len(emitted) > 900
+
+    def test_decodes_gzip_stream(self):
+        import gzip
+        from core.injector import StreamingInjector
+        from core.encoding import make_decoder
+
+        compressed = gzip.compress(self.HTML)
+        injector = StreamingInjector(body_payload=b"P", decoder=make_decoder("gzip"))
+
+        result = _stream(injector, compressed, 50)
+
+        assert result == self.HTML.replace(b"</body>", b"P</body>")
+
+    def test_finish_is_idempotent(self):
+        from core.injector import StreamingInjector
+
+        injector = StreamingInjector(body_payload=b"P")
+        injector(b"<body></body>")
+
+        assert injector(b"") == [b"P</body>"]
+        assert injector(b"") == []
+
+    @pytest.mark.parametrize("size", [1, 3, 100000])
+    def test_utf16_bom_passes_through(self, size):
+        from core.injector import StreamingInjector
+
+        html = "<html><head></head><body>x</body></html>".encode("utf-16")
+
+        result = _stream(StreamingInjector(b"<!--H-->", b"<!--B-->"), html, size)
+
+        assert result == html
+
+    def test_short_document_is_injected(self):
+        from core.injector import StreamingInjector
+
+        assert _stream(StreamingInjector(b"H", b"B"), b"ab", 1) == b"HabB"
+
+    def test_never_emits_empty_chunk(self):
+        from core.injector import StreamingInjector
+
+        # <head> 대기 중, 6바이트 미만 carry-over, 마지막 </body> 이후 구간 모두 보류됨
+        html = b"<!doctype html>" + self.HTML + b"<!-- after body -->" * 20
+        injector = StreamingInjector(b"<!--H-->", b"<!--B-->")
+        calls = [injector(html[i:i + 3]) for i in range(0, len(html), 3)]
+
+        assert [] in calls
+        assert all(b"" not in chunks for chunks in calls + [injector(b"")])
+
+    @pytest.mark.parametrize("size", [1, 4, 15, 64, 100000])
+    def test_chunked_framing_carries_whole_body(self, size):
+        from core.injector import StreamingInjector
+
+        html = b"<!doctype html>" + self.HTML + b"<!-- after body -->"
+        wire = _chunked(StreamingInjector(b"<!--H-->", b"<!--B-->"), html, size)
+        body, rest = _dechunk(wire)
+
+        assert rest == b""
+        assert body == html.replace(b"<head>", b"<head><!--H-->").replace(b"</body>", b"<!--B--></body>")
+
+
+class TestStreamingInjectorEncoding:
+    """Tests for StreamingInjector output re-encoding."""
+
+    def test_output_is_reencoded(self):
+        import gzip
+        from core.injector import StreamingInjector
+        from core.encoding import make_encoder
+
+        injector = StreamingInjector(b"<!--H-->", b"<!--B-->", encoder=make_encoder("gzip"))
+        html = b"<html><head></head><body>Hi</body></html>"
+        out = _stream(injector, html, 5)
+
+        assert gzip.decompress(out) == b"<html><head><!--H--></head><body>Hi<!--B--></body></html>"
+
+    @pytest.mark.parametrize("encoding", ["gzip", "br", "zstd"])
+    @pytest.mark.parametrize("size", [1, 7, 100000])
+    def test_chunked_framing_reencoded(self, encoding, size):
+        import gzip
+        from core.injector import StreamingInjector
+        from core.encoding import make_encoder
+
+        if encoding == "br":
+            decompress = pytest.importorskip("brotli").decompress
+        elif encoding == "zstd":
+            zstandard = pytest.importorskip("zstandard")
+            decompress = lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+        else:
+            decompress = gzip.decompress
+
+        html = b"<!doctype html><html><head></head><body>" + b"<p>x</p>" * 50 + b"</body><!-- after -->"
+        injector = StreamingInjector(b"<!--H-->", b"<!--B-->", encoder=make_encoder(encoding))
+        body, rest = _dechunk(_chunked(injector, html, size))
+
+        assert rest == b""
+        assert decompress(body) == html.replace(b"<head>", b"<head><!--H-->").replace(b"</body>", b"<!--B--></body>")
+
+    def test_held_back_output_skips_encoder(self):
+        from unittest.mock import MagicMock
+        from core.injector import StreamingInjector
+
+        encoder = MagicMock()
+        injector = StreamingInjector(b"<!--H-->", b"", encoder=encoder)
+
+        assert injector(b"<!doctype") == []
+        encoder.compress.assert_not_called()
+        encoder.flush.assert_not_called()
+
+    def test_finish_only_once(self):
+        from core.injector import StreamingInjector
+        from core.encoding import make_encoder
+
+        injector = StreamingInjector(b"", b"<!--B-->", encoder=make_encoder("gzip"))
+        injector(b"<body></body>")
+        assert injector(b"") != []
+        assert injector(b"") == []
+
+
+class TestInjectScriptPlacement:
+    """Tests for single-pass head/body placement."""
+
+    def test_head_and_body_in_one_call(self):
+        html = b"<html><head><title>T</title></head><body>Content</body></html>"
+        result = inject_script(html, 8000, head_scripts=["h.js"], body_scripts=["b.js"])
+
+        assert result.index(b"<head>") < result.index(b"h.js") < result.index(b"<title>")
+        assert result.index(b"Content") < result.index(b"b.js") < result.index(b"</body>")
+
+    def test_payload_with_backslashes_is_literal(self):
+        html = b"<html><head></head><body></body></html>"
+        result = inject_script(html, 8000, head_scripts=[r"C:\1\x.js"])
+
+        assert b"C:\\1\\x.js" in result
+
+    def test_splice_orders_inserts(self):
+        from core.injector import _splice
+
+        assert _splice(b"abcdef", [(4, b"X"), (1, b"Y")]) == b"aYbcdXef"
+
+
+class TestLegacyCharsetPlacement:
+    """Tests for keeping <meta> charset declarations inside the prescan window."""
+
+    HTML = (
+        b'<html><head><meta charset="euc-kr"><title>\xc7\xd1\xb1\xdb</title></head>'
+        b'<body>\xb3\xbb\xbf\xeb</body></html>'
+    )
+
+    def test_payload_after_meta_charset(self):
+        result = inject_script(self.HTML, 8000, head_scripts=["a.js", "b.js", "c.js"])
+
+        meta = result.index(b'<meta charset="euc-kr">')
+        assert meta == self.HTML.index(b'<meta charset="euc-kr">')
+        assert meta < result.index(b"AIPLUGS_API_PORT") < result.index(b"<title>")
+
+    def test_payload_after_http_equiv(self):
+        html = (
+            b'<html><head>\n<meta http-equiv="Content-Type" content="text/html; charset=shift_jis">'
+            b'<title>T</title></head><body></body></html>'
+        )
+        result = inject_script(html, 8000, head_scripts=["a.js"])
+
+        assert result.index(b"shift_jis") < result.index(b"a.js") < result.index(b"<title>")
+
+    def test_meta_outside_prescan_is_ignored(self):
+        html = b"<html><head>" + b" " * 1100 + b'<meta charset="euc-kr"></head><body></body></html>'
+        result = inject_script(html, 8000)
+
+        assert result.index(b"AIPLUGS_API_PORT") < result.index(b"<meta")
+
+    def test_no_head_does_not_inject_into_header(self):
+        html = b'<html><body><header id="h">x</header></body></html>'
+        result = inject_script(html, 8000)
+
+        assert result.startswith(b"<html>")
+        assert result.index(b"AIPLUGS_API_PORT") < result.index(b"<body>")
+
+    @pytest.mark.parametrize("size", [1, 7, 64, 100000])
+    def test_streaming_matches_buffered(self, size):
+        from core.injector import StreamingInjector, build_payloads, inject_payloads
+
+        payloads = build_payloads(8000, ["a.js", "b.js"], ["c.js"])
+        result = _stream(StreamingInjector(*payloads), self.HTML, size)
+
+        assert result == inject_payloads(self.HTML, *payloads)
+        assert result.index(b'<meta charset="euc-kr">') < result.index(b"a.js")
+
+
+class TestFindBodyEnd:
+    """Tests for reverse </body> search."""
+
+    def test_finds_last_occurrence(self):
+        from core.injector import find_body_end
+
+        html = b"<body><script>var s='</body>';</script></BODY></html>"
+        assert find_body_end(html) == html.rindex(b"</BODY>")
+
+    def test_missing_tag(self):
+        from core.injector import find_body_end
+
+        assert find_body_end(b"<div>no end</div>" * 1000) == -1
+
+    def test_tag_far_from_tail(self):
+        from core.injector import find_body_end
+
+        html = b"<body>x</body>" + b"<!-- trailing -->" * 5000
+        assert find_body_end(html) == html.index(b"</body>")
+
+    def test_tag_across_window_boundary(self):
+        from core.injector import find_body_end, _TAIL_SCAN_START
+
+        tail = b"y" * (_TAIL_SCAN_START - 3)
+        html = b"<body>x</body>" + tail
+        html = b"a" * 100 + html
+        assert find_body_end(html) == html.index(b"</body>")
+
+    @pytest.mark.parametrize("offset", range(-8, 2))
+    def test_tag_across_later_window_boundary(self, offset):
+        from core.injector import find_body_end, _TAIL_SCAN_START
+
+        # 두 번째 이후 구간의 경계에 태그가 걸쳐도 (이미 검사한 구간과 겹치는 부분) 찾아야 함
+        html = b"a" * (_TAIL_SCAN_START * 8) + b"</BODY>" + b"z" * (_TAIL_SCAN_START * 2 + offset)
+        assert find_body_end(html) == html.index(b"</BODY>")
+
+    def test_inject_before_last_body_end(self):
+        html = b"<html><body><script>'</body>'</script>X</body></html>"
+        result = inject_script(html, 8000, body_scripts=["b.js"])
+
+        assert result.index(b"b.js") > result.index(b"X")
+
+
+class TestPayloadCaching:
+    """Tests for memoized loader/payload bytes."""
+
+    def test_loader_script_memoized_per_port(self):
+        assert get_loader_script(8123) is get_loader_script(8123)
+        assert get_loader_script(8123) is not get_loader_script(8124)
+
+    def test_inject_payloads_matches_inject_script(self):
+        from core.injector import build_payloads, inject_payloads
+
+        html = b"<html><head></head><body>X</body></html>"
+        payloads = build_payloads(8000, ["h.js"], ["b.js"])
+
+        assert inject_payloads(html, *payloads) == inject_script(html, 8000, ["h.js"], ["b.js"])
+
+    def test_cache_hit_returns_same_object(self):
+        from core.injector import PayloadCache
+
+        cache = PayloadCache()
+        first = cache.get_or_build(1, ("k",), lambda: (b"h", b"b"))
+        second = cache.get_or_build(1, ("k",), lambda: (b"other", b""))
+
+        assert first is second
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_generation_change_rebuilds(self):
+        from core.injector import PayloadCache
+
+        cache = PayloadCache()
+        cache.get_or_build(1, ("k",), lambda: (b"old", b""))
+
+        assert cache.get_or_build(2, ("k",), lambda: (b"new", b"")) == (b"new", b"")
+
+    def test_bounded_size(self):
+        from core.injector import PayloadCache
+
+        cache = PayloadCache(maxsize=2)
+        for i in range(5):
+            cache.get_or_build(1, (i,), lambda: (b"h", b""))
+
+        assert len(cache._data) <= 2
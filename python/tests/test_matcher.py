@@ -136,3 +136,344 @@ class TestUrlMatcherRealWorldPatterns:
 
     def test_cdn_pattern(self):
         assert UrlMatcher.match("*://*.cdn.example.com/*", "https://static.cdn.example.com/assets/image.png")
+
+
+class TestUrlMatcherCompile:
+    """Tests for pre-parsed CompiledPattern objects."""
+
+    def test_compile_returns_cached_object(self):
+        assert UrlMatcher.compile("https://example.com/*") is UrlMatcher.compile("https://example.com/*")
+
+    def test_compile_invalid_pattern_raises(self):
+        with pytest.raises(ValueError):
+            UrlMatcher.compile("example.com/path")
+
+    def test_compiled_parts(self):
+        compiled = UrlMatcher.compile("*://*.example.com:8080/api/*")
+
+        assert compiled.schemes == {"http", "https"}
+        assert compiled.host_kind == "suffix"
+        assert compiled.host == "example.com"
+        assert compiled.port == "8080"
+        assert compiled.path_kind == "affix"
+
+    @pytest.mark.parametrize("pattern, kind", [
+        ("https://a.com/*", "any"),
+        ("https://a.com", "any"),
+        ("https://a.com/page", "exact"),
+        ("https://a.com/api/*", "affix"),
+        ("https://a.com/*.html", "affix"),
+        ("https://a.com/*/edit/*", "regex"),
+    ])
+    def test_path_strategy(self, pattern, kind):
+        assert UrlMatcher.compile(pattern).path_kind == kind
+
+    def test_regex_path_match(self):
+        compiled = UrlMatcher.compile("https://a.com/*/edit/*")
+
+        assert compiled.matches("https://a.com/doc/edit/1")
+        assert not compiled.matches("https://a.com/doc/view/1")
+
+    def test_suffix_path_match(self):
+        compiled = UrlMatcher.compile("https://a.com/*.html")
+
+        assert compiled.matches("https://a.com/x/index.html")
+        assert not compiled.matches("https://a.com/x/index.php")
+
+    def test_affix_does_not_overlap(self):
+        compiled = UrlMatcher.compile("https://a.com/*/")
+
+        assert compiled.matches("https://a.com/x/")
+        assert not compiled.matches("https://a.com/")
+
+    def test_empty_url_path_treated_as_root(self):
+        assert UrlMatcher.match("https://a.com/*", "https://a.com")
+
+    def test_all_urls_matches_unparsable_url(self):
+        assert UrlMatcher.compile("<all_urls>").match_parts(None)
+
+    def test_match_parts_with_invalid_port(self):
+        compiled = UrlMatcher.compile("https://*/*")
+        assert UrlMatcher.parse_url("https://example.com:notaport/") is None
+        assert not compiled.matches("https://example.com:notaport/")
+
+
+class TestMatchIndex:
+    """Tests for the precompiled host-keyed match index."""
+
+    def test_exact_host_lookup(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        index = MatchIndex.build({"p1": create_plugin_context((["https://example.com/*"], ["a.js"]))})
+
+        assert index.lookup("https://example.com/page").matched_pids == ["p1"]
+        assert index.lookup("https://other.com/page").matched_pids == []
+
+    def test_wildcard_host_lookup(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        index = MatchIndex.build({"p1": create_plugin_context((["*://*.example.com/*"], ["a.js"]))})
+
+        assert index.lookup("https://example.com/").matched_pids == ["p1"]
+        assert index.lookup("https://deep.sub.example.com/x").matched_pids == ["p1"]
+        assert index.lookup("https://notexample.com/").matched_pids == []
+        assert index.lookup("https://example.com.evil.org/").matched_pids == []
+
+    def test_catch_all_lookup(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        index = MatchIndex.build({
+            "all": create_plugin_context((["<all_urls>"], ["a.js"])),
+            "star": create_plugin_context((["*://*/*"], ["b.js"])),
+        })
+
+        assert index.lookup("https://anything.org/").matched_pids == ["all", "star"]
+
+    def test_candidates_limited_to_host(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        plugins = {f"p{i}": create_plugin_context(([f"https://site{i}.com/*"], ["a.js"])) for i in range(50)}
+        index = MatchIndex.build(plugins)
+
+        assert index.size == 50
+        assert len(index.candidates("site7.com")) == 1
+        assert index.candidates("unknown.com") == []
+
+    def test_returns_matching_blocks_only(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        ctx = create_plugin_context(
+            (["https://example.com/api/*"], ["api.js"]),
+            (["https://example.com/*"], ["all.js"]),
+        )
+        index = MatchIndex.build({"p1": ctx})
+
+        result = index.lookup("https://example.com/home")
+        assert [block.js for _, block in result.blocks] == [["all.js"]]
+
+        result = index.lookup("https://example.com/api/users")
+        assert [block.js for _, block in result.blocks] == [["api.js"], ["all.js"]]
+        assert result.matched_pids == ["p1"]
+
+    def test_block_reported_once_for_multiple_patterns(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        ctx = create_plugin_context((["*://*.example.com/*", "<all_urls>"], ["a.js"]))
+        index = MatchIndex.build({"p1": ctx})
+
+        result = index.lookup("https://www.example.com/")
+        assert len(result.blocks) == 1
+
+    def test_invalid_pattern_ignored(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        index = MatchIndex.build({"p1": create_plugin_context((["example.com/path"], ["a.js"]))})
+
+        assert index.size == 0
+        assert not index.lookup("https://example.com/path")
+
+    def test_agrees_with_url_matcher(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        patterns = [
+            "<all_urls>", "http://*/*", "*://*.google.com/*", "http://localhost:3000/*",
+            "https://example.com/api/*", "https://example.com/page", "http://localhost:*/*",
+        ]
+        urls = [
+            "https://www.google.com/search?q=1", "http://localhost:3000/x", "http://localhost/x",
+            "https://example.com/api/v1", "https://example.com/page", "ftp://example.com/",
+            "not a url at all",
+        ]
+        for pattern in patterns:
+            index = MatchIndex.build({"p": create_plugin_context(([pattern], ["a.js"]))})
+            for url in urls:
+                assert bool(index.lookup(url)) == UrlMatcher.match(pattern, url), (pattern, url)
+
+
+class TestMatchCache:
+    """Tests for the URL -> MatchResult LRU cache."""
+
+    def test_miss_then_hit(self):
+        from core.matcher import MatchCache, MatchResult
+
+        cache = MatchCache(maxsize=4)
+        result = MatchResult()
+
+        assert cache.get("https://a.com/", 1) is None
+        cache.put("https://a.com/", 1, result)
+        assert cache.get("https://a.com/", 1) is result
+
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+
+    def test_key_ignores_query_and_fragment(self):
+        from core.matcher import MatchCache, MatchResult
+
+        cache = MatchCache()
+        result = MatchResult()
+        cache.put("https://a.com/page?x=1#top", 1, result)
+
+        assert cache.get("https://a.com/page?y=2", 1) is result
+        assert cache.get("https://a.com/other", 1) is None
+
+    def test_generation_change_invalidates(self):
+        from core.matcher import MatchCache, MatchResult
+
+        cache = MatchCache()
+        cache.put("https://a.com/", 1, MatchResult())
+
+        assert cache.get("https://a.com/", 2) is None
+        assert cache.stats()["size"] == 0
+
+    def test_stale_put_ignored(self):
+        from core.matcher import MatchCache, MatchResult
+
+        cache = MatchCache()
+        cache.get("https://a.com/", 2)
+        cache.put("https://a.com/", 1, MatchResult())
+
+        assert cache.stats()["size"] == 0
+
+    def test_evicts_least_recently_used(self):
+        from core.matcher import MatchCache, MatchResult
+
+        cache = MatchCache(maxsize=2)
+        cache.put("https://a.com/", 1, MatchResult())
+        cache.put("https://b.com/", 1, MatchResult())
+        cache.get("https://a.com/", 1)
+        cache.put("https://c.com/", 1, MatchResult())
+
+        assert cache.get("https://a.com/", 1) is not None
+        assert cache.get("https://b.com/", 1) is None
+
+    def test_result_injections(self):
+        from core.matcher import MatchResult
+        from unittest.mock import MagicMock
+
+        block = MagicMock(js=["a.js", "b.js"], run_at="document_start")
+        result = MatchResult([("p1", block)])
+
+        assert result.injections == [
+            ("plugins/p1/a.js", "document_start"),
+            ("plugins/p1/b.js", "document_start"),
+        ]
+        assert result.injections is result.injections
+
+
+class TestHostMatches:
+    """Tests for host glob matching (ssl_passthrough)."""
+
+    def test_wildcard_subdomain(self):
+        from core.matcher import host_matches
+        assert host_matches("www.bank.co.kr", ["*.bank.co.kr"]) is True
+
+    def test_wildcard_includes_apex(self):
+        from core.matcher import host_matches
+        assert host_matches("bank.co.kr", ["*.bank.co.kr"]) is True
+
+    def test_exact_and_case(self):
+        from core.matcher import host_matches
+        assert host_matches("LocalHost", ["localhost"]) is True
+
+    def test_no_match(self):
+        from core.matcher import host_matches
+        assert host_matches("notbank.co.kr", ["*.bank.co.kr"]) is False
+        assert host_matches("", ["*"]) is False
+
+
+class TestCouldMatchHost:
+    """Tests for host-level candidate checks."""
+
+    def test_exact_and_wildcard_hosts(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        index = MatchIndex.build({
+            "p1": create_plugin_context((["https://example.com/app/*"], ["a.js"])),
+            "p2": create_plugin_context((["*://*.test.org/*"], ["b.js"])),
+        })
+
+        assert index.could_match_host("example.com") is True
+        assert index.could_match_host("EXAMPLE.com.") is True
+        assert index.could_match_host("a.b.test.org") is True
+        assert index.could_match_host("other.com") is False
+
+    def test_catch_all_matches_every_host(self, create_plugin_context):
+        from core.matcher import MatchIndex
+
+        index = MatchIndex.build({"p1": create_plugin_context((["<all_urls>"], ["a.js"]))})
+
+        assert index.could_match_host("anything.net") is True
+
+    def test_empty_index(self):
+        from core.matcher import MatchIndex
+
+        assert MatchIndex.build({}).could_match_host("example.com") is False
+
+
+class TestHostDecisionCache:
+    """Tests for the per-host TLS interception decision cache."""
+
+    def test_put_and_get(self):
+        from core.matcher import HostDecisionCache
+
+        cache = HostDecisionCache()
+        cache.put("example.com", 1, False)
+
+        assert cache.get("example.com", 1) is False
+        assert cache.get("other.com", 1) is None
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_expires_after_ttl(self):
+        from unittest.mock import patch
+        from core.matcher import HostDecisionCache
+
+        cache = HostDecisionCache(ttl=10)
+        with patch('core.cache.time.monotonic', return_value=100.0):
+            cache.put("example.com", 1, True)
+        with patch('core.cache.time.monotonic', return_value=105.0):
+            assert cache.get("example.com", 1) is True
+        with patch('core.cache.time.monotonic', return_value=111.0):
+            assert cache.get("example.com", 1) is None
+
+    def test_new_generation_clears(self):
+        from core.matcher import HostDecisionCache
+
+        cache = HostDecisionCache()
+        cache.put("example.com", 1, False)
+
+        assert cache.get("example.com", 2) is None
+        assert cache.stats()["size"] == 0
+
+    def test_stale_put_ignored(self):
+        from core.matcher import HostDecisionCache
+
+        cache = HostDecisionCache()
+        cache.get("example.com", 2)
+        cache.put("example.com", 1, False)
+
+        assert cache.get("example.com", 2) is None
+
+    def test_evicts_oldest(self):
+        from core.matcher import HostDecisionCache
+
+        cache = HostDecisionCache(maxsize=2)
+        for host in ("a.com", "b.com", "c.com"):
+            cache.put(host, 1, True)
+
+        assert cache.get("a.com", 1) is None
+        assert cache.get("c.com", 1) is True
+
+    def test_record_counters(self):
+        from core.matcher import HostDecisionCache
+
+        cache = HostDecisionCache()
+        cache.record(True)
+        cache.record(False)
+        cache.record(False)
+
+        stats = cache.stats()
+        assert stats["intercepted"] == 1
+        assert stats["passed_through"] == 2
+        assert stats["passthrough_ratio"] == pytest.approx(2 / 3, abs=1e-4)
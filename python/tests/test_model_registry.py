@@ -0,0 +1,157 @@
+"""
+Tests for core/model_registry.py - Manifest-driven model registry.
+"""
+import os
+import json
+import hashlib
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+def _plugins(*models, plugin_id="p1"):
+    from core.schemas import ModelRequirement
+
+    ctx = MagicMock()
+    ctx.manifest.inference.models = [ModelRequirement(**model) for model in models]
+    return {plugin_id: ctx}
+
+
+def _model(key="MODEL_A", **overrides):
+    model = {"key": key, "filename": f"{key.lower()}.pt", "input": {"width": 230, "height": 70}}
+    model.update(overrides)
+    return model
+
+
+@pytest.fixture
+def registry(tmp_path):
+    from core.model_registry import ModelRegistry
+
+    with patch.dict(os.environ, {"MODEL_A": "", "MODEL_B": ""}):
+        yield ModelRegistry(str(tmp_path))
+
+
+class TestModelRegistry:
+    """Tests for registration, lookup and sha256 verification."""
+
+    def test_records_geometry_and_runtime(self, registry, tmp_path):
+        (tmp_path / "model_a.pt").write_bytes(b"weights")
+        registry.sync(_plugins(_model(runtime={"variant": "int8", "workers": 2})))
+
+        spec = registry.get("MODEL_A")
+
+        assert (spec["width"], spec["height"], spec["architecture"]) == (230, 70, "crnn")
+        assert (spec["runtime"], spec["torchscript"], spec["workers"]) == ("int8", True, 2)
+        assert spec["path"] == str(tmp_path / "model_a.pt")
+        assert spec["sha256"] == hashlib.sha256(b"weights").hexdigest()
+
+    def test_unknown_model_fails_fast(self, registry):
+        registry.sync(_plugins(_model()))
+
+        with pytest.raises(KeyError, match="Unknown model: MODEL_B"):
+            registry.get("MODEL_B")
+
+    def test_missing_geometry_is_not_registered(self, registry):
+        registry.sync(_plugins({"key": "MODEL_A", "filename": "model_a.pt"}))
+
+        assert "MODEL_A" not in registry
+        with pytest.raises(KeyError, match="input geometry"):
+            registry.get("MODEL_A")
+
+    def test_unsupported_architecture_is_not_registered(self, registry):
+        registry.sync(_plugins(_model(architecture="resnet")))
+
+        assert "MODEL_A" not in registry
+
+    def test_missing_file(self, registry):
+        registry.sync(_plugins(_model()))
+
+        with pytest.raises(FileNotFoundError):
+            registry.get("MODEL_A")
+
+    def test_sha256_mismatch(self, registry, tmp_path):
+        (tmp_path / "model_a.pt").write_bytes(b"weights")
+        registry.sync(_plugins(_model(sha256="0" * 64)))
+
+        with pytest.raises(ValueError, match="sha256 mismatch"):
+            registry.get("MODEL_A")
+
+    def test_sha256_match_is_case_insensitive(self, registry, tmp_path):
+        (tmp_path / "model_a.pt").write_bytes(b"weights")
+        digest = hashlib.sha256(b"weights").hexdigest().upper()
+        registry.sync(_plugins(_model(sha256=digest)))
+
+        assert registry.get("MODEL_A")["sha256"] == digest.lower()
+
+    def test_hash_cached_until_file_changes(self, registry, tmp_path):
+        path = tmp_path / "model_a.pt"
+        path.write_bytes(b"weights")
+        registry.sync(_plugins(_model()))
+
+        with patch('core.model_registry.hashlib.sha256', wraps=hashlib.sha256) as mock_sha:
+            first = registry.get("MODEL_A")["sha256"]
+            registry.get("MODEL_A")
+            assert mock_sha.call_count == 0  # sync 시점에 이미 계산됨
+
+            path.write_bytes(b"new weights!")
+            os.utime(path, ns=(1, 1))
+            second = registry.get("MODEL_A")["sha256"]
+
+        assert mock_sha.call_count == 1
+        assert first != second
+
+    def test_cached_only_does_not_hash(self, registry, tmp_path):
+        path = tmp_path / "model_a.pt"
+        path.write_bytes(b"weights")
+        registry.sync(_plugins(_model()))
+
+        assert registry.get("MODEL_A", cached_only=True)["sha256"] == hashlib.sha256(b"weights").hexdigest()
+
+        path.write_bytes(b"new weights!")
+        os.utime(path, ns=(1, 1))
+        with patch('core.model_registry.hashlib.sha256', wraps=hashlib.sha256) as mock_sha:
+            assert registry.get("MODEL_A", cached_only=True) is None
+        assert mock_sha.call_count == 0
+        with pytest.raises(KeyError):
+            registry.get("MODEL_B", cached_only=True)
+
+    def test_env_var_overrides_path(self, registry, tmp_path):
+        other = tmp_path / "elsewhere.pt"
+        other.write_bytes(b"weights")
+        registry.sync(_plugins(_model()))
+
+        with patch.dict(os.environ, {"MODEL_A": str(other)}):
+            assert registry.get("MODEL_A")["path"] == str(other)
+
+    def test_first_declaration_wins(self, registry):
+        plugins = {
+            **_plugins(_model(input={"width": 100, "height": 32}), plugin_id="p1"),
+            **_plugins(_model(input={"width": 200, "height": 64}), plugin_id="p2"),
+        }
+        registry.sync(plugins)
+
+        assert registry._specs["MODEL_A"]["width"] == 100
+
+    def test_sync_skipped_for_same_generation(self, registry):
+        assert registry.sync(_plugins(_model("MODEL_A")), generation=1) is True
+        assert registry.sync(_plugins(_model("MODEL_B")), generation=1) is False
+
+        assert registry.keys() == ["MODEL_A"]
+
+        assert registry.sync(_plugins(_model("MODEL_B")), generation=2) is True
+
+        assert registry.keys() == ["MODEL_B"]
+
+    def test_bundled_captcha_manifest(self, registry):
+        from core.schemas import PluginManifest
+
+        path = os.path.join(os.path.dirname(__file__), "../../plugins/captcha_solver/manifest.json")
+        with open(path, encoding="utf-8") as f:
+            manifest = PluginManifest(**json.load(f))
+        ctx = MagicMock(manifest=manifest)
+
+        registry.sync({"captcha_solver": ctx})
+
+        melon = registry._specs["MODEL_MELON"]
+        nol = registry._specs["MODEL_NOL"]
+        assert (melon["width"], melon["height"]) == (230, 70)
+        assert (nol["width"], nol["height"]) == (210, 70)
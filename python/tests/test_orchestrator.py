@@ -137,6 +137,29 @@ class TestRunMitmproxy:
         mock_options.Options.assert_called_once_with(listen_host='127.0.0.1', listen_port=8080)
         mock_master_instance.run.assert_called_once()
 
+    @pytest.mark.asyncio
+    @patch('core.orchestrator.collect_plugin_hosts', return_value=["example.com"])
+    @patch('core.orchestrator.CertWarmupAddon')
+    @patch('core.orchestrator.DumpMaster')
+    @patch('core.orchestrator.options')
+    @patch('core.orchestrator.AiPlugsAddon')
+    @patch('core.orchestrator.SystemProxy')
+    async def test_adds_cert_warmup_addon(self, mock_proxy, mock_addon, mock_options, mock_master,
+                                          mock_warmup, mock_hosts):
+        from core.orchestrator import SystemOrchestrator
+
+        mock_master_instance = MagicMock()
+        mock_master_instance.run = AsyncMock()
+        mock_master.return_value = mock_master_instance
+
+        orch = SystemOrchestrator(api_port=8000, proxy_port=8080)
+        orch.settings = {"proxy": {"cert_cache": {"dir": "/tmp/certs"}}}
+
+        await orch.run_mitmproxy()
+
+        mock_warmup.assert_called_once_with(["example.com"], "/tmp/certs")
+        mock_master_instance.addons.add.assert_any_call(mock_warmup.return_value)
+
 
 class TestStartApiServer:
     """Tests for start_api_server method."""
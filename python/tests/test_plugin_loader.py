@@ -92,6 +92,57 @@ class TestPluginLoaderLoadPlugins:
 
         assert "test_plugin_1" in loader.plugins
 
+    def test_load_plugins_builds_match_index(self, create_temp_plugin, temp_plugins_dir, monkeypatch):
+        from core.plugin_loader import PluginLoader
+
+        PluginLoader._instance = None
+        loader = PluginLoader()
+
+        create_temp_plugin("indexed_plugin", manifest_overrides={
+            "content_scripts": [{"matches": ["*://*.example.com/*"], "js": ["content.js"]}]
+        })
+
+        monkeypatch.setattr(loader, 'plugins_dir', str(temp_plugins_dir))
+        loader.plugins = {}
+        loader.load_plugins({"active_plugins": ["indexed_plugin"]})
+
+        assert loader.match_url("https://www.example.com/").matched_pids == ["indexed_plugin"]
+        assert loader.match_url("https://other.com/").matched_pids == []
+
+    def test_match_url_uses_cache(self, create_temp_plugin, temp_plugins_dir, monkeypatch):
+        from core.plugin_loader import PluginLoader
+
+        PluginLoader._instance = None
+        loader = PluginLoader()
+
+        create_temp_plugin("cached_plugin")
+        monkeypatch.setattr(loader, 'plugins_dir', str(temp_plugins_dir))
+        loader.load_plugins({"active_plugins": ["cached_plugin"]})
+
+        first = loader.match_url("https://www.example.com/page")
+        second = loader.match_url("https://www.example.com/page")
+
+        assert first is second
+        assert loader.match_cache.stats()["hits"] == 1
+
+    def test_replacing_plugins_invalidates_cache(self, create_temp_plugin, temp_plugins_dir, monkeypatch):
+        from core.plugin_loader import PluginLoader
+
+        PluginLoader._instance = None
+        loader = PluginLoader()
+
+        create_temp_plugin("cached_plugin")
+        monkeypatch.setattr(loader, 'plugins_dir', str(temp_plugins_dir))
+        loader.load_plugins({"active_plugins": ["cached_plugin"]})
+        generation = loader.generation
+
+        assert loader.match_url("https://www.example.com/").matched_pids == ["cached_plugin"]
+
+        loader.plugins = {}
+
+        assert loader.generation == generation + 1
+        assert loader.match_url("https://www.example.com/").matched_pids == []
+
     def test_load_plugins_respects_active_plugins(self, create_temp_plugin, temp_plugins_dir, monkeypatch):
         from core.plugin_loader import PluginLoader
 
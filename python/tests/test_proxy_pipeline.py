@@ -177,48 +177,85 @@ class TestPluginMatcher:
     @patch('core.proxy_pipeline.plugin_loader')
     def test_matches_plugins_to_url(self, mock_loader):
         from core.proxy_pipeline import PluginMatcher
+        from core.matcher import MatchIndex
 
         # Setup mock plugin
         mock_ctx = MagicMock()
         mock_ctx.manifest.content_scripts = [
             MagicMock(matches=["<all_urls>"])
         ]
-        mock_loader.plugins = {"test_plugin": mock_ctx}
+        mock_loader.match_url.side_effect = MatchIndex.build({"test_plugin": mock_ctx}).lookup
 
         handler = PluginMatcher()
         flow = MagicMock()
         flow.request.url = "https://example.com/page"
         context = {}
 
-        with patch('core.proxy_pipeline.UrlMatcher') as mock_matcher:
-            mock_matcher.match.return_value = True
-            result = handler.process(flow, context)
+        result = handler.process(flow, context)
 
         assert result is True
         assert "test_plugin" in context.get('matched_pids', [])
+        assert [pid for pid, _ in context['matched_blocks']] == ["test_plugin"]
 
     @patch('core.proxy_pipeline.plugin_loader')
     def test_no_matching_plugins(self, mock_loader):
         from core.proxy_pipeline import PluginMatcher
+        from core.matcher import MatchIndex
 
         mock_ctx = MagicMock()
         mock_ctx.manifest.content_scripts = [
             MagicMock(matches=["https://specific.com/*"])
         ]
-        mock_loader.plugins = {"test_plugin": mock_ctx}
+        mock_loader.match_url.side_effect = MatchIndex.build({"test_plugin": mock_ctx}).lookup
 
         handler = PluginMatcher()
         flow = MagicMock()
         flow.request.url = "https://other.com/page"
         context = {}
 
-        with patch('core.proxy_pipeline.UrlMatcher') as mock_matcher:
-            mock_matcher.match.return_value = False
-            result = handler.process(flow, context)
+        result = handler.process(flow, context)
 
-        assert result is True
+        # 매칭이 없으면 이후 단계(Decoder 등)를 실행하지 않음
+        assert result is False
         assert context.get('matched_pids', []) == []
 
+    @patch('core.proxy_pipeline.plugin_loader')
+    def test_matched_pids_keep_plugin_order(self, mock_loader):
+        from core.proxy_pipeline import PluginMatcher
+        from core.matcher import MatchIndex
+
+        first = MagicMock()
+        first.manifest.content_scripts = [MagicMock(matches=["*://*.example.com/*"])]
+        second = MagicMock()
+        second.manifest.content_scripts = [MagicMock(matches=["<all_urls>"])]
+        mock_loader.match_url.side_effect = MatchIndex.build({"first": first, "second": second}).lookup
+
+        handler = PluginMatcher()
+        flow = MagicMock()
+        flow.request.url = "https://www.example.com/page"
+        context = {}
+
+        handler.process(flow, context)
+
+        assert context['matched_pids'] == ["first", "second"]
+
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    def test_iframe_keeps_only_all_frames_blocks(self, mock_loader):
+        from core.proxy_pipeline import PluginMatcher
+        from core.matcher import MatchResult
+
+        top_only = MagicMock(all_frames=False)
+        mock_loader.match_url.return_value = MatchResult([("p1", top_only)])
+
+        handler = PluginMatcher()
+        flow = MagicMock()
+        flow.request.url = "https://example.com/frame"
+        context = {'is_iframe': True}
+
+        assert handler.process(flow, context) is False
+        assert context['matched_blocks'] == ()
+
 
 class TestInjector:
     """Tests for Injector handler."""
@@ -229,36 +266,155 @@ class TestInjector:
         handler = Injector(api_port=8000)
         assert handler.api_port == 8000
 
-    @patch('core.proxy_pipeline.plugin_loader')
-    @patch('core.proxy_pipeline.get_loader_script')
-    def test_injects_scripts_for_matched_plugins(self, mock_loader_script, mock_loader):
+    def test_injects_scripts_for_matched_plugins(self):
         from core.proxy_pipeline import Injector
 
-        mock_loader_script.return_value = b"<script>loader</script>"
-
-        mock_ctx = MagicMock()
-        mock_ctx.manifest.content_scripts = [
-            MagicMock(
-                matches=["<all_urls>"],
-                js=["content.js"],
-                all_frames=False
-            )
-        ]
-        mock_loader.get_plugin.return_value = mock_ctx
+        block = MagicMock(
+            matches=["<all_urls>"],
+            js=["content.js"],
+            all_frames=False
+        )
 
         handler = Injector(api_port=8000)
         flow = MagicMock()
         flow.request.url = "https://example.com/page"
-        flow.response.text = "<html><body>Content</body></html>"
-        flow.response.headers = {"Cache-Control": "max-age=3600"}
-        context = {'matched_pids': ['test_plugin']}
+        flow.response.content = b"<html><body>Content</body></html>"
+        flow.response.headers = {"Content-Type": "text/html", "Cache-Control": "max-age=3600"}
+        context = {'matched_pids': ['test_plugin'], 'matched_blocks': (("test_plugin", block),)}
 
-        with patch('core.proxy_pipeline.UrlMatcher') as mock_matcher:
-            mock_matcher.match.return_value = True
-            result = handler.process(flow, context)
+        result = handler.process(flow, context)
 
         assert result is True
         assert context.get('injected') is True
+        assert b"/plugins/test_plugin/content.js" in flow.response.content
+        assert "Cache-Control" not in flow.response.headers
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    def test_does_not_rematch_url(self, mock_loader):
+        from core.proxy_pipeline import Injector
+
+        block = MagicMock(js=["content.js"], all_frames=False)
+
+        handler = Injector(api_port=8000)
+        flow = MagicMock()
+        flow.response.content = b"<html><body>Content</body></html>"
+        flow.response.headers = {}
+        context = {'matched_pids': ['p1'], 'matched_blocks': (("p1", block),)}
+
+        handler.process(flow, context)
+
+        mock_loader.match_url.assert_not_called()
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    def test_iframe_injects_only_all_frames_blocks(self, mock_loader):
+        from core.proxy_pipeline import PluginMatcher, Injector
+        from core.matcher import MatchResult
+
+        top_only = MagicMock(js=["top.js"], all_frames=False)
+        all_frames = MagicMock(js=["frame.js"], all_frames=True)
+        mock_loader.generation = 1
+        mock_loader.match_url.return_value = MatchResult([("p1", top_only), ("p1", all_frames)])
+
+        flow = MagicMock()
+        flow.request.url = "https://example.com/frame"
+        flow.response.content = b"<html><body>Content</body></html>"
+        flow.response.headers = {}
+        context = {'is_iframe': True}
+
+        assert PluginMatcher().process(flow, context) is True
+        Injector(api_port=8000).process(flow, context)
+
+        assert b"frame.js" in flow.response.content
+        assert b"top.js" not in flow.response.content
+
+    def test_uses_matched_blocks_as_given(self):
+        from core.proxy_pipeline import Injector
+
+        # matched_blocks 는 PluginMatcher 가 이미 iframe 기준으로 걸러 둔 목록
+        block = MagicMock(js=["content.js"], all_frames=False)
+
+        assert Injector(api_port=8000)._collect_scripts({'is_iframe': True, 'matched_blocks': (("p1", block),)}) == (
+            [], ["http://127.0.0.1:8000/plugins/p1/content.js"]
+        )
+
+    def test_injects_on_bytes_without_text_roundtrip(self, create_flow):
+        from core.proxy_pipeline import Injector
+
+        html = "<html><head></head><body>한글 페이지</body></html>".encode("euc-kr")
+        flow = create_flow(content=html, content_type="text/html; charset=euc-kr")
+        block = MagicMock(js=["content.js"], all_frames=False)
+        context = {'matched_pids': ['p1'], 'matched_blocks': (("p1", block),)}
+
+        Injector(api_port=8000).process(flow, context)
+
+        body = flow.response.content
+        # 원본 바이트는 그대로 보존되고 Loader 는 <head>, 스크립트는 </body> 앞에 위치
+        assert "한글 페이지".encode("euc-kr") in body
+        assert body.index(b"AIPLUGS_API_PORT") < body.index(b"</head>")
+        assert body.index(b"content.js") < body.index(b"</body>")
+
+    def test_routes_document_start_to_head(self):
+        from core.proxy_pipeline import Injector
+
+        start = MagicMock(js=["start.js"], all_frames=False, run_at="document_start")
+        idle = MagicMock(js=["idle.js"], all_frames=False, run_at="document_idle")
+
+        flow = MagicMock()
+        flow.response.content = b"<html><head><script src='page.js'></script></head><body>X</body></html>"
+        flow.response.headers = {"Content-Type": "text/html"}
+        context = {'matched_pids': ['p1'], 'matched_blocks': (("p1", start), ("p1", idle))}
+
+        Injector(api_port=8000).process(flow, context)
+
+        body = flow.response.content
+        assert body.index(b"AIPLUGS_API_PORT") < body.index(b"start.js") < body.index(b"page.js")
+        assert body.index(b"X") < body.index(b"idle.js") < body.index(b"</body>")
+
+    def test_reuses_payload_for_same_blocks(self):
+        from core.proxy_pipeline import Injector
+
+        block = MagicMock(js=["content.js"], all_frames=False)
+        handler = Injector(api_port=8000)
+
+        for url in ["https://example.com/a", "https://example.com/b"]:
+            flow = MagicMock()
+            flow.request.url = url
+            flow.response.content = b"<html><body>X</body></html>"
+            flow.response.headers = {"Content-Type": "text/html"}
+            handler.process(flow, {'generation': 1, 'matched_pids': ['p1'], 'matched_blocks': (("p1", block),)})
+
+        assert handler.payload_cache.misses == 1
+        assert handler.payload_cache.hits == 1
+
+    def test_utf16_falls_back_to_text(self, create_flow):
+        from core.proxy_pipeline import Injector
+
+        flow = create_flow(content_type="text/html; charset=utf-16")
+        flow.response.text = "<html><head></head><body>Content</body></html>"
+        block = MagicMock(js=["content.js"], all_frames=False)
+        context = {'matched_pids': ['p1'], 'matched_blocks': (("p1", block),)}
+
+        Injector(api_port=8000).process(flow, context)
+
+        assert flow.response.content.decode("utf-16").count("content.js") == 1
+        assert "content.js" in flow.response.text
+
+    def test_utf16_bom_without_charset(self, create_flow):
+        from core.proxy_pipeline import Injector
+
+        html = b"\xfe\xff" + "<html><head></head><body>한글</body></html>".encode("utf-16-be")
+        flow = create_flow(content=html)
+        block = MagicMock(js=["content.js"], all_frames=False)
+        context = {'matched_pids': ['p1'], 'matched_blocks': (("p1", block),)}
+
+        Injector(api_port=8000).process(flow, context)
+
+        content = flow.response.content
+        assert content.startswith(b"\xfe\xff")
+        text = content[2:].decode("utf-16-be")
+        assert text.startswith("<html><head>")
+        assert "/plugins/p1/content.js\"></script></body>" in text
+        assert "한글" in text
 
     def test_no_injection_without_matches(self):
         from core.proxy_pipeline import Injector
@@ -274,6 +430,156 @@ class TestInjector:
         assert context.get('injected') is None
 
 
+class TestStreamInjector:
+    """Tests for StreamInjector (responseheaders-phase) handler."""
+
+    def _context(self):
+        block = MagicMock(js=["content.js"], all_frames=False)
+        return {'matched_pids': ['p1'], 'matched_blocks': (("p1", block),)}
+
+    def test_sets_stream_callback(self, create_flow):
+        from core.proxy_pipeline import StreamInjector
+        from core.injector import StreamingInjector
+
+        flow = create_flow()
+        context = self._context()
+
+        assert StreamInjector(api_port=8000).process(flow, context) is True
+        assert isinstance(flow.response.stream, StreamingInjector)
+        assert context['streamed'] is True
+
+    def test_rewrites_headers(self, create_flow):
+        from core.proxy_pipeline import StreamInjector
+
+        flow = create_flow(
+            content_encoding="gzip",
+            content_length="100",
+            cache_control="max-age=60",
+            content_security_policy="default-src 'self'",
+        )
+
+        StreamInjector(api_port=8000).process(flow, self._context())
+
+        headers = flow.response.headers
+        assert "Content-Encoding" not in headers
+        assert "Content-Length" not in headers
+        assert "Cache-Control" not in headers
+        assert "Content-Security-Policy" not in headers
+        assert headers["Transfer-Encoding"] == "chunked"
+
+    @pytest.mark.parametrize("client, upstream, chunked", [
+        ("HTTP/1.1", "HTTP/1.1", True),
+        ("HTTP/1.1", "HTTP/2.0", True),
+        ("HTTP/2.0", "HTTP/1.1", False),
+        ("HTTP/1.0", "HTTP/1.1", False),
+    ])
+    def test_chunked_follows_client_http_version(self, client, upstream, chunked, create_flow):
+        from core.proxy_pipeline import StreamInjector
+
+        flow = create_flow()
+        flow.request.http_version = client
+        flow.response.http_version = upstream
+
+        StreamInjector(api_port=8000).process(flow, self._context())
+
+        assert ("Transfer-Encoding" in flow.response.headers) is chunked
+
+    def test_setup_failure_leaves_headers_untouched(self, create_flow):
+        from core.proxy_pipeline import StreamInjector, OutputEncoder
+
+        flow = create_flow(accept_encoding="gzip", content_encoding="gzip", content_length="100", etag='"abc"')
+        original = flow.response.headers.copy()
+
+        with patch('core.proxy_pipeline.StreamingInjector', side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError):
+                StreamInjector(api_port=8000, output_encoder=OutputEncoder()).process(flow, self._context())
+
+        assert flow.response.headers == original
+        assert not flow.response.stream
+
+    def test_streamed_output_contains_scripts(self, create_flow):
+        import gzip
+        from core.proxy_pipeline import StreamInjector
+
+        flow = create_flow(content_encoding="gzip")
+        StreamInjector(api_port=8000).process(flow, self._context())
+
+        body = gzip.compress(b"<html><body>Hi</body></html>")
+        out = b"".join(flow.response.stream(body[:10]) + flow.response.stream(body[10:]) + flow.response.stream(b""))
+
+        assert b"/plugins/p1/content.js" in out
+        assert out.endswith(b"</body></html>")
+
+    def test_streamed_document_start_goes_to_head(self, create_flow):
+        from core.proxy_pipeline import StreamInjector
+
+        flow = create_flow()
+        start = MagicMock(js=["start.js"], all_frames=False, run_at="document_start")
+        StreamInjector(api_port=8000).process(flow, {'matched_blocks': (("p1", start),)})
+
+        html = b"<html><head><script src='page.js'></script></head><body>Hi</body></html>"
+        out = b"".join(flow.response.stream(html) + flow.response.stream(b""))
+
+        assert out.index(b"start.js") < out.index(b"page.js")
+
+    def test_recompresses_for_client(self, create_flow):
+        import gzip
+        from core.proxy_pipeline import StreamInjector, OutputEncoder
+
+        flow = create_flow(accept_encoding="gzip", content_encoding="gzip")
+        StreamInjector(api_port=8000, output_encoder=OutputEncoder()).process(flow, self._context())
+
+        assert flow.response.headers["Content-Encoding"] == "gzip"
+        assert flow.response.headers["Vary"] == "Accept-Encoding"
+
+        body = gzip.compress(b"<html><body>Hi</body></html>")
+        out = b"".join(flow.response.stream(body[:10]) + flow.response.stream(body[10:]) + flow.response.stream(b""))
+
+        assert b"/plugins/p1/content.js" in gzip.decompress(out)
+
+    def test_declines_unsupported_encoding(self, create_flow):
+        from core.proxy_pipeline import StreamInjector
+
+        flow = create_flow(content_encoding="compress")
+
+        assert StreamInjector(api_port=8000).process(flow, self._context()) is False
+        assert not flow.response.stream
+
+    @pytest.mark.parametrize("status, method, length", [
+        (304, "GET", None), (204, "GET", None), (101, "GET", None), (200, "HEAD", None), (200, "GET", "0"),
+    ])
+    def test_declines_bodiless_responses(self, status, method, length, create_flow):
+        from core.proxy_pipeline import StreamInjector
+
+        flow = create_flow()
+        flow.request.method = method
+        flow.response.status_code = status
+        flow.response.headers["ETag"] = '"abc"'
+        if length is not None:
+            flow.response.headers["Content-Length"] = length
+        context = self._context()
+
+        assert StreamInjector(api_port=8000).process(flow, context) is False
+        assert context['passthrough'] is True
+        assert not flow.response.stream
+        assert flow.response.headers["ETag"] == '"abc"'
+        assert "Transfer-Encoding" not in flow.response.headers
+
+    def test_declines_utf16(self, create_flow):
+        from core.proxy_pipeline import StreamInjector
+
+        flow = create_flow(content_type="text/html; charset=utf-16")
+
+        assert StreamInjector(api_port=8000).process(flow, self._context()) is False
+
+    def test_declines_without_scripts(self, create_flow):
+        from core.proxy_pipeline import StreamInjector
+
+        flow = create_flow()
+
+        assert StreamInjector(api_port=8000).process(flow, {'matched_blocks': ()}) is False
+
+
 class TestHeaderNormalizer:
     """Tests for HeaderNormalizer handler."""
 
@@ -336,3 +642,76 @@ class TestHeaderNormalizer:
         result = handler.process(flow, context)
 
         assert result is True
+
+
+class TestOutputEncoder:
+    """Tests for OutputEncoder handler."""
+
+    BODY = b"<html>" + b"x" * 4096 + b"</html>"
+
+    def test_compresses_modified_body(self, create_flow):
+        import gzip
+        from core.proxy_pipeline import OutputEncoder
+
+        flow = create_flow(accept_encoding="gzip", content=self.BODY)
+        body = flow.response.content
+        context = {'injected': True}
+
+        assert OutputEncoder().process(flow, context) is True
+
+        headers = flow.response.headers
+        assert headers["Content-Encoding"] == "gzip"
+        assert headers["Content-Length"] == str(len(flow.response.raw_content))
+        assert gzip.decompress(flow.response.raw_content) == body
+        assert context['encoded'] == "gzip"
+
+    def test_skips_untouched_body(self, create_flow):
+        from core.proxy_pipeline import OutputEncoder
+
+        flow = create_flow(accept_encoding="gzip", content=self.BODY)
+        OutputEncoder().process(flow, {})
+
+        assert "Content-Encoding" not in flow.response.headers
+
+    def test_skips_small_body(self, create_flow):
+        from core.proxy_pipeline import OutputEncoder
+
+        flow = create_flow(accept_encoding="gzip", content=b"<html></html>")
+        OutputEncoder({"min_size": 1024}).process(flow, {'injected': True})
+
+        assert "Content-Encoding" not in flow.response.headers
+
+    def test_skips_when_client_does_not_accept(self, create_flow):
+        from core.proxy_pipeline import OutputEncoder
+
+        flow = create_flow(accept_encoding="identity", content=self.BODY)
+        OutputEncoder().process(flow, {'injected': True})
+
+        assert "Content-Encoding" not in flow.response.headers
+
+    def test_disabled(self, create_flow):
+        from core.proxy_pipeline import OutputEncoder
+
+        flow = create_flow(accept_encoding="gzip", content=self.BODY)
+        OutputEncoder({"enabled": False}).process(flow, {'injected': True})
+
+        assert "Content-Encoding" not in flow.response.headers
+
+    def test_custom_level_and_order(self, create_flow):
+        from core.proxy_pipeline import OutputEncoder
+
+        encoder = OutputEncoder({"encodings": ["gzip"], "levels": {"gzip": 1}})
+        flow = create_flow(accept_encoding="br, gzip", content=self.BODY)
+        encoder.process(flow, {'injected': True})
+
+        assert encoder.levels["gzip"] == 1
+        assert flow.response.headers["Content-Encoding"] == "gzip"
+
+    def test_appends_vary(self, create_flow):
+        from core.proxy_pipeline import OutputEncoder
+
+        flow = create_flow(accept_encoding="gzip", content=self.BODY)
+        flow.response.headers["Vary"] = "Cookie"
+        OutputEncoder().process(flow, {'injected': True})
+
+        assert flow.response.headers["Vary"] == "Cookie, Accept-Encoding"
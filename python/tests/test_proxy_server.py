@@ -105,3 +105,410 @@ class TestAiPlugsAddonResponse:
 
         # Should not raise
         addon.response(flow)
+
+
+class TestAiPlugsAddonStreaming:
+    """Tests for AiPlugsAddon.responseheaders streaming mode."""
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    @patch('core.proxy_server.plugin_loader')
+    def test_buffered_mode_buffers_matched_html(self, mock_loader, mock_pipeline_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+        from core.matcher import MatchResult
+
+        mock_loader.plugins = {"test": MagicMock()}
+        block = MagicMock(js=["content.js"], all_frames=False)
+        mock_pipeline_loader.match_url.return_value = MatchResult([("p1", block)])
+
+        addon = AiPlugsAddon(api_port=8000)
+        flow = create_flow()
+
+        addon.responseheaders(flow)
+
+        # 매칭된 응답은 response 훅에서 버퍼링 주입
+        assert flow.response.stream is False
+        assert 'aiplugs' not in flow.metadata
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    @patch('core.proxy_server.plugin_loader')
+    def test_buffered_mode_passes_through_unmatched(self, mock_loader, mock_pipeline_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+        from core.matcher import MatchResult
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_pipeline_loader.match_url.return_value = MatchResult()
+
+        addon = AiPlugsAddon(api_port=8000)
+        flow = create_flow()
+        flow.response.headers["Content-Encoding"] = "gzip"
+        addon.responseheaders(flow)
+
+        assert flow.response.stream is True
+        assert flow.response.headers["Content-Encoding"] == "gzip"
+
+        # response 훅은 통과시킨 flow 를 건드리지 않음
+        for handler in addon.pipeline:
+            handler.process = MagicMock(return_value=True)
+        addon.response(flow)
+        addon.pipeline[0].process.assert_not_called()
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_pipeline_matches_before_decoding(self, mock_loader):
+        from core.proxy_server import AiPlugsAddon
+        from core.proxy_pipeline import PluginMatcher, Decoder
+
+        mock_loader.plugins = {"test": MagicMock()}
+        addon = AiPlugsAddon(api_port=8000)
+        kinds = [type(handler) for handler in addon.pipeline]
+
+        assert kinds.index(PluginMatcher) < kinds.index(Decoder)
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    @patch('core.proxy_server.plugin_loader')
+    def test_streams_matched_html(self, mock_loader, mock_pipeline_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+        from core.matcher import MatchResult
+
+        mock_loader.plugins = {"test": MagicMock()}
+        block = MagicMock(js=["content.js"], all_frames=False)
+        mock_pipeline_loader.match_url.return_value = MatchResult([("p1", block)])
+
+        addon = AiPlugsAddon(api_port=8000, streaming=True)
+        flow = create_flow()
+        addon.responseheaders(flow)
+
+        assert callable(flow.response.stream)
+        assert flow.metadata['aiplugs']['streamed'] is True
+
+        # response 훅은 스트리밍된 flow 를 다시 처리하지 않음
+        for handler in addon.pipeline:
+            handler.process = MagicMock(return_value=True)
+        addon.response(flow)
+        addon.pipeline[0].process.assert_not_called()
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    @patch('core.proxy_server.plugin_loader')
+    def test_passes_through_unmatched(self, mock_loader, mock_pipeline_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+        from core.matcher import MatchResult
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_pipeline_loader.match_url.return_value = MatchResult()
+
+        addon = AiPlugsAddon(api_port=8000, streaming=True)
+        flow = create_flow()
+        addon.responseheaders(flow)
+
+        assert flow.response.stream is True
+
+    @pytest.mark.parametrize("streaming", [True, False])
+    @patch('core.proxy_pipeline.plugin_loader')
+    @patch('core.proxy_server.plugin_loader')
+    def test_not_modified_passes_through_untouched(self, mock_loader, mock_pipeline_loader, streaming, create_flow):
+        from core.proxy_server import AiPlugsAddon
+        from core.matcher import MatchResult
+
+        mock_loader.plugins = {"test": MagicMock()}
+        block = MagicMock(js=["content.js"], all_frames=False)
+        mock_pipeline_loader.match_url.return_value = MatchResult([("p1", block)])
+
+        addon = AiPlugsAddon(api_port=8000, streaming=streaming)
+        flow = create_flow()
+        flow.response.status_code = 304
+        flow.response.headers["ETag"] = '"abc"'
+        flow.response.headers["Content-Length"] = "0"
+        flow.response.content = b""
+        addon.responseheaders(flow)
+
+        assert flow.response.stream is True
+        assert flow.metadata['aiplugs'] == {'passthrough': True}
+        assert flow.response.headers["ETag"] == '"abc"'
+        assert flow.response.headers["Content-Length"] == "0"
+        assert "Transfer-Encoding" not in flow.response.headers
+
+        # response 훅도 본문을 만들지 않음
+        addon.response(flow)
+        assert flow.response.content == b""
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_passes_through_non_html(self, mock_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        addon = AiPlugsAddon(api_port=8000, streaming=True)
+        flow = create_flow(content_type="image/png")
+        addon.responseheaders(flow)
+
+        assert flow.response.stream is True
+
+
+class TestAiPlugsAddonRequest:
+    """Tests for AiPlugsAddon.request (request-phase classification)."""
+
+    def _respond(self, flow, content_type="text/html"):
+        from mitmproxy.test import tutils
+        from mitmproxy import http
+
+        flow.response = tutils.tresp()
+        flow.response.headers = http.Headers(content_type=content_type)
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    @patch('core.proxy_server.plugin_loader')
+    def test_marks_subresource_as_passthrough(self, mock_loader, mock_pipeline_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        addon = AiPlugsAddon(api_port=8000)
+        flow = create_flow(dest="image", mode="no-cors", response=False)
+
+        addon.request(flow)
+
+        assert flow.metadata['aiplugs'] == {'passthrough': True}
+        mock_pipeline_loader.match_url.assert_not_called()
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    @patch('core.proxy_server.plugin_loader')
+    def test_marks_unmatched_navigation_as_passthrough(self, mock_loader, mock_pipeline_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+        from core.matcher import MatchResult
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_pipeline_loader.match_url.return_value = MatchResult()
+        addon = AiPlugsAddon(api_port=8000)
+        flow = create_flow(response=False)
+
+        addon.request(flow)
+
+        assert flow.metadata['aiplugs'] == {'passthrough': True}
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    @patch('core.proxy_server.plugin_loader')
+    def test_candidate_is_not_marked(self, mock_loader, mock_pipeline_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+        from core.matcher import MatchResult
+
+        mock_loader.plugins = {"test": MagicMock()}
+        block = MagicMock(js=["content.js"], all_frames=False)
+        mock_pipeline_loader.match_url.return_value = MatchResult([("p1", block)])
+        addon = AiPlugsAddon(api_port=8000)
+        flow = create_flow(response=False)
+
+        addon.request(flow)
+
+        assert 'aiplugs' not in flow.metadata
+
+    @patch('core.proxy_pipeline.plugin_loader')
+    @patch('core.proxy_server.plugin_loader')
+    def test_passthrough_skips_response_pipelines(self, mock_loader, mock_pipeline_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        addon = AiPlugsAddon(api_port=8000)
+        flow = create_flow(dest="empty", mode="cors", response=False)
+
+        addon.request(flow)
+        self._respond(flow)
+        for handler in addon.match_pipeline + addon.pipeline:
+            handler.process = MagicMock(return_value=True)
+
+        addon.responseheaders(flow)
+        addon.response(flow)
+
+        assert flow.response.stream is True
+        for handler in addon.match_pipeline + addon.pipeline:
+            handler.process.assert_not_called()
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_handles_exception(self, mock_loader, create_flow):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        addon = AiPlugsAddon(api_port=8000)
+        flow = create_flow(response=False)
+        addon.request_pipeline[0].process = MagicMock(side_effect=Exception("Test error"))
+
+        addon.request(flow)
+
+        assert 'aiplugs' not in flow.metadata
+
+
+class TestAiPlugsAddonTlsClientHello:
+    """Tests for AiPlugsAddon.tls_clienthello (TLS passthrough)."""
+
+    def _data(self, sni="www.example.com", address=("93.184.216.34", 443)):
+        data = MagicMock()
+        data.client_hello.sni = sni
+        data.context.server.address = address
+        data.ignore_connection = False
+        return data
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_configured_passthrough_host(self, mock_loader):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_loader.generation = 1
+        mock_loader.could_match_host.return_value = True
+        addon = AiPlugsAddon(api_port=8000, ssl_passthrough=["*.bank.co.kr"])
+        data = self._data(sni="www.bank.co.kr")
+
+        addon.tls_clienthello(data)
+
+        assert data.ignore_connection is True
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_host_without_plugins_is_not_intercepted(self, mock_loader):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_loader.generation = 1
+        mock_loader.could_match_host.return_value = False
+        addon = AiPlugsAddon(api_port=8000)
+        data = self._data()
+
+        addon.tls_clienthello(data)
+
+        assert data.ignore_connection is True
+        mock_loader.could_match_host.assert_called_once_with("www.example.com")
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_candidate_host_is_intercepted(self, mock_loader):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_loader.generation = 1
+        mock_loader.could_match_host.return_value = True
+        addon = AiPlugsAddon(api_port=8000, ssl_passthrough=["*.bank.co.kr"])
+        data = self._data()
+
+        addon.tls_clienthello(data)
+
+        assert data.ignore_connection is False
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_falls_back_to_server_address(self, mock_loader):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_loader.generation = 1
+        addon = AiPlugsAddon(api_port=8000, ssl_passthrough=["127.0.0.1"])
+        data = self._data(sni=None, address=("127.0.0.1", 8443))
+
+        addon.tls_clienthello(data)
+
+        assert data.ignore_connection is True
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_unknown_host_is_intercepted(self, mock_loader):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_loader.generation = 1
+        addon = AiPlugsAddon(api_port=8000)
+        data = self._data(sni=None, address=None)
+
+        addon.tls_clienthello(data)
+
+        assert data.ignore_connection is False
+        mock_loader.could_match_host.assert_not_called()
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_decision_is_cached_per_host(self, mock_loader):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_loader.generation = 1
+        mock_loader.could_match_host.return_value = False
+        addon = AiPlugsAddon(api_port=8000)
+
+        for _ in range(3):
+            addon.tls_clienthello(self._data())
+
+        mock_loader.could_match_host.assert_called_once_with("www.example.com")
+        stats = addon.tls_decisions.stats()
+        assert stats["hits"] == 2
+        assert stats["passed_through"] == 3
+        assert stats["intercepted"] == 0
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_logs_passthrough_ratio_periodically(self, mock_loader, capsys):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_loader.generation = 1
+        mock_loader.could_match_host.return_value = False
+        mock_loader.match_cache.stats.return_value = {"hits": 0, "misses": 0}
+        addon = AiPlugsAddon(api_port=8000)
+        capsys.readouterr()
+
+        addon.tls_clienthello(self._data())
+        assert "passed through" not in capsys.readouterr().out
+
+        addon._next_stats = 0
+        addon.tls_clienthello(self._data())
+        out = capsys.readouterr().out
+        assert "0 intercepted, 2 passed through (100.0% passthrough" in out
+
+        addon.tls_clienthello(self._data())
+        assert capsys.readouterr().out == ""
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_done_logs_final_stats(self, mock_loader, capsys):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_loader.generation = 1
+        mock_loader.could_match_host.return_value = True
+        mock_loader.match_cache.stats.return_value = {
+            "hits": 3, "misses": 1, "hit_rate": 0.75, "size": 1, "maxsize": 4096,
+        }
+        addon = AiPlugsAddon(api_port=8000)
+        addon.tls_clienthello(self._data())
+        capsys.readouterr()
+
+        addon.done()
+
+        out = capsys.readouterr().out
+        assert "1 intercepted, 0 passed through" in out
+        assert "Match cache: 3 hits, 1 misses (75.0% hit rate, 1/4096 entries)" in out
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_request_logs_match_cache_stats_periodically(self, mock_loader, capsys, create_flow):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {}
+        mock_loader.generation = 1
+        mock_loader.match_cache.stats.return_value = {
+            "hits": 9, "misses": 1, "hit_rate": 0.9, "size": 1, "maxsize": 4096,
+        }
+        addon = AiPlugsAddon(api_port=8000)
+        capsys.readouterr()
+        flow = create_flow(response=False)
+
+        addon.request(flow)
+        assert "Match cache" not in capsys.readouterr().out
+
+        addon._next_stats = 0
+        addon.request(flow)
+        out = capsys.readouterr().out
+        assert "Match cache: 9 hits, 1 misses (90.0% hit rate" in out
+        assert "TLS:" not in out
+
+    @patch('core.proxy_server.plugin_loader')
+    def test_plugin_reload_invalidates_decisions(self, mock_loader):
+        from core.proxy_server import AiPlugsAddon
+
+        mock_loader.plugins = {"test": MagicMock()}
+        mock_loader.generation = 1
+        mock_loader.could_match_host.return_value = False
+        addon = AiPlugsAddon(api_port=8000)
+        addon.tls_clienthello(self._data())
+
+        # 새 플러그인이 이 호스트를 매칭하게 됨
+        mock_loader.generation = 2
+        mock_loader.could_match_host.return_value = True
+        data = self._data()
+        addon.tls_clienthello(data)
+
+        assert data.ignore_connection is False
+        assert addon.tls_decisions.stats()["intercepted"] == 1
@@ -29,6 +29,25 @@ class TestModelRequirement:
         assert model.sha256 is None
         assert model.description is None
 
+    def test_model_requirement_engine_fields(self):
+        from core.schemas import ModelRequirement
+
+        model = ModelRequirement(
+            key="MODEL_MELON", filename="model_melon.pt",
+            input={"width": 230, "height": 70}, runtime={"variant": "int8", "workers": 2}
+        )
+        assert model.architecture == "crnn"
+        assert (model.input.width, model.input.height) == (230, 70)
+        assert model.runtime.variant == "int8"
+        assert model.runtime.torchscript is True
+        assert model.runtime.workers == 2
+
+    def test_model_requirement_rejects_unknown_variant(self):
+        from core.schemas import ModelRequirement
+
+        with pytest.raises(ValidationError):
+            ModelRequirement(key="M", filename="m.pt", runtime={"variant": "fp8"})
+
     def test_model_requirement_missing_required(self):
         from core.schemas import ModelRequirement
 